@@ -5,7 +5,6 @@ import json
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-from dotenv import load_dotenv
 from pathlib import Path
 
 try:
@@ -16,25 +15,37 @@ except ImportError:
     Client = None
 
 from bot_config import BotConfig, SafetyChecker
+from settings import get_settings, subscribe
+from media_pipeline import ImagePreprocessor, VideoPipeline
+from circuit_breaker import CircuitBreaker
+from timeouts import apply_http_timeout, call_with_timeout, client_busy, sleep
 
 class AdvancedInstagramBot:
     """Advanced Instagram bot with enhanced safety and features"""
     
     def __init__(self):
-        load_dotenv()
         self.setup_logging()
+        self.settings = get_settings()
         self.load_configuration()
+        subscribe(self.on_settings_changed)
         
-        # Initialize safety checker
+        # Initialize safety checker and the breaker it drives
         self.safety_checker = SafetyChecker()
+        self.breaker = CircuitBreaker('instagram', self.safety_checker, logger=self.logger)
         
         # Initialize client
         if Client:
             self.client = Client()
+            apply_http_timeout(self.client.private)
+            apply_http_timeout(self.client.public)
         else:
             self.client = None
             self.logger.error("Instagram client not available")
             
+        # Resizes/recompresses images before upload
+        self.preprocessor = ImagePreprocessor(logger=self.logger)
+        self.video_pipeline = VideoPipeline(logger=self.logger)
+            
         # Activity tracking
         self.activity_tracker = {
             'session_start': None,
@@ -74,21 +85,29 @@ class AdvancedInstagramBot:
         self.error_logger.addHandler(error_handler)
         
     def load_configuration(self):
-        """Load bot configuration from environment and config"""
-        self.username = os.getenv('INSTAGRAM_USERNAME')
-        self.password = os.getenv('INSTAGRAM_PASSWORD')
+        """Load bot configuration from the shared settings"""
+        settings = self.settings
+        self.username = settings.instagram_username
+        self.password = settings.instagram_password
         
         if not self.username or not self.password:
             raise ValueError("Instagram credentials not found in .env file")
             
         # Bot settings with defaults
-        self.content_folder = Path(os.getenv('CONTENT_FOLDER', 'content'))
-        self.enable_posting = os.getenv('ENABLE_POSTING', 'true').lower() == 'true'
-        self.enable_engagement = os.getenv('ENABLE_ENGAGEMENT', 'true').lower() == 'true'
-        self.dry_run = os.getenv('DRY_RUN', 'false').lower() == 'true'
+        self.content_folder = Path(settings.content_folder)
+        self.enable_posting = settings.enable_posting
+        self.enable_engagement = settings.enable_engagement
+        self.dry_run = settings.dry_run
         
         self.logger.info(f"Bot configured - Posting: {self.enable_posting}, Engagement: {self.enable_engagement}")
         
+    def on_settings_changed(self, settings, changed):
+        """Apply reloaded settings without re-creating the client"""
+        try:
+            self.load_configuration()
+        except ValueError as e:
+            self.logger.error(f"Keeping previous configuration: {e}")
+        
     def load_activity_data(self):
         """Load activity tracking data"""
         try:
@@ -150,6 +169,15 @@ class AdvancedInstagramBot:
             self.logger.error("Instagram client not available")
             return False
             
+        if not self.breaker.allow_request():
+            self.logger.warning(f"Instagram circuit open, skipping login (retry in {self.breaker.seconds_until_retry()}s)")
+            return False
+            
+        # An abandoned call (e.g. a timed-out upload) still owns the session; don't reset it underneath
+        if client_busy(self.client):
+            self.logger.warning("Instagram client still busy with an abandoned call, skipping login")
+            return False
+            
         try:
             self.logger.info(f"Attempting login for {self.username}")
             
@@ -158,20 +186,22 @@ class AdvancedInstagramBot:
             if session_file.exists():
                 try:
                     self.client.load_settings(session_file)
-                    self.client.login(self.username, self.password)
+                    call_with_timeout(self.client.login, self.username, self.password, operation='login')
                     self.logger.info("Logged in using saved session")
+                    self.breaker.record_success()
                     return True
                 except:
                     self.logger.info("Saved session invalid, logging in fresh")
                     
             # Fresh login
-            self.client.login(self.username, self.password)
+            call_with_timeout(self.client.login, self.username, self.password, operation='login')
             
             # Save session
             session_file.parent.mkdir(exist_ok=True)
             self.client.dump_settings(session_file)
             
             self.safety_checker.start_session()
+            self.breaker.record_success()
             self.logger.info("Successfully logged in and session saved")
             return True
             
@@ -182,13 +212,13 @@ class AdvancedInstagramBot:
             
         except RateLimitError as e:
             self.error_logger.error(f"Rate limit error: {e}")
-            self.logger.error("Rate limited. Waiting before retry...")
-            time.sleep(BotConfig.DELAYS['error_delay'])
+            # Defer Instagram work for the cooldown instead of freezing the process
+            self.breaker.trip(f"Rate limit error: {e}")
             return False
             
         except Exception as e:
             self.error_logger.error(f"Login failed: {e}")
-            self.safety_checker.record_error()
+            self.breaker.record_failure(f"Login failed: {e}")
             return False
             
     def safe_logout(self):
@@ -221,7 +251,7 @@ class AdvancedInstagramBot:
             delay = self.get_random_delay()
             
         self.logger.info(f"Human delay: {delay} seconds ({action_type})")
-        time.sleep(delay)
+        sleep(delay)
         
     def can_perform_action(self, action_type: str) -> Tuple[bool, str]:
         """Check if an action can be performed safely"""
@@ -286,7 +316,8 @@ class AdvancedInstagramBot:
                 pass
                 
         # Find unposted files
-        unposted_files = [f for f in content_files if f.name not in posted_files]
+        posted_names = set(posted_files)
+        unposted_files = [f for f in content_files if f.name not in posted_names]
         
         if not unposted_files:
             # All files posted, reset history
@@ -346,6 +377,10 @@ class AdvancedInstagramBot:
         if not self.can_perform_action('post')[0]:
             return False
             
+        if not self.breaker.allow_request():
+            self.logger.warning(f"Instagram circuit open, deferring post (retry in {self.breaker.seconds_until_retry()}s)")
+            return False
+            
         try:
             content_file = self.get_content_to_post()
             if not content_file:
@@ -361,12 +396,15 @@ class AdvancedInstagramBot:
             
             # Post based on file type
             if content_file.suffix.lower() == '.mp4':
-                media = self.client.video_upload(str(content_file), caption)
+                media = call_with_timeout(self.video_pipeline.upload, self.client, content_file, caption,
+                                          operation='upload_video', client=self.client)
             else:
-                media = self.client.photo_upload(str(content_file), caption)
+                upload_file = self.preprocessor.prepare(content_file, 'instagram')
+                media = call_with_timeout(self.client.photo_upload, str(upload_file), caption, operation='upload')
                 
             if media:
                 self.record_action('post')
+                self.breaker.record_success()
                 self.logger.info(f"Successfully posted: {media.pk}")
                 self.human_delay('post')
                 return True
@@ -376,9 +414,10 @@ class AdvancedInstagramBot:
                 
         except Exception as e:
             self.error_logger.error(f"Error posting content: {e}")
-            self.safety_checker.record_error()
-            self.human_delay('error')
+            self.breaker.record_failure(f"Error posting content: {e}")
             return False
+        finally:
+            self.breaker.end_trial()
             
     def get_activity_summary(self) -> Dict:
         """Get summary of bot activities"""
@@ -388,7 +427,8 @@ class AdvancedInstagramBot:
         return {
             'today': self.activity_tracker['daily_stats'],
             'this_hour': self.activity_tracker['actions_this_hour'],
-            'session_active': self.safety_checker.session_start is not None
+            'session_active': self.safety_checker.session_start is not None,
+            'circuit': self.breaker.status()
         }
 
 # Example usage and testing
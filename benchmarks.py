@@ -0,0 +1,285 @@
+"""
+Microbenchmarks
+Times the functions that run on every action or post (rate-limit checks, action recording,
+content selection, captions and the JSON state files) against generated content libraries
+and post histories, and compares the results with a stored baseline
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import timeit
+import logging
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+from bot_config import BotConfig
+
+CONTENT_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.mp4')
+
+# Benchmarks whose cost depends on the library size; the rest run once, at the first scale
+SCALED = ('AdvancedInstagramBot.get_content_to_post', 'SocialMediaBot.get_content_to_post')
+
+
+def generate_fixtures(root: Path, scale: int):
+    """Content folder with `scale` files, a post history of half of them and the bots' state files
+
+    Half of the library is already in the post history, so get_content_to_post
+    has to filter a full-size history against a full-size folder.
+    """
+    content = root / 'content'
+    data = root / 'data'
+    for folder in (content, data, root / 'logs'):
+        folder.mkdir(parents=True, exist_ok=True)
+
+    names = [f"post_{i:07d}{CONTENT_EXTENSIONS[i % len(CONTENT_EXTENSIONS)]}" for i in range(scale)]
+    for name in names:
+        # Empty files: only directory listing and history filtering are being timed
+        os.close(os.open(content / name, os.O_CREAT | os.O_WRONLY, 0o644))
+
+    rng = random.Random(scale)
+    posted = rng.sample(names, scale // 2)
+    with open(data / 'post_history.json', 'w') as f:
+        json.dump({'posted_files': posted}, f, indent=2)
+
+    today = datetime.now().date().isoformat()
+    now = datetime.now().isoformat()
+    # The X bot keeps its repeat guard trimmed to recent_posts_size, so that file is always full size
+    recent = [[f"{i:016x}", now] for i in range(BotConfig.CONTENT['recent_posts_size'])]
+    with open(data / 'x_activity.json', 'w') as f:
+        json.dump({'session_start': None, 'actions_this_hour': {}, 'daily_stats': {'tweet': 1},
+                   'last_activity_reset': today, 'recent_posts': recent}, f, indent=2)
+    with open(data / 'activity_tracker.json', 'w') as f:
+        json.dump({'session_start': None, 'actions_this_hour': {}, 'daily_stats': {'like': 3},
+                   'last_activity_reset': today}, f, indent=2)
+    with open(root / 'activity_log.json', 'w') as f:
+        json.dump({'likes_today': 3, 'comments_today': 1, 'follows_today': 0,
+                   'last_reset': today, 'last_post': None}, f, indent=2)
+
+
+def build_benchmarks() -> Tuple[Dict[str, Callable], Callable]:
+    """Bots created in the current directory, the calls to time by name, and a fixture reset
+
+    Several timed calls write state (get_content_to_post appends to the post
+    history, record_action bumps the activity counters). The returned reset
+    puts the generated files and the bots' loaded state back, and runs before
+    every timing round, so rounds and scales all time the same fixtures.
+    """
+    from advanced_bot import AdvancedInstagramBot
+    from bot_config import SafetyChecker
+    from instagram_bot import InstagramBot
+    from social_media_bot import SocialMediaBot
+    from x_bot import XBot
+
+    advanced = AdvancedInstagramBot()
+    instagram = InstagramBot()
+    x = XBot()
+    x.enabled = True
+    social = SocialMediaBot()
+    checker = SafetyChecker()
+    content_file = Path('content/post_0000000.jpg')
+    fixtures = {path: path.read_bytes() for path in [*Path('data').glob('*.json'), Path('activity_log.json')]}
+
+    def reset():
+        for path, data in fixtures.items():
+            path.write_bytes(data)
+        advanced.load_activity_data()
+        advanced.safety_checker.reset_daily_counters()
+        instagram.load_activity_log()
+        x.load_activity_data()
+        # Reloading replaced the list the repeat guard updates in place
+        x.activity_tracker['recent_posts'] = x.recent_posts.entries
+
+    # Limited actions are checked before anything is recorded; recording uses
+    # an unlimited action type so the checks keep taking the allowed path
+    benchmarks = {
+        'SafetyChecker.can_perform_action': lambda: checker.can_perform_action('like', 3),
+        'InstagramBot.can_perform_action': lambda: instagram.can_perform_action('like'),
+        'AdvancedInstagramBot.can_perform_action': lambda: advanced.can_perform_action('like'),
+        'XBot.can_perform_action': lambda: x.can_perform_action('like'),
+        'InstagramBot.create_post_caption': lambda: instagram.create_post_caption(content_file.name),
+        'AdvancedInstagramBot.create_post_caption': lambda: advanced.create_post_caption(content_file),
+        'XBot.create_post_content': lambda: x.create_post_content('motivation'),
+        'AdvancedInstagramBot.record_action': lambda: advanced.record_action('benchmark'),
+        'XBot.record_action': lambda: x.record_action('benchmark'),
+        'InstagramBot.load_activity_log': instagram.load_activity_log,
+        'InstagramBot.save_activity_log': instagram.save_activity_log,
+        'AdvancedInstagramBot.load_activity_data': advanced.load_activity_data,
+        'AdvancedInstagramBot.save_activity_data': advanced.save_activity_data,
+        'XBot.load_activity_data': x.load_activity_data,
+        'XBot.save_activity_data': x.save_activity_data,
+        'SocialMediaBot.load_activity_data': social.load_activity_data,
+        'SocialMediaBot.save_activity_data': social.save_activity_data,
+        'AdvancedInstagramBot.get_content_to_post': advanced.get_content_to_post,
+        'SocialMediaBot.get_content_to_post': social.get_content_to_post,
+    }
+    return benchmarks, reset
+
+
+def measure(func: Callable, repeat: Optional[int] = None, min_time: Optional[float] = None,
+            setup: Optional[Callable] = None) -> float:
+    """Best seconds per call over `repeat` rounds of at least `min_time` seconds each
+
+    `setup` runs untimed before every round (calibration rounds included); a
+    call that writes state can only drift by the calls of one round.
+    """
+    repeat = repeat or BotConfig.BENCHMARKS['repeat']
+    min_time = min_time or BotConfig.BENCHMARKS['min_time']
+    timer = timeit.Timer(func, setup=setup or 'pass')
+
+    # Calibration doubles as warm-up (file and template caches) and is not counted
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+    # Calls slower than a whole round (large libraries) get fewer rounds
+    rounds = repeat if elapsed < 1 else max(2, repeat // 2)
+    return min(timer.repeat(repeat=rounds, number=number)) / number
+
+
+def run_benchmarks(scales: List[int], only: Optional[str] = None, limits: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Seconds per call keyed by name ('name@scale' for SCALED), each scale in a throwaway directory
+
+    A result over its entry in `limits` is measured once more and the faster
+    timing kept, so one noisy round does not fail the run.
+    """
+    limits = limits or {}
+    from settings import BotSettings
+
+    # Defaults plus placeholder credentials, never the real .env
+    settings = BotSettings(instagram_username='benchmark', instagram_password='benchmark', content_folder='content')
+    results = {}
+    cwd = os.getcwd()
+    sandbox = tempfile.mkdtemp(prefix='bot_bench_')
+    logging.disable(logging.CRITICAL)
+    try:
+        with mock.patch('settings._settings', settings):
+            for scale in scales:
+                root = Path(sandbox) / f"scale_{scale}"
+                print(f"📁 Generating {scale:,} content files and history...")
+                generate_fixtures(root, scale)
+                os.chdir(root)
+                try:
+                    benchmarks, reset = build_benchmarks()
+                    for name, func in benchmarks.items():
+                        if only and only not in name:
+                            continue
+                        key = f"{name}@{scale}" if name in SCALED else name
+                        if key in results:
+                            continue
+                        results[key] = measure(func, setup=reset)
+                        if results[key] > limits.get(key, float('inf')):
+                            results[key] = min(results[key], measure(func, setup=reset))
+                        print(f"   ⏱️  {key:<52} {format_time(results[key]):>10}")
+                finally:
+                    os.chdir(cwd)
+                    shutil.rmtree(root, ignore_errors=True)
+    finally:
+        logging.disable(logging.NOTSET)
+        os.chdir(cwd)
+        shutil.rmtree(sandbox, ignore_errors=True)
+    return results
+
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def load_baseline(path=None) -> Dict:
+    path = Path(path or BotConfig.BENCHMARKS['baseline_file'])
+    try:
+        if path.exists():
+            with open(path, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"⚠️  Could not read baseline {path}: {e}")
+    return {}
+
+
+def save_baseline(results: Dict[str, float], path=None):
+    """Merge `results` into the baseline file (benchmarks not re-run keep their old value)"""
+    path = Path(path or BotConfig.BENCHMARKS['baseline_file'])
+    baseline = load_baseline(path)
+    baseline.setdefault('results', {}).update(results)
+    baseline['saved'] = datetime.now().isoformat()
+    baseline['python'] = platform.python_version()
+    baseline['machine'] = platform.machine()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"💾 Baseline saved to {path} ({len(results)} benchmarks)")
+
+
+def compare(results: Dict[str, float], baseline: Dict, threshold: Optional[float] = None) -> List[str]:
+    """Print each result against the baseline; returns the keys that regressed"""
+    threshold = BotConfig.BENCHMARKS['threshold'] if threshold is None else threshold
+    previous = baseline.get('results', {})
+    regressions = []
+
+    print(f"\n📊 Compared with baseline from {baseline.get('saved', 'never')[:16]} (threshold +{threshold:.0%})")
+    for key, seconds in results.items():
+        if key not in previous:
+            print(f"   🆕 {key:<52} {format_time(seconds):>10}")
+            continue
+        change = seconds / previous[key] - 1
+        if change > threshold:
+            icon = '❌'
+            regressions.append(key)
+        elif change < -threshold:
+            icon = '🚀'
+        else:
+            icon = '✅'
+        print(f"   {icon} {key:<52} {format_time(seconds):>10}  vs {format_time(previous[key]):>10}  ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None) -> bool:
+    parser = argparse.ArgumentParser(description="Offline microbenchmarks of the bots' per-action hot paths")
+    parser.add_argument('--scale', type=int, action='append',
+                        help=f"Content files to generate (repeatable, default {BotConfig.BENCHMARKS['scales']})")
+    parser.add_argument('--only', help="Run only benchmarks whose name contains this text")
+    parser.add_argument('--threshold', type=float, help="Allowed slowdown as a fraction (default from BotConfig.BENCHMARKS)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    baseline_file = Path(BotConfig.BENCHMARKS['baseline_file']).resolve()
+    scales = args.scale or BotConfig.BENCHMARKS['scales']
+
+    print(f"🏁 Benchmarking at {', '.join(f'{scale:,}' for scale in scales)} content files...")
+    threshold = BotConfig.BENCHMARKS['threshold'] if args.threshold is None else args.threshold
+    baseline = load_baseline(baseline_file)
+    limits = {key: seconds * (1 + threshold) for key, seconds in baseline.get('results', {}).items()}
+    results = run_benchmarks(scales, args.only, limits)
+    if not results:
+        print("❌ No benchmarks matched")
+        return False
+
+    regressions = compare(results, baseline, threshold)
+
+    if args.save_baseline:
+        save_baseline(results, baseline_file)
+        return True
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        return False
+    print("\n✅ No regressions")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
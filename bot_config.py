@@ -48,7 +48,9 @@ class BotConfig:
             'healthyhabits',
             'supporteachother',
             'yesplease'
-        ]
+        ],
+        'recent_posts_size': 500,       # Posted texts remembered for the repeat guard
+        'repeat_window_days': 60        # Never repeat a text inside this window
     }
     
     # Comment Templates
@@ -71,7 +73,8 @@ class BotConfig:
         'cooldown_after_errors': 3600,  # 1 hour cooldown
         'max_login_attempts': 3,
         'session_duration': 7200,       # 2 hours max session
-        'daily_activity_limit': 1000    # Total daily actions
+        'daily_activity_limit': 1000,   # Total daily actions
+        'trial_timeout': 900            # A half-open trial with no outcome after this long is given up
     }
     
     # Engagement Settings
@@ -82,7 +85,137 @@ class BotConfig:
         'skip_business_accounts': True,
         'skip_verified_accounts': True,
         'min_followers': 100,           # Min followers to engage
-        'max_followers': 100000         # Max followers to engage
+        'max_followers': 100000,        # Max followers to engage
+        'index_capacity': 100000,       # Likes/follows remembered per platform
+        'index_recent_size': 5000       # Of those, kept exactly (most recent)
+    }
+    
+    # Feed Cursor Settings
+    FEEDS = {
+        'x_cursor_max_age_hours': 144,          # Recent search only reaches back 7 days
+        'instagram_cursor_max_age_hours': 48,   # Older cursors fall back to a full fetch
+        'max_pages': 3,                         # Pages fetched per search, lazily
+        'pass_rate_alpha': 0.3,                 # Weight of the latest run in the pass-rate average
+        'default_pass_rate': 0.5,               # Assumed before any history exists
+        'min_pass_rate': 0.1                    # Caps over-fetching when few items pass
+    }
+    
+    # Candidate Scoring (log-scaled metrics, weighted; outside the limits is never picked)
+    SCORING = {
+        'repost': {
+            'weights': {'like_count': 1.0, 'retweet_count': 2.0},
+            'min_like_count': 5,        # Eligible above this many likes...
+            'min_retweet_count': 2      # ...or above this many reposts
+        },
+        'follow': {
+            'weights': {'followers_count': 1.0, 'follow_ratio': 2.0},  # ratio favours follow-back
+            'min_followers': 100,
+            'max_followers': 10000,
+            'max_following_ratio': 2.0  # Skip accounts following > 2x their followers
+        }
+    }
+    
+    # Post Outbox Settings
+    OUTBOX = {
+        'batch_size': 3,        # Max queued posts sent per drain
+        'max_attempts': 5,      # Attempts before a post is marked failed
+        'keep_sent_days': 7     # How long sent, failed and unknown records are kept
+    }
+    
+    # Unsplash image pool
+    UNSPLASH = {
+        'batch_size': 30,       # Photos per /photos/random request (API maximum)
+        'download_workers': 4,  # Parallel image downloads
+        'timeout': 15,          # Seconds per HTTP request
+        'min_match': 0.5,       # Share of query keywords a local photo must match
+        'reuse_after_days': 30, # A posted photo may be reused after this long
+        'index_file': 'data/unsplash_index.json'   # Metadata of downloaded photos
+    }
+    
+    # Image renditions uploaded to each platform
+    # size is (width, height); 'crop' fills the frame, 'fit' keeps the whole image
+    RENDITIONS = {
+        'instagram': {'size': (1080, 1080), 'mode': 'crop', 'quality': 85, 'max_bytes': 1600 * 1024},
+        'x': {'size': (1600, 900), 'mode': 'fit', 'quality': 85, 'max_bytes': 1024 * 1024}
+    }
+    
+    # Media Settings
+    MEDIA = {
+        'cache_folder': 'data/media_cache',
+        'min_quality': 60,            # Lowest JPEG quality used to hit max_bytes
+        'cover_at_seconds': 1.0,      # Video frame used as the cover thumbnail
+        'upload_state_file': 'data/upload_state.json',
+        'upload_chunk_size': 4 * 1024 * 1024,   # Chunked upload segment size
+        'upload_resume_window': 12 * 3600,      # Resume partial uploads younger than this
+        'perceptual_index_file': 'data/perceptual_index.json',
+        'perceptual_hash': 'phash',   # 'phash' (DCT) or 'dhash' (gradient)
+        'duplicate_distance': 8       # Max differing bits (of 64) for a near-duplicate
+    }
+    
+    # Per-call deadlines (seconds)
+    TIMEOUTS = {
+        'http': 30,             # Socket connect/read timeout for every HTTP request
+        'login': 90,
+        'fetch': 60,            # Searches, hashtag feeds, timelines
+        'action': 30,           # Like, comment, follow, repost
+        'post': 60,             # Text posts
+        'upload': 180,          # Photo uploads
+        'upload_video': 900,    # Video uploads, including processing
+        'job': 3 * 3600,        # A scheduled job running longer than this is stalled
+        'watchdog_interval': 30 # How often the watchdog checks running jobs
+    }
+    
+    # Start-up warm-up before the scheduler's first job
+    WARMUP = {
+        'timeout': 300,         # Seconds to wait for warm-up before scheduling anyway
+        'max_workers': 4,       # Warm-up tasks run in parallel
+        'prefill_queries': 3    # Image queries without a local match to batch-fetch at start-up
+    }
+    
+    # Scheduled job run history (duration, lateness, outcome)
+    JOB_METRICS = {
+        'file': 'data/job_runs.jsonl',
+        'keep_days': 30,        # Runs older than this are dropped at scheduler start
+        'alert_days': 7         # bot_manager lists overruns, skipped slots and failures this recent
+    }
+    
+    # Run traces (enabled with TRACE_FORMAT=jsonl or chrome in .env)
+    TRACING = {
+        'folder': 'logs/traces',
+        'keep_files': 200       # Oldest traces beyond this are deleted
+    }
+    
+    # --profile runs (mock clients, virtual sleep)
+    PROFILING = {
+        'folder': 'logs/profiles',
+        'top_functions': 40,     # Rows per pstats listing
+        'top_allocations': 25,   # Allocation sites in the tracemalloc report
+        'traceback_frames': 10,  # Frames kept per allocation
+        'unsplash_images': 40    # Distinct mock photos served to the Unsplash pool
+    }
+
+    # Offline microbenchmarks of the per-action and per-post hot paths (benchmarks.py)
+    BENCHMARKS = {
+        'baseline_file': 'data/benchmark_baseline.json',
+        'scales': [10, 10_000, 1_000_000],  # Content files (and post history) generated per run
+        'threshold': 0.5,    # Slower than baseline by more than this fraction is a regression
+        'repeat': 5,         # Timing rounds per benchmark; the fastest round is kept
+        'min_time': 0.2      # Seconds each timing round should last at least
+    }
+    
+    # Local control socket of a running scheduler (used by bot_manager)
+    CONTROL = {
+        'socket_path': 'data/control.sock',
+        'timeout': 60,          # Seconds bot_manager waits for an answer
+        'scheduler_wait': 45    # Seconds a command waits for the scheduler thread (below timeout)
+    }
+    
+    # validate_setup.py health check
+    VALIDATION = {
+        'deadline': 1.0,            # Seconds for the whole validation; slower checks are reported
+        'network_timeout': 0.8,     # Connect/read timeout per network probe
+        'cache_file': 'data/validation_cache.json',
+        'large_file_mb': 50         # Content files above this may fail to upload
     }
     
     # Schedule Settings (24-hour format)
@@ -98,24 +231,30 @@ class BotConfig:
 class SafetyChecker:
     """Safety checker to validate bot activities"""
     
+    # Errors older than this no longer count towards max_errors_per_hour
+    ERROR_WINDOW = 3600
+    
     def __init__(self):
         self.error_count = 0
+        self.error_times = []
         self.last_error_time = None
         self.daily_actions = 0
         self.session_start = None
         
     def can_perform_action(self, action_type, current_count):
         """Check if action can be performed safely"""
-        limits = BotConfig.RATE_LIMITS
+        # Effective limits come from the shared settings (defaults: RATE_LIMITS)
+        from settings import get_settings
+        settings = get_settings()
         
         # Check specific action limits
-        if action_type == 'like' and current_count >= limits['likes_per_hour']:
+        if action_type == 'like' and current_count >= settings.max_likes_per_hour:
             return False, "Hourly like limit reached"
             
-        if action_type == 'comment' and current_count >= limits['comments_per_hour']:
+        if action_type == 'comment' and current_count >= settings.max_comments_per_hour:
             return False, "Hourly comment limit reached"
             
-        if action_type == 'follow' and current_count >= limits['follows_per_hour']:
+        if action_type == 'follow' and current_count >= settings.max_follows_per_hour:
             return False, "Hourly follow limit reached"
             
         # Check daily total actions
@@ -123,6 +262,7 @@ class SafetyChecker:
             return False, "Daily activity limit reached"
             
         # Check error rate
+        self.expire_errors()
         if self.error_count >= BotConfig.SAFETY['max_errors_per_hour']:
             return False, "Too many errors, cooling down"
             
@@ -135,14 +275,29 @@ class SafetyChecker:
     def record_error(self):
         """Record that an error occurred"""
         import time
-        self.error_count += 1
         self.last_error_time = time.time()
+        self.error_times.append(self.last_error_time)
+        self.expire_errors()
+        
+    def expire_errors(self):
+        """Drop errors older than the error window, so the count is a rolling hourly rate"""
+        import time
+        cutoff = time.time() - self.ERROR_WINDOW
+        self.error_times = [t for t in self.error_times if t > cutoff]
+        self.error_count = len(self.error_times)
+        
+    def reset_errors(self):
+        """Clear the error count after a recovery"""
+        self.error_count = 0
+        self.error_times = []
+        self.last_error_time = None
         
     def should_take_break(self):
         """Check if bot should take a break"""
         import time
         
         # Take break if too many errors
+        self.expire_errors()
         if (self.error_count >= BotConfig.SAFETY['max_errors_per_hour'] and 
             self.last_error_time and 
             time.time() - self.last_error_time < BotConfig.SAFETY['cooldown_after_errors']):
@@ -158,7 +313,7 @@ class SafetyChecker:
     def reset_daily_counters(self):
         """Reset daily counters"""
         self.daily_actions = 0
-        self.error_count = 0
+        self.reset_errors()
         
     def start_session(self):
         """Start a new session"""
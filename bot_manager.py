@@ -25,6 +25,10 @@ try:
 except ImportError:
     UNIFIED_BOT_AVAILABLE = False
 
+from control_socket import ControlError, ControlUnavailable, send_command
+from job_metrics import JobMetrics
+from bot_config import BotConfig
+
 def main():
     """Main function to run the social media bot manager"""
     print("🚀 YesPlease Social Media Bot Manager")
@@ -49,9 +53,11 @@ def main():
         print("5. Check activity logs")
         print("6. Test connections")
         print("7. Bot configuration")
-        print("8. Exit")
+        print("8. Control running scheduler")
+        print("9. Job timings and overruns")
+        print("10. Exit")
         
-        choice = input("\nEnter your choice (1-8): ").strip()
+        choice = input("\nEnter your choice (1-10): ").strip()
         
         if choice == '1':
             run_unified_bot()
@@ -68,6 +74,10 @@ def main():
         elif choice == '7':
             show_configuration()
         elif choice == '8':
+            control_scheduler()
+        elif choice == '9':
+            show_job_metrics()
+        elif choice == '10':
             print("Goodbye! 👋")
             break
         else:
@@ -141,16 +151,37 @@ def start_scheduled_bot():
             return
             
         bot.start_scheduler()
+        print("\n⏹️ Bot stopped, activity saved")
     except KeyboardInterrupt:
         print("\n⏹️ Bot stopped by user")
     except Exception as e:
         print(f"❌ Error running scheduled bot: {e}")
 
+def print_nested(data, indent=2):
+    """Print a summary dict from the control socket as an indented tree"""
+    for key, value in data.items():
+        if isinstance(value, dict):
+            print(f"{' ' * indent}{key}:")
+            print_nested(value, indent + 2)
+        else:
+            print(f"{' ' * indent}{key}: {value}")
+
 def check_activity_logs():
     """Check activity logs for all platforms"""
     print("\n📊 Activity Logs:")
     print("-" * 40)
     
+    # A running scheduler answers from memory, including unsaved counts
+    try:
+        summary = send_command('summary')
+        print("🟢 Live summary from the running scheduler:")
+        print_nested(summary)
+        return
+    except ControlUnavailable:
+        pass
+    except ControlError as e:
+        print(f"⚠️  Scheduler could not build a summary ({e}), reading saved logs")
+    
     # Check unified activity
     try:
         unified_file = Path('data/social_media_activity.json')
@@ -209,6 +240,18 @@ def test_connections():
     print("\n🔗 Testing Platform Connections:")
     print("-" * 40)
     
+    # Reuse the running scheduler's sessions instead of logging in again
+    try:
+        results = send_command('test_connection')
+        for platform, result in results.items():
+            icon = "✅" if result['ok'] else "❌"
+            print(f"{icon} {platform}: {result['detail']}")
+        return
+    except ControlUnavailable:
+        print("ℹ️  No scheduler running, testing with new bot instances")
+    except ControlError as e:
+        print(f"⚠️  Scheduler could not test connections ({e}), testing with new bot instances")
+    
     # Test Instagram
     if INSTAGRAM_AVAILABLE:
         print("� Testing Instagram connection...")
@@ -243,35 +286,106 @@ def test_connections():
     else:
         print("⚠️  X bot not available")
 
+def control_scheduler():
+    """Status, job triggers and reloads for a scheduler started in another terminal"""
+    print("\n🎛️  Scheduler Control:")
+    print("-" * 40)
+    
+    try:
+        status = send_command('status')
+    except ControlUnavailable:
+        print("❌ No scheduler running (start one with option 4)")
+        return
+    except ControlError as e:
+        print(f"❌ Error: {e}")
+        return
+        
+    print(f"🟢 Scheduler PID {status['pid']}, running since {status['started_at']}")
+    print(f"  Running now: {', '.join(status['running']) or 'nothing'} ({status['queued']} queued)")
+    for job in status['jobs']:
+        print(f"  ⏰ {job['job']}: next run {job['next_run']}")
+    for stall in status['stalled']:
+        print(f"  ⚠️  {stall['job']} stalled after {stall['elapsed']}s")
+        
+    print("\n1. Trigger a job now")
+    print("2. Reload configuration")
+    print("3. Back")
+    choice = input("\nEnter your choice (1-3): ").strip()
+    
+    try:
+        if choice == '1':
+            jobs = send_command('jobs')
+            print(f"Jobs: {', '.join(jobs)}")
+            job = input("Job to run: ").strip()
+            result = send_command('trigger', job=job)
+            print(f"✅ Queued {result['queued']}" + (f" (after {', '.join(result['running'])})" if result['running'] else ""))
+        elif choice == '2':
+            send_command('reload')
+            print("✅ Configuration reload scheduled")
+    except (ControlUnavailable, ControlError) as e:
+        print(f"❌ Error: {e}")
+
+def show_job_metrics():
+    """p50/p95 duration and lateness per scheduled job, plus recent overrun alerts"""
+    print(f"\n⏱️  Job Timings (last {BotConfig.JOB_METRICS['keep_days']} days):")
+    print("-" * 40)
+    
+    metrics = JobMetrics()
+    summary = metrics.summary()
+    if not summary:
+        print("No job runs recorded yet (they are recorded while the scheduler runs)")
+        return
+        
+    for job, stats in summary.items():
+        outcomes = ', '.join(f"{outcome} {count}" for outcome, count in stats['outcomes'].items())
+        print(f"📌 {job}: {stats['runs']} runs ({outcomes})")
+        print(f"  Duration p50/p95: {stats['duration_p50']:.1f}s / {stats['duration_p95']:.1f}s")
+        print(f"  Start lateness p50/p95: {stats['lateness_p50']:.1f}s / {stats['lateness_p95']:.1f}s")
+        if stats['overruns']:
+            print(f"  ⚠️  Overran into the next slot {stats['overruns']} time(s)")
+        if stats['skipped_slots']:
+            print(f"  ⚠️  {stats['skipped_slots']} slot(s) skipped")
+        print(f"  Last run: {stats['last_run'][:19].replace('T', ' ')}")
+        
+    alerts = metrics.alerts()
+    print()
+    if alerts:
+        print(f"🚨 Alerts (last {BotConfig.JOB_METRICS['alert_days']} days):")
+        for alert in alerts[:20]:
+            print(f"  {alert}")
+    else:
+        print("✅ No overruns, skipped slots or failed runs recently")
+
 def show_configuration():
     """Show current bot configuration"""
     print("\n⚙️  Bot Configuration:")
     print("-" * 40)
     
-    # Load environment variables
-    from dotenv import load_dotenv
-    load_dotenv()
+    # Load the shared, validated settings
+    from settings import get_settings
+    try:
+        settings = get_settings()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
     
     # Platform status
     print("🔧 Platform Status:")
-    instagram_enabled = os.getenv('ENABLE_INSTAGRAM', 'true').lower() == 'true'
-    x_enabled = os.getenv('ENABLE_X', 'true').lower() == 'true'
-    
-    print(f"  Instagram: {'✅ Enabled' if instagram_enabled else '❌ Disabled'}")
-    print(f"  X: {'✅ Enabled' if x_enabled else '❌ Disabled'}")
+    print(f"  Instagram: {'✅ Enabled' if settings.enable_instagram else '❌ Disabled'}")
+    print(f"  X: {'✅ Enabled' if settings.enable_x else '❌ Disabled'}")
     print()
     
     # Rate limits
     print("📊 Rate Limits:")
-    print(f"  Max likes per hour: {os.getenv('MAX_LIKES_PER_HOUR', 30)}")
-    print(f"  Max comments per hour: {os.getenv('MAX_COMMENTS_PER_HOUR', 15)}")
-    print(f"  Max follows per hour: {os.getenv('MAX_FOLLOWS_PER_HOUR', 20)}")
-    print(f"  Max posts per day: {os.getenv('MAX_POSTS_PER_DAY', 10)}")
+    print(f"  Max likes per hour: {settings.max_likes_per_hour}")
+    print(f"  Max comments per hour: {settings.max_comments_per_hour}")
+    print(f"  Max follows per hour: {settings.max_follows_per_hour}")
+    print(f"  Max posts per day: {settings.max_posts_per_day}")
     print()
     
     # Content settings
     print("📁 Content Settings:")
-    content_folder = os.getenv('CONTENT_FOLDER', 'content')
+    content_folder = settings.content_folder
     print(f"  Content folder: {content_folder}")
     
     # Count content files
@@ -282,15 +396,17 @@ def show_configuration():
     else:
         print("  Content files: 0 (folder not found)")
     
-    print(f"  Instagram hashtags: {os.getenv('HASHTAGS', 'Not set')}")
-    print(f"  X hashtags: {os.getenv('X_HASHTAGS', 'Not set')}")
+    print(f"  Instagram hashtags: {settings.hashtags or 'Not set'}")
+    print(f"  X hashtags: {settings.x_hashtags or 'Not set'}")
     print()
     
     # Safety settings
     print("🛡️  Safety Settings:")
-    cross_posting = os.getenv('ENABLE_CROSS_POSTING', 'true').lower() == 'true'
-    print(f"  Cross-posting: {'✅ Enabled' if cross_posting else '❌ Disabled'}")
-    print(f"  Post interval: {os.getenv('POST_INTERVAL_HOURS', 24)} hours")
+    print(f"  Cross-posting: {'✅ Enabled' if settings.enable_cross_posting else '❌ Disabled'}")
+    print(f"  Post interval: {settings.post_interval_hours} hours")
 
 if __name__ == "__main__":
-    main()
+    # python bot_manager.py --profile [unified|instagram|x]
+    from profiling import profile_from_argv
+    if not profile_from_argv('unified'):
+        main()
@@ -0,0 +1,220 @@
+"""
+Per-Platform Circuit Breaker
+Defers one platform's work after repeated errors instead of sleeping the whole process
+"""
+
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import schedule
+
+from bot_config import BotConfig, SafetyChecker
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_FILE = Path('data/circuit_breakers.json')
+
+_file_lock = threading.Lock()
+
+
+def _load_all(state_file: Path) -> Dict:
+    try:
+        if state_file.exists():
+            with open(state_file, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        logging.getLogger('CircuitBreaker').error(f"Error loading circuit breaker state: {e}")
+    return {}
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one platform, driven by SafetyChecker's hourly error count"""
+
+    def __init__(self, platform: str, safety_checker: Optional[SafetyChecker] = None,
+                 cooldown: Optional[int] = None, state_file: Path = STATE_FILE, logger=None):
+        self.platform = platform
+        self.safety_checker = safety_checker or SafetyChecker()
+        self.cooldown = cooldown or BotConfig.SAFETY['cooldown_after_errors']
+        self.state_file = Path(state_file)
+        self.logger = logger or logging.getLogger('CircuitBreaker')
+
+        self.state = CLOSED
+        self.opened_at = None
+        self.reason = None
+        self._deferred = set()
+
+        # The single request allowed through while half-open: (thread id, started)
+        self._trial = None
+        self._lock = threading.RLock()
+
+        self.load_state()
+
+    def load_state(self):
+        """Restore breaker and error counts saved by a previous run"""
+        data = _load_all(self.state_file).get(self.platform)
+        if not data:
+            return
+
+        self.state = data.get('state', CLOSED)
+        self.opened_at = data.get('opened_at')
+        self.reason = data.get('reason')
+        # Only error times are restored; a bare count from older files never expired
+        self.safety_checker.error_times = data.get('error_times', [])
+        self.safety_checker.last_error_time = data.get('last_error_time')
+        self.safety_checker.expire_errors()
+
+        if self.state != CLOSED:
+            self.logger.info(f"{self.platform} circuit restored as {self.state}: {self.reason}")
+
+    def save_state(self):
+        """Persist this platform's breaker next to the other platforms'"""
+        with _file_lock:
+            try:
+                data = _load_all(self.state_file)
+                data[self.platform] = {
+                    'state': self.state,
+                    'opened_at': self.opened_at,
+                    'reason': self.reason,
+                    'error_count': self.safety_checker.error_count,
+                    'error_times': self.safety_checker.error_times,
+                    'last_error_time': self.safety_checker.last_error_time
+                }
+                self.state_file.parent.mkdir(exist_ok=True)
+                with open(self.state_file, 'w') as f:
+                    json.dump(data, f, indent=2)
+            except Exception as e:
+                self.logger.error(f"Error saving circuit breaker state: {e}")
+
+    def seconds_until_retry(self) -> int:
+        """Seconds until an open circuit lets a trial request through"""
+        if self.state != OPEN or self.opened_at is None:
+            return 0
+        return max(0, int(self.opened_at + self.cooldown - time.time()))
+
+    def blocked(self) -> bool:
+        """Whether the circuit is open and cooling down (checks without taking the trial)"""
+        return self.state == OPEN and self.seconds_until_retry() > 0
+
+    def allow_request(self) -> bool:
+        """Whether this platform may make calls right now
+
+        While half-open exactly one caller gets the trial; it ends with
+        record_success(), record_failure()/trip() or end_trial(). The same
+        thread may keep calling during its own trial.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN:
+                if self.seconds_until_retry() > 0:
+                    return False
+                self.state = HALF_OPEN
+                self.save_state()
+
+            if self._trial is not None:
+                owner, started = self._trial
+                if owner == threading.get_ident():
+                    return True
+                if time.time() - started < BotConfig.SAFETY['trial_timeout']:
+                    return False
+                self.logger.warning(f"{self.platform} trial request gave no outcome, allowing another")
+
+            self._trial = (threading.get_ident(), time.time())
+            self.logger.info(f"{self.platform} circuit half-open, allowing a trial request")
+            return True
+
+    def end_trial(self):
+        """Give back this thread's half-open trial if it ended without an outcome (e.g. nothing to post)"""
+        with self._lock:
+            if self._trial is not None and self._trial[0] == threading.get_ident():
+                self._trial = None
+
+    def trip(self, reason: str):
+        """Open the circuit immediately (e.g. on an explicit rate-limit response)"""
+        with self._lock:
+            self.safety_checker.record_error()
+            self._open(reason)
+
+    def record_failure(self, reason: str = 'error'):
+        """Count an error; open once SafetyChecker says the platform needs a break"""
+        with self._lock:
+            self.safety_checker.record_error()
+
+            if self.state == HALF_OPEN:
+                self._open(f"Trial request failed: {reason}")
+                return
+
+            should_break, break_reason = self.safety_checker.should_take_break()
+            if should_break:
+                self._open(f"{break_reason}: {reason}")
+            else:
+                self.save_state()
+
+    def record_success(self):
+        """Close a half-open circuit after a successful trial"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.opened_at = None
+                self.reason = None
+                self._trial = None
+                self.safety_checker.reset_errors()
+                self.logger.info(f"{self.platform} circuit closed")
+                self.save_state()
+
+    def _open(self, reason: str):
+        self._trial = None
+        self.state = OPEN
+        self.opened_at = time.time()
+        self.reason = reason
+        self.logger.warning(f"{self.platform} circuit open for {self.cooldown}s: {reason}")
+        self.save_state()
+
+    def guard(self, job_func):
+        """Wrap a scheduled job so it is deferred, not run, while the circuit is open
+
+        A deferred job is re-queued once for when the cooldown ends; other
+        platforms' jobs are unaffected.
+        """
+        name = getattr(job_func, '__name__', repr(job_func))
+
+        def guarded(*args, **kwargs):
+            # The job's own platform calls take the half-open trial, not the job as a whole
+            if not self.blocked():
+                return job_func(*args, **kwargs)
+
+            delay = self.seconds_until_retry()
+            if name in self._deferred:
+                self.logger.info(f"{self.platform} circuit open, {name} already deferred")
+                return None
+
+            self.logger.info(f"{self.platform} circuit open, deferring {name} by {delay}s")
+            self._deferred.add(name)
+
+            def retry():
+                self._deferred.discard(name)
+                guarded(*args, **kwargs)
+                return schedule.CancelJob
+
+            schedule.every(max(delay, 1)).seconds.do(retry)
+            return None
+
+        guarded.__name__ = name
+        return guarded
+
+    def status(self) -> Dict:
+        """Summary for logs and dashboards"""
+        return {
+            'state': self.state,
+            'reason': self.reason,
+            'retry_in': self.seconds_until_retry(),
+            'trial_running': self._trial is not None,
+            'error_count': self.safety_checker.error_count
+        }
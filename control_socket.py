@@ -0,0 +1,194 @@
+"""
+Control Socket
+Local UNIX socket through which a running scheduler answers status, summary,
+trigger-job, test-connection and reload commands from its warm bot instances
+"""
+
+import os
+import json
+import socket
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from bot_config import BotConfig
+
+
+class ControlUnavailable(ConnectionError):
+    """No scheduler is listening on the control socket"""
+
+
+class ControlError(Exception):
+    """The scheduler answered a command with an error"""
+
+
+def _send(conn, message: Dict):
+    conn.sendall(json.dumps(message, default=str).encode('utf-8') + b'\n')
+
+
+def _receive(conn) -> Optional[Dict]:
+    """Read one newline-terminated JSON message"""
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data) if data.strip() else None
+
+
+class ControlServer:
+    """Serves control commands for one scheduler process on a UNIX socket
+
+    Each connection carries one JSON request line ({"command", "args"}) and
+    gets one JSON response line ({"ok", "result"} or {"ok": false, "error"}).
+    Jobs are not run here: 'trigger' queues them onto the scheduler thread,
+    as do commands registered with on_scheduler=True.
+    """
+
+    def __init__(self, shutdown, socket_path=None, logger=None):
+        self.shutdown = shutdown
+        self.socket_path = Path(socket_path or BotConfig.CONTROL['socket_path'])
+        self.logger = logger or logging.getLogger('ControlServer')
+        self.commands = {}
+        self.jobs = {}
+        self._sock = None
+        self._thread = None
+
+        self.register('status', shutdown.status)
+        self.register('reload', self._reload)
+        self.register('trigger', self._trigger)
+        self.register('jobs', lambda: sorted(self.jobs))
+
+    def register(self, command: str, handler: Callable, on_scheduler: bool = False):
+        """Answer `command` with handler(**args)
+
+        on_scheduler=True runs the handler on the scheduler thread between jobs,
+        for handlers that use a client a running job may be using.
+        """
+        if on_scheduler:
+            self.commands[command] = lambda **args: self._on_scheduler(command, handler, args)
+        else:
+            self.commands[command] = handler
+
+    def _on_scheduler(self, command: str, handler: Callable, args: Dict):
+        future = self.shutdown.call_on_scheduler(command, lambda: handler(**args))
+        try:
+            return future.result(timeout=BotConfig.CONTROL['scheduler_wait'])
+        except FutureTimeout:
+            future.cancel()
+            running = ', '.join(sorted(self.shutdown.watchdog.running)) or 'another request'
+            raise TimeoutError(f"Scheduler busy with {running}, '{command}' not run")
+
+    def add_job(self, name: str, job_func: Callable):
+        """Make a job triggerable by name"""
+        self.jobs[name] = job_func
+
+    def _trigger(self, job: str):
+        if job not in self.jobs:
+            raise ValueError(f"Unknown job '{job}', expected one of: {', '.join(sorted(self.jobs))}")
+        self.shutdown.request_job(job, self.jobs[job])
+        return {'queued': job, 'running': sorted(self.shutdown.watchdog.running)}
+
+    def _reload(self):
+        self.shutdown.request_reload()
+        return {'reload': 'scheduled'}
+
+    def start(self) -> bool:
+        """Listen in a daemon thread; False if unsupported or another scheduler owns the socket"""
+        if not hasattr(socket, 'AF_UNIX'):
+            self.logger.warning("UNIX sockets not supported on this platform, control socket disabled")
+            return False
+
+        if self.socket_path.exists():
+            try:
+                send_command('status', socket_path=self.socket_path, timeout=2)
+                self.logger.warning(f"Another scheduler is listening on {self.socket_path}, control socket disabled")
+                return False
+            except ControlUnavailable:
+                # Left behind by a process that did not shut down cleanly
+                self.socket_path.unlink()
+
+        try:
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.bind(str(self.socket_path))
+            os.chmod(self.socket_path, 0o600)
+            self._sock.listen(8)
+        except OSError as e:
+            self.logger.error(f"Cannot open control socket {self.socket_path}: {e}")
+            self._sock = None
+            return False
+
+        self._thread = threading.Thread(target=self._serve, name='ControlServer', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Control socket listening on {self.socket_path}")
+        return True
+
+    def stop(self):
+        if self._sock is None:
+            return
+        try:
+            self._sock.close()
+        finally:
+            self._sock = None
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    def _serve(self):
+        while self._sock is not None:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return  # Socket closed by stop()
+            threading.Thread(target=self._handle, args=(conn,), name='ControlRequest', daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                request = _receive(conn) or {}
+                command = request.get('command')
+                handler = self.commands.get(command)
+                if handler is None:
+                    raise ValueError(f"Unknown command '{command}', expected one of: {', '.join(sorted(self.commands))}")
+                self.logger.info(f"Control command: {command}")
+                _send(conn, {'ok': True, 'result': handler(**request.get('args', {}))})
+            except Exception as e:
+                self.logger.error(f"Control command failed: {e}")
+                try:
+                    _send(conn, {'ok': False, 'error': str(e)})
+                except OSError:
+                    pass
+
+
+def send_command(command: str, socket_path=None, timeout: Optional[float] = None, **args):
+    """Send one command to the running scheduler and return its result
+
+    Raises ControlUnavailable when no scheduler is listening and ControlError
+    when the command itself failed.
+    """
+    socket_path = Path(socket_path or BotConfig.CONTROL['socket_path'])
+    if not hasattr(socket, 'AF_UNIX') or not socket_path.exists():
+        raise ControlUnavailable(f"No scheduler control socket at {socket_path}")
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout or BotConfig.CONTROL['timeout'])
+    try:
+        try:
+            conn.connect(str(socket_path))
+        except OSError as e:
+            raise ControlUnavailable(f"Scheduler not answering on {socket_path}: {e}")
+        _send(conn, {'command': command, 'args': args})
+        response = _receive(conn)
+    finally:
+        conn.close()
+
+    if response is None:
+        raise ControlError(f"No response to '{command}'")
+    if not response.get('ok'):
+        raise ControlError(response.get('error', 'unknown error'))
+    return response.get('result')
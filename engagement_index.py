@@ -0,0 +1,162 @@
+"""
+Engagement Index
+Remembers what each platform has already liked or followed, across runs
+"""
+
+import json
+import math
+import zlib
+import base64
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List
+
+from bot_config import BotConfig
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # scoring.py reports the missing dependency; batch lookups fall back to pure Python
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter (no false negatives, tunable false-positive rate)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def _bases(self, key: str):
+        """(h1, h2) reduced mod size; (h1 + i*h2) % size gives the same positions as _positions"""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return h1 % self.size, h2 % self.size
+
+    def contains_many(self, keys: List[str]) -> List[bool]:
+        """Membership of a batch of keys, with the bit tests done as one numpy operation"""
+        if np is None or not keys:
+            return [key in self for key in keys]
+        bases = np.array([self._bases(key) for key in keys], dtype=np.int64)
+        positions = (bases[:, :1] + np.arange(self.hash_count, dtype=np.int64) * bases[:, 1:]) % self.size
+        bits = np.frombuffer(self.bits, dtype=np.uint8)
+        return ((bits[positions >> 3] >> (positions & 7)) & 1).all(axis=1).tolist()
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'count': self.count,
+            'bits': base64.b64encode(zlib.compress(bytes(self.bits))).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        bloom = cls(data['capacity'], data['error_rate'])
+        bits = zlib.decompress(base64.b64decode(data['bits']))
+        if len(bits) == len(bloom.bits):
+            bloom.bits = bytearray(bits)
+            bloom.count = data.get('count', 0)
+        return bloom
+
+
+class EngagementIndex:
+    """Bloom filter plus an exact recent set of (action, target) pairs for one platform"""
+
+    def __init__(self, platform: str, data_dir='data', capacity=None, recent_size=None, logger=None):
+        self.platform = platform
+        self.index_file = Path(data_dir) / f'{platform}_engagement_index.json'
+        self.capacity = capacity or BotConfig.ENGAGEMENT['index_capacity']
+        self.recent_size = recent_size or BotConfig.ENGAGEMENT['index_recent_size']
+        self.logger = logger or logging.getLogger('EngagementIndex')
+
+        self.bloom = BloomFilter(self.capacity)
+        self.recent = OrderedDict()
+        self.skipped = 0
+        self._dirty = False
+
+        self.load()
+
+    @staticmethod
+    def _key(action: str, target_id) -> str:
+        return f"{action}:{target_id}"
+
+    def seen(self, action: str, target_id) -> bool:
+        """True if this action was (very probably) already taken on target_id"""
+        key = self._key(action, target_id)
+        if key in self.recent or key in self.bloom:
+            self.skipped += 1
+            return True
+        return False
+
+    def seen_many(self, action: str, target_ids: Iterable) -> List[bool]:
+        """seen() for a whole batch; only targets missing from the recent set reach the Bloom filter"""
+        keys = [self._key(action, target_id) for target_id in target_ids]
+        result = [key in self.recent for key in keys]
+        misses = [i for i, hit in enumerate(result) if not hit]
+        if misses:
+            for i, hit in zip(misses, self.bloom.contains_many([keys[i] for i in misses])):
+                result[i] = hit
+        self.skipped += sum(result)
+        return result
+
+    def add(self, action: str, target_id):
+        """Remember a completed action"""
+        key = self._key(action, target_id)
+
+        # Start a fresh generation once the filter is full; the recent set bridges the gap
+        if self.bloom.count >= self.capacity:
+            self.logger.info(f"{self.platform} engagement index full, starting a new generation")
+            self.bloom = BloomFilter(self.capacity)
+
+        self.bloom.add(key)
+        self.recent[key] = True
+        self.recent.move_to_end(key)
+        while len(self.recent) > self.recent_size:
+            self.recent.popitem(last=False)
+        self._dirty = True
+
+    def load(self):
+        """Load the index saved by a previous run"""
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, 'r') as f:
+                    data = json.load(f)
+                self.bloom = BloomFilter.from_dict(data['bloom'])
+                self.recent = OrderedDict((key, True) for key in data.get('recent', []))
+        except Exception as e:
+            self.logger.error(f"Error loading {self.platform} engagement index: {e}")
+
+    def save(self):
+        """Persist the index if anything was added since the last save"""
+        if not self._dirty:
+            return
+
+        try:
+            self.index_file.parent.mkdir(exist_ok=True)
+            with open(self.index_file, 'w') as f:
+                json.dump({'bloom': self.bloom.to_dict(), 'recent': list(self.recent)}, f)
+            self._dirty = False
+        except Exception as e:
+            self.logger.error(f"Error saving {self.platform} engagement index: {e}")
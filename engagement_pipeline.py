@@ -0,0 +1,112 @@
+"""
+Engagement Pipeline
+Lazy fetch -> filter -> act stages shared by the like/comment/follow/repost loops
+"""
+
+import logging
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+
+class PipelineStats:
+    """Counts for one pipeline run"""
+
+    __slots__ = ('fetched', 'filtered', 'examined', 'acted')
+
+    def __init__(self):
+        self.fetched = 0
+        self.filtered = 0
+        self.examined = 0
+        self.acted = 0
+
+    @property
+    def considered(self) -> int:
+        """Items that reached a filter or the action stage"""
+        return self.filtered + self.examined
+
+
+def paged(fetch_page: Callable[[Optional[str]], tuple], max_pages: int, stats: PipelineStats) -> Iterator[List]:
+    """Yield batches from `fetch_page(token) -> (items, next_token)`, one request per pull
+
+    Nothing is fetched until the consumer asks for the next batch, so a
+    consumer that stops early never pays for pages it will not use.
+    """
+    token = None
+    for _ in range(max_pages):
+        items, token = fetch_page(token)
+        stats.fetched += len(items)
+        if items:
+            yield items
+        if not token:
+            return
+
+
+def keep(batches: Iterable[List], predicate: Callable[[List], List],
+         stats: Optional[PipelineStats] = None) -> Iterator[List]:
+    """Apply a batch predicate (batch -> kept items), dropping empty batches"""
+    for batch in batches:
+        kept = predicate(batch)
+        if stats is not None:
+            stats.filtered += len(batch) - len(kept)
+        if kept:
+            yield kept
+
+
+def where(mask: Callable[[List], Sequence[bool]]) -> Callable[[List], List]:
+    """Lift a batch test (batch -> one bool per item, e.g. a numpy mask) into a batch predicate"""
+    return lambda batch: [item for item, ok in zip(batch, mask(batch)) if ok]
+
+
+def not_seen(index, action: str, key: Callable = lambda item: item.id) -> Callable[[List], List]:
+    """Batch predicate dropping targets the engagement index already has, looked up as one batch"""
+    return where(lambda batch: [not seen for seen in index.seen_many(action, [key(item) for item in batch])])
+
+
+def consume(batches: Iterable[List], act: Callable, budget: int, stats: PipelineStats,
+            can_continue: Optional[Callable[[], bool]] = None,
+            delay: Optional[Callable[[], None]] = None, name: str = 'action', logger=None,
+            breaker=None) -> PipelineStats:
+    """Act on items until `budget` actions succeed or the source runs dry
+
+    `act(item)` returns True when the action was taken. Errors are logged per
+    item and do not stop the run. Stops pulling upstream as soon as the
+    budget is spent. With a platform `breaker`, every action needs its
+    permission and reports its outcome, so action errors can open the circuit.
+    """
+    logger = logger or logging.getLogger('EngagementPipeline')
+
+    def should_stop() -> bool:
+        return stats.acted >= budget or bool(can_continue and not can_continue())
+
+    batches = iter(batches)
+    try:
+        # Checked before each pull too, so no page is fetched that would not be consumed
+        while not should_stop():
+            try:
+                batch = next(batches)
+            except StopIteration:
+                break
+
+            for item in batch:
+                if should_stop():
+                    return stats
+                if breaker is not None and not breaker.allow_request():
+                    logger.info(f"Circuit open, stopping {name}")
+                    return stats
+
+                stats.examined += 1
+                try:
+                    if act(item):
+                        stats.acted += 1
+                        if breaker is not None:
+                            breaker.record_success()
+                        if delay:
+                            delay()
+                except Exception as e:
+                    logger.error(f"Error in {name} for {getattr(item, 'id', item)}: {e}")
+                    if breaker is not None:
+                        breaker.record_failure(f"Error in {name}: {e}")
+    finally:
+        if breaker is not None:
+            breaker.end_trial()
+
+    return stats
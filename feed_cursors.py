@@ -0,0 +1,90 @@
+"""
+Feed Cursors
+Remembers the newest item seen per search term so engagement runs only fetch new posts
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+
+class FeedCursorStore:
+    """Newest-seen id per (consumer, term) for one platform
+
+    Each engagement action (like, follow, ...) keeps its own cursor so one
+    action consuming a feed does not starve the others. A cursor older than
+    `max_age_hours` is treated as expired and the caller does a full fetch.
+    """
+
+    def __init__(self, platform: str, data_dir='data', max_age_hours: int = 24, logger=None):
+        self.platform = platform
+        self.cursor_file = Path(data_dir) / f'{platform}_feed_cursors.json'
+        self.max_age = timedelta(hours=max_age_hours)
+        self.logger = logger or logging.getLogger('FeedCursors')
+        self.cursors = {}
+        self._dirty = False
+
+        self.load()
+
+    @staticmethod
+    def _key(consumer: str, term: str) -> str:
+        return f"{consumer}:{term.strip().lower()}"
+
+    def get(self, consumer: str, term: str) -> Optional[str]:
+        """Newest id seen for this feed, or None if there is no usable cursor"""
+        key = self._key(consumer, term)
+        cursor = self.cursors.get(key)
+        if not cursor:
+            return None
+
+        if datetime.now() - datetime.fromisoformat(cursor['updated_at']) > self.max_age:
+            self.logger.info(f"{self.platform} cursor for '{key}' expired, doing a full fetch")
+            self.reset(consumer, term)
+            return None
+
+        return cursor['newest_id']
+
+    def advance(self, consumer: str, term: str, newest_id):
+        """Move the cursor forward to `newest_id` (never backwards)"""
+        if newest_id is None:
+            return
+
+        key = self._key(consumer, term)
+        current = self.cursors.get(key)
+        if current and int(current['newest_id']) >= int(newest_id):
+            return
+
+        self.cursors[key] = {
+            'newest_id': str(newest_id),
+            'updated_at': datetime.now().isoformat()
+        }
+        self._dirty = True
+
+    def reset(self, consumer: str, term: str):
+        """Drop a cursor the platform no longer accepts"""
+        if self.cursors.pop(self._key(consumer, term), None):
+            self._dirty = True
+
+    def load(self):
+        """Load cursors saved by a previous run"""
+        try:
+            if self.cursor_file.exists():
+                with open(self.cursor_file, 'r') as f:
+                    self.cursors = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading {self.platform} feed cursors: {e}")
+
+    def save(self):
+        """Persist cursors if any moved since the last save"""
+        if not self._dirty:
+            return
+
+        try:
+            self.cursor_file.parent.mkdir(exist_ok=True)
+            with open(self.cursor_file, 'w') as f:
+                json.dump(self.cursors, f, indent=2)
+            self._dirty = False
+        except Exception as e:
+            self.logger.error(f"Error saving {self.platform} feed cursors: {e}")
@@ -0,0 +1,80 @@
+"""
+Feed Records
+Compact projections of fetched media, posts and users, so engagement loops never hold full client objects
+"""
+
+from typing import List, NamedTuple, Optional
+
+
+class MediaRecord(NamedTuple):
+    """The parts of an Instagram media the engagement loops use"""
+    id: str
+    pk: int
+    user_pk: int
+    username: str
+    like_count: int
+
+
+class PostRecord(NamedTuple):
+    """The parts of an X post the engagement loops use"""
+    id: str
+    author_id: Optional[str]
+    like_count: int
+    retweet_count: int
+
+
+class UserRecord(NamedTuple):
+    """The parts of an X user the engagement loops use"""
+    id: str
+    username: str
+    followers_count: int
+    following_count: int
+
+
+class SearchPage(NamedTuple):
+    """Projected result of one X search"""
+    posts: List[PostRecord]
+    users: List[UserRecord]
+    newest_id: Optional[str]
+    next_token: Optional[str]
+    result_count: int
+
+
+def media_record(media) -> MediaRecord:
+    """Project an instagrapi Media"""
+    user = media.user
+    return MediaRecord(
+        id=str(media.id),
+        pk=int(media.pk),
+        user_pk=int(user.pk),
+        username=user.username,
+        like_count=media.like_count or 0
+    )
+
+
+def search_page(response) -> SearchPage:
+    """Project a tweepy search response"""
+    posts = []
+    for post in response.data or []:
+        metrics = post.public_metrics or {}
+        posts.append(PostRecord(
+            id=str(post.id),
+            author_id=str(post.author_id) if post.author_id else None,
+            like_count=metrics.get('like_count', 0),
+            retweet_count=metrics.get('retweet_count', 0)
+        ))
+
+    users = []
+    for user in (response.includes or {}).get('users', []):
+        metrics = user.public_metrics or {}
+        users.append(UserRecord(
+            id=str(user.id),
+            username=user.username,
+            followers_count=metrics.get('followers_count', 0),
+            following_count=metrics.get('following_count', 0)
+        ))
+
+    meta = response.meta or {}
+    return SearchPage(
+        posts, users, meta.get('newest_id'), meta.get('next_token'), meta.get('result_count', len(posts))
+    )
@@ -0,0 +1,64 @@
+"""
+Fetch Sizing
+Sizes engagement searches from the remaining action budget and how many fetched items pass our filters
+"""
+
+import json
+import math
+import logging
+from pathlib import Path
+
+from bot_config import BotConfig
+
+
+class FetchSizer:
+    """Per-action moving average of filter pass rates for one platform"""
+
+    def __init__(self, platform: str, data_dir='data', logger=None):
+        self.platform = platform
+        self.stats_file = Path(data_dir) / f'{platform}_fetch_stats.json'
+        self.alpha = BotConfig.FEEDS['pass_rate_alpha']
+        self.default_rate = BotConfig.FEEDS['default_pass_rate']
+        self.min_rate = BotConfig.FEEDS['min_pass_rate']
+        self.logger = logger or logging.getLogger('FetchSizer')
+        self.pass_rates = {}
+
+        self.load()
+
+    def pass_rate(self, action: str) -> float:
+        """Expected fraction of fetched items that end up acted on"""
+        return max(self.min_rate, self.pass_rates.get(action, self.default_rate))
+
+    def size(self, action: str, wanted: int, maximum: int = 100) -> int:
+        """How many items to fetch to end up with `wanted` usable ones (0 if none wanted)"""
+        if wanted <= 0:
+            return 0
+        return min(maximum, math.ceil(wanted / self.pass_rate(action)))
+
+    def record(self, action: str, examined: int, passed: int):
+        """Fold one run's filter outcome into the moving average"""
+        if examined <= 0:
+            return
+
+        observed = passed / examined
+        previous = self.pass_rates.get(action, self.default_rate)
+        self.pass_rates[action] = round(self.alpha * observed + (1 - self.alpha) * previous, 4)
+        self.save()
+
+    def load(self):
+        """Load pass rates saved by a previous run"""
+        try:
+            if self.stats_file.exists():
+                with open(self.stats_file, 'r') as f:
+                    self.pass_rates = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading {self.platform} fetch stats: {e}")
+
+    def save(self):
+        """Persist pass rates"""
+        try:
+            self.stats_file.parent.mkdir(exist_ok=True)
+            with open(self.stats_file, 'w') as f:
+                json.dump(self.pass_rates, f, indent=2)
+        except Exception as e:
+            self.logger.error(f"Error saving {self.platform} fetch stats: {e}")
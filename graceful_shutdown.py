@@ -0,0 +1,214 @@
+"""
+Graceful Shutdown Handling
+Signal-driven stop, drain and reload support for long-running bot schedulers
+"""
+
+import os
+import queue
+import signal
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict
+
+import schedule
+
+from job_metrics import JobMetrics, job_name
+from timeouts import Watchdog
+
+
+class GracefulShutdown:
+    """Coordinates SIGTERM/SIGINT/SIGHUP handling for a scheduler loop"""
+
+    STOP_SIGNALS = ('SIGTERM', 'SIGINT')
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger('GracefulShutdown')
+        self.stop_requested = threading.Event()
+        self.reload_requested = threading.Event()
+        self.job_running = False
+        self.flush_callbacks = []
+        self.reload_callbacks = []
+        self._wake = threading.Event()
+        self._previous_handlers = {}
+        self.watchdog = Watchdog(logger=self.logger)
+        self.job_metrics = JobMetrics(logger=self.logger)
+        self.requested_jobs = queue.Queue()
+        self.started_at = None
+
+    def register_flush(self, callback):
+        """Register a callable that persists in-memory state"""
+        self.flush_callbacks.append(callback)
+
+    def register_reload(self, callback):
+        """Register a callable that reloads configuration in place"""
+        self.reload_callbacks.append(callback)
+
+    def install(self):
+        """Install signal handlers (main thread only)"""
+        if threading.current_thread() is not threading.main_thread():
+            self.logger.warning("Signal handlers can only be installed from the main thread")
+            return
+
+        for name in self.STOP_SIGNALS:
+            sig = getattr(signal, name)
+            self._previous_handlers[sig] = signal.signal(sig, self._handle_stop)
+
+        # SIGHUP is not available on Windows
+        if hasattr(signal, 'SIGHUP'):
+            self._previous_handlers[signal.SIGHUP] = signal.signal(signal.SIGHUP, self._handle_reload)
+
+    def uninstall(self):
+        """Restore the signal handlers that were active before install()"""
+        for sig, handler in self._previous_handlers.items():
+            try:
+                signal.signal(sig, handler)
+            except Exception as e:
+                self.logger.error(f"Error restoring handler for {sig}: {e}")
+        self._previous_handlers = {}
+
+    def _handle_stop(self, signum, frame):
+        name = signal.Signals(signum).name
+
+        if self.stop_requested.is_set():
+            # Second signal: stop draining and exit right away
+            self.logger.warning(f"Received {name} again, forcing shutdown")
+            raise KeyboardInterrupt
+
+        if self.job_running:
+            self.logger.info(f"Received {name}, draining in-flight job before shutdown")
+        else:
+            self.logger.info(f"Received {name}, shutting down")
+        self.stop_requested.set()
+        self._wake.set()
+
+    def _handle_reload(self, signum, frame):
+        self.logger.info("Received SIGHUP, configuration reload scheduled")
+        self.reload_requested.set()
+        self._wake.set()
+
+    def request_stop(self):
+        """Ask the scheduler loop to stop after the current job"""
+        self.stop_requested.set()
+        self._wake.set()
+
+    def request_reload(self):
+        """Ask the scheduler loop to reload configuration between jobs"""
+        self.reload_requested.set()
+        self._wake.set()
+
+    def request_job(self, name, job_func):
+        """Run a job on the scheduler thread at the next pass (e.g. triggered over the control socket)"""
+        requested_at = datetime.now()
+        instrumented = self.job_metrics.instrument(job_func, scheduled_for=requested_at, name=name)
+        self.requested_jobs.put(self.watchdog.watch(instrumented))
+        self._wake.set()
+
+    def call_on_scheduler(self, name, func) -> Future:
+        """Run func on the scheduler thread at the next pass, between jobs; returns a Future of its result
+
+        For control commands that use the bots' clients, which jobs use too.
+        A cancelled Future is skipped.
+        """
+        future = Future()
+
+        def call():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(func())
+            except Exception as e:
+                future.set_exception(e)
+
+        call.__name__ = name
+        self.requested_jobs.put(call)
+        self._wake.set()
+        return future
+
+    def run_requested_jobs(self):
+        """Run jobs queued by request_job(), in order"""
+        while not self.stop_requested.is_set():
+            try:
+                job_func = self.requested_jobs.get_nowait()
+            except queue.Empty:
+                return
+            self.logger.info(f"Running requested job {job_func.__name__}")
+            try:
+                job_func()
+            except Exception as e:
+                self.logger.error(f"Requested job {job_func.__name__} failed: {e}")
+
+    def status(self) -> Dict:
+        """Snapshot of the scheduler loop for the control socket"""
+        jobs = []
+        for job in schedule.jobs:
+            jobs.append({'job': job_name(job.job_func), 'next_run': job.next_run.isoformat() if job.next_run else None})
+        return {
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'running': sorted(self.watchdog.running),
+            'queued': self.requested_jobs.qsize(),
+            'jobs': sorted(jobs, key=lambda j: j['next_run'] or ''),
+            'stalled': self.watchdog.stalled[-10:],
+            'stop_requested': self.stop_requested.is_set()
+        }
+
+    def flush(self):
+        """Persist all registered state stores"""
+        for callback in self.flush_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"Error flushing state with {getattr(callback, '__name__', callback)}: {e}")
+        self.logger.info("State flushed")
+
+    def reload(self):
+        """Run all reload callbacks"""
+        self.reload_requested.clear()
+        for callback in self.reload_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"Error reloading configuration with {getattr(callback, '__name__', callback)}: {e}")
+        self.logger.info("Configuration reloaded without restart")
+
+    def wait(self, seconds):
+        """Sleep up to `seconds`, waking early on stop or reload requests"""
+        self._wake.wait(seconds)
+        self._wake.clear()
+        return not self.stop_requested.is_set()
+
+    def run_scheduler(self, check_interval=60):
+        """Run schedule.run_pending() until a stop signal, then drain and flush"""
+        self.install()
+        self.watchdog.start()
+        self.started_at = datetime.now().isoformat()
+        self.job_metrics.compact()
+        try:
+            while not self.stop_requested.is_set():
+                if self.reload_requested.is_set():
+                    self.reload()
+
+                # Jobs may be added between runs (e.g. deferred retries), so wrap each pass
+                for job in schedule.jobs:
+                    if not getattr(job.job_func, '_watched', False):
+                        job.job_func = self.watchdog.watch(self.job_metrics.instrument_scheduled(job))
+
+                self.job_running = True
+                try:
+                    schedule.run_pending()
+                    self.run_requested_jobs()
+                finally:
+                    self.job_running = False
+
+                if self.stop_requested.is_set():
+                    break
+                self.wait(check_interval)
+        finally:
+            self.flush()
+            # Drop our jobs so a later start_scheduler() does not double-register them
+            schedule.clear()
+            self.watchdog.stop()
+            self.uninstall()
+            self.logger.info("Scheduler stopped")
@@ -4,39 +4,87 @@ import random
 import schedule
 import logging
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 from instagrapi import Client
 from pathlib import Path
 import json
-import requests
 from pathlib import Path
 
+from graceful_shutdown import GracefulShutdown
+from control_socket import ControlServer
+from warmup import WarmUp
+from timeouts import apply_http_timeout, call_with_timeout, client_busy, sleep
+from tracing import configure as configure_tracing, traced
+from media_pipeline import ImagePreprocessor, VideoPipeline
+from unsplash_pool import UnsplashPool
+from perceptual_hash import PerceptualIndex, library_folders
+from circuit_breaker import CircuitBreaker
+from post_outbox import PostOutbox
+from engagement_index import EngagementIndex
+from feed_cursors import FeedCursorStore
+from fetch_sizing import FetchSizer
+from feed_records import media_record
+from engagement_pipeline import PipelineStats, paged, keep, not_seen, consume
+from bot_config import BotConfig
+from settings import SettingsWatcher, get_settings, reload_settings, subscribe
+
 class InstagramBot:
+    # Inspirational quotes and matching Unsplash queries
+    QUOTE_IMAGE_PAIRS = [
+        ("Believe you can and you're halfway there.", "mountain sunrise"),
+        ("Your only limit is your mind.", "open road sky"),
+        ("Every day is a second chance.", "fresh morning nature"),
+        ("Start where you are. Use what you have. Do what you can.", "minimal workspace"),
+        ("Dream big. Work hard. Stay focused.", "stars night sky"),
+        ("Small steps every day.", "footsteps sand beach"),
+        ("You are stronger than you think.", "strong athlete"),
+        ("Progress, not perfection.", "growing plant"),
+        ("Be the reason someone smiles today.", "smiling people"),
+        ("Wellness is the natural state of my body.", "peaceful nature wellness"),
+        ("Happiness is a journey, not a destination.", "happy journey travel"),
+        ("Let your dreams be bigger than your fears.", "dream clouds sky"),
+        ("You are enough just as you are.", "calm self care"),
+        ("Gratitude turns what we have into enough.", "gratitude journal coffee"),
+        ("Take care of your body. It's the only place you have to live.", "healthy food fitness"),
+    ]
+    
     def __init__(self):
-        load_dotenv()
         self.setup_logging()
+        self.settings = get_settings()
+        self.load_configuration()
+        subscribe(self.on_settings_changed)
         
-        # Instagram credentials removed for public release
-        # self.username = os.getenv('INSTAGRAM_USERNAME')
-        # self.password = os.getenv('INSTAGRAM_PASSWORD')
+        # Initialize client
+        self.client = Client()
+        apply_http_timeout(self.client.private)
+        apply_http_timeout(self.client.public)
         
-        # Bot configuration
-        self.max_likes_per_hour = int(os.getenv('MAX_LIKES_PER_HOUR', 30))
-        self.max_comments_per_hour = int(os.getenv('MAX_COMMENTS_PER_HOUR', 15))
-        self.max_follows_per_hour = int(os.getenv('MAX_FOLLOWS_PER_HOUR', 20))
-        self.post_interval_hours = int(os.getenv('POST_INTERVAL_HOURS', 24))
+        # Defers Instagram work after repeated errors
+        self.breaker = CircuitBreaker('instagram', logger=self.logger)
         
-        # Content settings
-        self.content_folder = os.getenv('CONTENT_FOLDER', 'content')
-        self.hashtags = os.getenv('HASHTAGS', '#yesplease #socialmedia')
+        # Durable queue of posts, so retries never double-post
+        self.outbox = PostOutbox(
+            'instagram',
+            max_attempts=BotConfig.OUTBOX['max_attempts'],
+            keep_sent_days=BotConfig.OUTBOX['keep_sent_days'],
+            logger=self.logger
+        )
         
-        # Safety settings
-        self.enable_safety_delays = os.getenv('ENABLE_SAFETY_DELAYS', 'true').lower() == 'true'
-        self.min_action_delay = int(os.getenv('MIN_ACTION_DELAY', 30))
-        self.max_action_delay = int(os.getenv('MAX_ACTION_DELAY', 120))
+        # Media and users already liked/followed, so we never spend a call twice
+        self.engagement_index = EngagementIndex('instagram', logger=self.logger)
         
-        # Initialize client
-        self.client = Client()
+        # Newest media seen per hashtag, so runs only page through new posts
+        self.feed_cursors = FeedCursorStore(
+            'instagram',
+            max_age_hours=BotConfig.FEEDS['instagram_cursor_max_age_hours'],
+            logger=self.logger
+        )
+        
+        # Sizes searches from the remaining budget and past filter pass rates
+        self.fetch_sizer = FetchSizer('instagram', logger=self.logger)
+        
+        # Resizes/recompresses images before upload
+        self.preprocessor = ImagePreprocessor(logger=self.logger)
+        self.video_pipeline = VideoPipeline(logger=self.logger)
         
         # Activity tracking
         self.activity_log = {
@@ -49,6 +97,37 @@ class InstagramBot:
         
         self.load_activity_log()
         
+    def load_configuration(self):
+        """Load bot configuration from the shared settings"""
+        settings = self.settings
+        
+        # Instagram credentials removed for public release
+        # self.username = settings.instagram_username
+        # self.password = settings.instagram_password
+        
+        # Bot configuration
+        self.max_likes_per_hour = settings.max_likes_per_hour
+        self.max_comments_per_hour = settings.max_comments_per_hour
+        self.max_follows_per_hour = settings.max_follows_per_hour
+        self.post_interval_hours = settings.post_interval_hours
+        
+        # Content settings
+        self.content_folder = settings.content_folder
+        self.hashtags = settings.hashtags
+        
+        # Safety settings
+        self.enable_safety_delays = settings.enable_safety_delays
+        self.min_action_delay = settings.min_action_delay
+        self.max_action_delay = settings.max_action_delay
+        
+        # Diagnostics
+        configure_tracing(settings.trace_format)
+        
+    def on_settings_changed(self, settings, changed):
+        """Apply reloaded settings without re-creating the client"""
+        self.load_configuration()
+        self.logger.info(f"Instagram bot configuration reloaded: {', '.join(changed)}")
+        
     def setup_logging(self):
         """Setup logging configuration"""
         logging.basicConfig(
@@ -74,6 +153,7 @@ class InstagramBot:
         except Exception as e:
             self.logger.error(f"Error loading activity log: {e}")
             
+    @traced()
     def save_activity_log(self):
         """Save activity log to file"""
         try:
@@ -98,26 +178,82 @@ class InstagramBot:
             self.save_activity_log()
             self.logger.info("Daily activity counters reset")
             
+    @traced()
     def login(self):
         """Login to Instagram"""
+        if not self.breaker.allow_request():
+            self.logger.warning(f"Instagram circuit open, skipping login (retry in {self.breaker.seconds_until_retry()}s)")
+            return False
+            
+        # An abandoned call (e.g. a timed-out upload) still owns the session; don't reset it underneath
+        if client_busy(self.client):
+            self.logger.warning("Instagram client still busy with an abandoned call, skipping login")
+            return False
+            
         try:
             self.logger.info(f"Attempting to login as {self.username}")
-            self.client.login(self.username, self.password)
+            
+            # Reuse the saved session so restarts don't trigger a fresh login
+            session_file = Path('data/instagram_session.json')
+            if session_file.exists():
+                try:
+                    self.client.load_settings(session_file)
+                    call_with_timeout(self.client.login, self.username, self.password, operation='login')
+                    self.logger.info("Logged in to Instagram using saved session")
+                    self.breaker.record_success()
+                    return True
+                except Exception as e:
+                    self.logger.info(f"Saved session invalid, logging in fresh: {e}")
+                    self.client.set_settings({})
+                    
+            call_with_timeout(self.client.login, self.username, self.password, operation='login')
+            session_file.parent.mkdir(exist_ok=True)
+            self.client.dump_settings(session_file)
             self.logger.info("Successfully logged in to Instagram")
+            self.breaker.record_success()
             return True
         except Exception as e:
             self.logger.error(f"Failed to login: {e}")
+            self.breaker.record_failure(f"Failed to login: {e}")
             return False
             
+    def test_connection(self):
+        """Check the current session with one cheap call, logging in only if there is none"""
+        if not self.client.user_id:
+            return {'ok': self.login(), 'detail': 'fresh login'}
+        try:
+            account = call_with_timeout(self.client.account_info, operation='fetch')
+            return {'ok': True, 'detail': f"session active as {account.username}"}
+        except Exception as e:
+            self.logger.warning(f"Instagram session check failed: {e}")
+            return {'ok': self.login(), 'detail': f"session check failed ({e}), logged in again"}
+            
+    def get_activity_summary(self):
+        """Get summary of Instagram bot activities (read-only, safe while a job runs)"""
+        # Counters from an earlier day count as zero; the next job resets and saves them
+        stale = self.activity_log['last_reset'] < datetime.now().date()
+        return {
+            'likes_today': 0 if stale else self.activity_log['likes_today'],
+            'comments_today': 0 if stale else self.activity_log['comments_today'],
+            'follows_today': 0 if stale else self.activity_log['follows_today'],
+            'last_post': self.activity_log.get('last_post'),
+            'authenticated': bool(self.client.user_id),
+            'circuit': self.breaker.status()
+        }
+        
     def safe_delay(self):
         """Add random delay between actions for safety"""
         if self.enable_safety_delays:
             delay = random.randint(self.min_action_delay, self.max_action_delay)
             self.logger.info(f"Safety delay: {delay} seconds")
-            time.sleep(delay)
+            sleep(delay)
             
     def can_perform_action(self, action_type):
         """Check if we can perform an action based on daily limits"""
+        return self.remaining_budget(action_type) > 0
+        
+    def remaining_budget(self, action_type):
+        """How many more actions of this type are allowed today"""
         self.reset_daily_counters()
         
         limits = {
@@ -135,7 +271,7 @@ class InstagramBot:
         # Calculate hourly limit (assuming 16 active hours per day)
         daily_limit = limits[action_type] * 16
         
-        return current_counts[action_type] < daily_limit
+        return max(0, daily_limit - current_counts[action_type])
         
     def get_content_files(self):
         """Get list of content files to post"""
@@ -154,6 +290,39 @@ class InstagramBot:
             
         return list(content_files)
         
+    def warm_up_tasks(self):
+        """Start-up work that would otherwise land on the first scheduled job"""
+        return {
+            'instagram_session': self.login,
+            'instagram_content': self.prepare_content
+        }
+        
+    def prepare_content(self):
+        """Catalog the library, then top up the image pool (in order: both write the perceptual index)"""
+        self.build_content_catalog()
+        self.prefill_image_pool()
+        
+    def build_content_catalog(self):
+        """Hash new library images so the first post's duplicate checks are lookups"""
+        index = PerceptualIndex(logger=self.logger)
+        duplicates = index.scan(library_folders())
+        self.logger.info(f"Content catalog: {len(self.get_content_files())} files in {self.content_folder}, "
+                         f"{len(index.entries)} images hashed, {len(duplicates)} near-duplicates")
+        
+    def prefill_image_pool(self):
+        """Batch-fetch images for a few quote queries with no reusable local photo"""
+        images_folder = Path(self.content_folder) / "images"
+        pool = UnsplashPool(images_folder, logger=self.logger)
+        missing = [query for _, query in self.QUOTE_IMAGE_PAIRS if not pool.find_local(query)]
+        if not missing:
+            self.logger.info("Image pool covers every quote query")
+            return
+        
+        limit = BotConfig.WARMUP['prefill_queries']
+        self.logger.info(f"{len(missing)} quote queries have no local image, prefilling {min(limit, len(missing))}")
+        for query in random.sample(missing, min(limit, len(missing))):
+            pool.fetch_batch(query)
+        
     def create_post_caption(self, filename):
         """Create caption for post"""
         # Use an inspirational quote
@@ -175,45 +344,56 @@ class InstagramBot:
         # Compose caption: quote + hashtags
         return f"{quote}\n\n{hashtags}"
         
+    @traced()
+    def create_new_post(self):
+        """Pick a quote, fetch a matching image and return (content_file, caption)"""
+        quote, unsplash_query = random.choice(self.QUOTE_IMAGE_PAIRS)
+        images_folder = Path(self.content_folder) / "images"
+        images_folder.mkdir(parents=True, exist_ok=True)
+        self.logger.info(f"Finding image for query: {unsplash_query}")
+        unsplash_img_path = fetch_unsplash_image(query=unsplash_query, save_folder=images_folder, logger=self.logger)
+        if not unsplash_img_path:
+            self.logger.error("Failed to fetch image from Unsplash")
+            return None
+        return Path(unsplash_img_path), f"{quote}\n\n{self.hashtags}"
+        
+    def dispatch_post(self, record):
+        """Upload one outbox record; returns the media pk or None"""
+        content_file = Path(record['payload']['file'])
+        caption = record['payload']['caption']
+        
+        self.logger.info(f"Posting content: {content_file.name}")
+        print(f"[InstagramBot] Posting content: {content_file.name}")
+        # Post based on file type
+        if content_file.suffix.lower() == '.mp4':
+            media = call_with_timeout(self.video_pipeline.upload, self.client, content_file, caption,
+                                      operation='upload_video', client=self.client)
+        else:
+            upload_file = self.preprocessor.prepare(content_file, 'instagram')
+            media = call_with_timeout(self.client.photo_upload, str(upload_file), caption, operation='upload')
+            
+        if media:
+            self.logger.info(f"Successfully posted content: {media.pk}")
+            print(f"[InstagramBot] Successfully posted content: {media.pk}")
+            return media.pk
+        return None
+        
+    def reconcile_post(self, record):
+        """Find a post an earlier, unconfirmed upload may already have published"""
+        caption = record['payload']['caption'].strip()
+        for media in call_with_timeout(self.client.user_medias, self.client.user_id, amount=5, operation='fetch'):
+            if (media.caption_text or '').strip() == caption:
+                return media.pk
+        return None
+        
+    @traced()
     def post_content(self):
-        """Post content to Instagram"""
+        """Post content to Instagram through the outbox"""
+        if not self.breaker.allow_request():
+            self.logger.warning(f"Instagram circuit open, deferring post (retry in {self.breaker.seconds_until_retry()}s)")
+            return False
+            
         try:
-            # Inspirational quotes and matching Unsplash queries
-            quote_image_pairs = [
-                ("Believe you can and you're halfway there.", "mountain sunrise"),
-                ("Your only limit is your mind.", "open road sky"),
-                ("Every day is a second chance.", "fresh morning nature"),
-                ("Start where you are. Use what you have. Do what you can.", "minimal workspace"),
-                ("Dream big. Work hard. Stay focused.", "stars night sky"),
-                ("Small steps every day.", "footsteps sand beach"),
-                ("You are stronger than you think.", "strong athlete"),
-                ("Progress, not perfection.", "growing plant"),
-                ("Be the reason someone smiles today.", "smiling people"),
-                ("Wellness is the natural state of my body.", "peaceful nature wellness"),
-                ("Happiness is a journey, not a destination.", "happy journey travel"),
-                ("Let your dreams be bigger than your fears.", "dream clouds sky"),
-                ("You are enough just as you are.", "calm self care"),
-                ("Gratitude turns what we have into enough.", "gratitude journal coffee"),
-                ("Take care of your body. It's the only place you have to live.", "healthy food fitness"),
-            ]
-            import random
-            quote, unsplash_query = random.choice(quote_image_pairs)
-            images_folder = Path(self.content_folder) / "images"
-            images_folder.mkdir(parents=True, exist_ok=True)
-            self.logger.info(f"Fetching new image from Unsplash for query: {unsplash_query}")
-            unsplash_img_path = fetch_unsplash_image(query=unsplash_query, save_folder=images_folder, logger=self.logger)
-            if not unsplash_img_path:
-                self.logger.error("Failed to fetch image from Unsplash")
-                return False
-            content_file = Path(unsplash_img_path)
-            self.last_posted_file = str(content_file)
-            caption = f"{quote}\n\n{self.hashtags}"
-
-            # Ensure logged in before posting
-            if not getattr(self.client, 'user_id', None):
-                self.logger.info("Logging in to Instagram...")
-                self.client.login(self.username, self.password)
-
             # Check if enough time has passed since last post
             if self.activity_log['last_post']:
                 last_post_time = datetime.fromisoformat(self.activity_log['last_post'])
@@ -221,20 +401,31 @@ class InstagramBot:
                 if time_since_last_post.total_seconds() < (self.post_interval_hours * 3600):
                     self.logger.info("Not enough time passed since last post")
                     return False
-
-            self.logger.info(f"Posting content: {content_file.name}")
-            print(f"[InstagramBot] Posting content: {content_file.name}")
-            # Post based on file type
-            if content_file.suffix.lower() == '.mp4':
-                media = self.client.video_upload(str(content_file), caption)
+                    
+            # Retry a queued post before fetching and captioning a new one
+            record = self.outbox.next_pending()
+            if record is None:
+                new_post = self.create_new_post()
+                if not new_post:
+                    return False
+                content_file, caption = new_post
+                record = self.outbox.enqueue({'file': str(content_file), 'caption': caption})
             else:
-                media = self.client.photo_upload(str(content_file), caption)
+                self.logger.info(f"Retrying queued post {record['key']}")
+            self.last_posted_file = record['payload']['file']
 
-            if media:
+            # Ensure logged in before posting
+            if not getattr(self.client, 'user_id', None):
+                self.logger.info("Logging in to Instagram...")
+                call_with_timeout(self.client.login, self.username, self.password, operation='login')
+
+            # One post per interval, so drain a single record
+            sent = self.outbox.drain(self.dispatch_post, self.reconcile_post, batch_size=1)
+
+            if sent:
                 self.activity_log['last_post'] = datetime.now().isoformat()
                 self.save_activity_log()
-                self.logger.info(f"Successfully posted content: {media.pk}")
-                print(f"[InstagramBot] Successfully posted content: {media.pk}")
+                self.breaker.record_success()
                 return True
             else:
                 self.logger.error("Failed to post content")
@@ -243,40 +434,76 @@ class InstagramBot:
         except Exception as e:
             self.logger.error(f"Error posting content: {e}")
             print(f"[InstagramBot] Error posting content: {e}")
+            self.breaker.record_failure(f"Error posting content: {e}")
             return False
+        finally:
+            self.breaker.end_trial()
             
+    def fetch_new_medias(self, consumer, hashtag, page_size, stats):
+        """Lazily yield pages of recent hashtag media newer than this consumer's cursor, as MediaRecords"""
+        since_pk = self.feed_cursors.get(consumer, hashtag)
+        
+        def fetch_page(max_id):
+            page, next_max_id = call_with_timeout(
+                self.client.hashtag_medias_v1_chunk,
+                hashtag, max_amount=page_size, tab_key='recent', max_id=max_id,
+                operation='fetch'
+            )
+            medias = [media_record(m) for m in page]
+            fresh = [m for m in medias if since_pk is None or m.pk > int(since_pk)]
+            
+            if since_pk is not None:
+                self.logger.info(f"{len(fresh)} new posts for #{hashtag} since {since_pk}")
+            if fresh:
+                self.feed_cursors.advance(consumer, hashtag, max(m.pk for m in fresh))
+                self.feed_cursors.save()
+                
+            # Reached media seen last run, nothing further back is new
+            if len(fresh) < len(medias):
+                next_max_id = None
+            return fresh, next_max_id
+            
+        return paged(fetch_page, BotConfig.FEEDS['max_pages'], stats)
+        
+    @traced()
     def like_recent_posts(self, hashtag, count=5):
         """Like recent posts with specific hashtag"""
         try:
-            if not self.can_perform_action('like'):
+            wanted = min(count, self.remaining_budget('like'))
+            if wanted <= 0:
                 self.logger.info("Daily like limit reached")
                 return
                 
             self.logger.info(f"Looking for posts with hashtag: {hashtag}")
-            medias = self.client.hashtag_medias_recent(hashtag, amount=count)
+            stats = PipelineStats()
+            medias = self.fetch_new_medias('like', hashtag, self.fetch_sizer.size('like', wanted), stats)
+            medias = keep(medias, not_seen(self.engagement_index, 'like'), stats)
             
-            for media in medias:
-                if not self.can_perform_action('like'):
-                    break
-                    
-                try:
-                    self.client.media_like(media.id)
-                    self.activity_log['likes_today'] += 1
-                    self.logger.info(f"Liked post: {media.id}")
-                    self.safe_delay()
-                    
-                except Exception as e:
-                    self.logger.error(f"Error liking post {media.id}: {e}")
+            def like(media):
+                call_with_timeout(self.client.media_like, media.id)
+                self.engagement_index.add('like', media.id)
+                self.activity_log['likes_today'] += 1
+                self.logger.info(f"Liked post: {media.id}")
+                return True
+                
+            consume(medias, like, wanted, stats,
+                    can_continue=lambda: self.can_perform_action('like'),
+                    delay=self.safe_delay, name='like', logger=self.logger, breaker=self.breaker)
                     
+            self.fetch_sizer.record('like', stats.considered, stats.acted)
             self.save_activity_log()
+            self.engagement_index.save()
             
         except Exception as e:
             self.logger.error(f"Error in like_recent_posts: {e}")
+            self.breaker.record_failure(f"Error in like_recent_posts: {e}")
             
+    @traced()
     def comment_on_posts(self, hashtag, count=3):
         """Comment on recent posts with specific hashtag"""
         try:
-            if not self.can_perform_action('comment'):
+            wanted = min(count, self.remaining_budget('comment'))
+            if wanted <= 0:
                 self.logger.info("Daily comment limit reached")
                 return
                 
@@ -291,58 +518,61 @@ class InstagramBot:
             ]
             
             self.logger.info(f"Looking for posts to comment on with hashtag: {hashtag}")
-            medias = self.client.hashtag_medias_recent(hashtag, amount=count)
+            stats = PipelineStats()
+            medias = self.fetch_new_medias('comment', hashtag, self.fetch_sizer.size('comment', wanted), stats)
             
-            for media in medias:
-                if not self.can_perform_action('comment'):
-                    break
-                    
-                try:
-                    comment_text = random.choice(comments)
-                    self.client.media_comment(media.id, comment_text)
-                    self.activity_log['comments_today'] += 1
-                    self.logger.info(f"Commented on post: {media.id} - '{comment_text}'")
-                    self.safe_delay()
-                    
-                except Exception as e:
-                    self.logger.error(f"Error commenting on post {media.id}: {e}")
+            def comment(media):
+                comment_text = random.choice(comments)
+                call_with_timeout(self.client.media_comment, media.id, comment_text)
+                self.activity_log['comments_today'] += 1
+                self.logger.info(f"Commented on post: {media.id} - '{comment_text}'")
+                return True
+                
+            consume(medias, comment, wanted, stats,
+                    can_continue=lambda: self.can_perform_action('comment'),
+                    delay=self.safe_delay, name='comment', logger=self.logger, breaker=self.breaker)
                     
+            self.fetch_sizer.record('comment', stats.considered, stats.acted)
             self.save_activity_log()
             
         except Exception as e:
             self.logger.error(f"Error in comment_on_posts: {e}")
+            self.breaker.record_failure(f"Error in comment_on_posts: {e}")
             
+    @traced()
     def follow_users(self, hashtag, count=2):
         """Follow users who posted with specific hashtag"""
         try:
-            if not self.can_perform_action('follow'):
+            wanted = min(count, self.remaining_budget('follow'))
+            if wanted <= 0:
                 self.logger.info("Daily follow limit reached")
                 return
                 
             self.logger.info(f"Looking for users to follow with hashtag: {hashtag}")
-            medias = self.client.hashtag_medias_recent(hashtag, amount=count * 2)
+            stats = PipelineStats()
+            medias = self.fetch_new_medias('follow', hashtag, self.fetch_sizer.size('follow', wanted), stats)
+            medias = keep(medias, not_seen(self.engagement_index, 'follow', key=lambda m: m.user_pk), stats)
             
-            followed_count = 0
-            for media in medias:
-                if followed_count >= count or not self.can_perform_action('follow'):
-                    break
-                    
-                try:
-                    user_id = media.user.pk
-                    self.client.user_follow(user_id)
-                    self.activity_log['follows_today'] += 1
-                    followed_count += 1
-                    self.logger.info(f"Followed user: {media.user.username}")
-                    self.safe_delay()
-                    
-                except Exception as e:
-                    self.logger.error(f"Error following user {media.user.username}: {e}")
+            def follow(media):
+                call_with_timeout(self.client.user_follow, media.user_pk)
+                self.engagement_index.add('follow', media.user_pk)
+                self.activity_log['follows_today'] += 1
+                self.logger.info(f"Followed user: {media.username}")
+                return True
+                
+            consume(medias, follow, wanted, stats,
+                    can_continue=lambda: self.can_perform_action('follow'),
+                    delay=self.safe_delay, name='follow', logger=self.logger, breaker=self.breaker)
                     
+            self.fetch_sizer.record('follow', stats.considered, stats.acted)
             self.save_activity_log()
+            self.engagement_index.save()
             
         except Exception as e:
             self.logger.error(f"Error in follow_users: {e}")
+            self.breaker.record_failure(f"Error in follow_users: {e}")
             
+    @traced(root=True)
     def run_daily_activities(self):
         """Run all daily bot activities"""
         if not self.login():
@@ -367,22 +597,45 @@ class InstagramBot:
             
         except Exception as e:
             self.logger.error(f"Error in run_daily_activities: {e}")
-        finally:
-            try:
-                self.client.logout()
-            except:
-                pass
+        # The session stays logged in (and saved) for the next run and the control socket
                 
     def start_scheduler(self):
         """Start the bot scheduler for continuous posting and engagement"""
         self.logger.info("Starting Instagram bot scheduler")
         print("[InstagramBot] Scheduler started. Monitoring and posting will continue...")
-        schedule.every().day.at("10:00").do(self._notify_and_run)
-        schedule.every().day.at("15:00").do(self._notify_and_run)
-        schedule.every().day.at("19:00").do(self._notify_and_run)
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        # Runs are deferred, not dropped, while the Instagram circuit is open
+        run_job = self.breaker.guard(self._notify_and_run)
+        schedule.every().day.at("10:00").do(run_job)
+        schedule.every().day.at("15:00").do(run_job)
+        schedule.every().day.at("19:00").do(run_job)
+        
+        # Stop on SIGTERM/SIGINT after the running job, reload on SIGHUP
+        self.shutdown = GracefulShutdown(self.logger)
+        self.shutdown.register_flush(self.save_activity_log)
+        self.shutdown.register_flush(self.engagement_index.save)
+        self.shutdown.register_reload(reload_settings)
+        
+        # Restore the session and fill caches before the first job is due
+        warm_up = WarmUp(self.logger)
+        warm_up.run(self.warm_up_tasks())
+        warm_up.print_summary('[InstagramBot] ')
+        
+        # Answer bot_manager from this process's warm state
+        control = ControlServer(self.shutdown, logger=self.logger)
+        control.register('summary', self.get_activity_summary)
+        control.register('test_connection', lambda: {'instagram': self.test_connection()}, on_scheduler=True)
+        control.add_job('daily', run_job)
+        control.start()
+        
+        # Pick up .env edits without a restart
+        watcher = SettingsWatcher()
+        watcher.start()
+        try:
+            self.shutdown.run_scheduler(check_interval=60)  # Check every minute
+        finally:
+            watcher.stop()
+            control.stop()
+        print("[InstagramBot] Scheduler stopped. Activity log saved.")
 
     def _notify_and_run(self):
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -394,33 +647,16 @@ class InstagramBot:
         else:
             print(f"[InstagramBot] {now} - Daily activities failed or skipped.")
 
+@traced()
 def fetch_unsplash_image(query="wellness", save_folder="content", logger=None):
+    """Return a local image matching query, fetching a batch of up to 30 from Unsplash on a miss"""
     if logger is None:
         logger = logging.getLogger("instagram_bot")
-    access_key = os.getenv("UNSPLASH_ACCESS_KEY")
-    url = f"https://api.unsplash.com/photos/random?query={query}&orientation=squarish&client_id={access_key}"
-    response = requests.get(url)
-    logger.info(f"Unsplash API request URL: {url}")
-    logger.info(f"Unsplash API response status: {response.status_code}")
-    try:
-        logger.info(f"Unsplash API response: {response.text}")
-    except Exception:
-        pass
-    if response.status_code == 200:
-        data = response.json()
-        if 'urls' not in data or 'regular' not in data['urls']:
-            logger.error(f"Unsplash API response missing image URL: {data}")
-            return None
-        img_url = data['urls']['regular']
-        img_data = requests.get(img_url).content
-        img_path = Path(save_folder) / f"unsplash_{query}_{data['id']}.jpg"
-        with open(img_path, 'wb') as f:
-            f.write(img_data)
-        return img_path
-    else:
-        logger.error(f"Failed to fetch from Unsplash: {response.status_code} {response.text}")
-        return None
+    return UnsplashPool(save_folder, logger=logger).take(query)
 
 if __name__ == "__main__":
-    bot = InstagramBot()
-    bot.start_scheduler()
+    # --profile: one run against mock clients instead of the scheduler
+    from profiling import profile_from_argv
+    if not profile_from_argv('instagram'):
+        bot = InstagramBot()
+        bot.start_scheduler()
@@ -0,0 +1,183 @@
+"""
+Job Metrics
+Per-run start time, lateness, duration and outcome of scheduled jobs, with percentile summaries
+"""
+
+import json
+import math
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import schedule
+
+from bot_config import BotConfig
+from timeouts import Cancelled
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (pct in 0-100); None for no values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[rank - 1]
+
+
+def job_name(job_func) -> str:
+    return getattr(job_func, '__name__', None) or getattr(getattr(job_func, 'func', None), '__name__', repr(job_func))
+
+
+class JobMetrics:
+    """Append-only log of job runs in data/job_runs.jsonl, trimmed to the last keep_days"""
+
+    def __init__(self, path=None, keep_days: Optional[int] = None, logger=None):
+        self.path = Path(path or BotConfig.JOB_METRICS['file'])
+        self.keep_days = keep_days or BotConfig.JOB_METRICS['keep_days']
+        self.logger = logger or logging.getLogger('JobMetrics')
+        self._lock = threading.Lock()
+
+    def load(self, days: Optional[int] = None) -> List[Dict]:
+        """Runs from the last `days` (default keep_days), oldest first"""
+        cutoff = (datetime.now() - timedelta(days=days or self.keep_days)).isoformat()
+        runs = []
+        try:
+            if self.path.exists():
+                with open(self.path, 'r') as f:
+                    for line in f:
+                        try:
+                            run = json.loads(line)
+                        except ValueError:
+                            continue  # Torn last line after a crash
+                        if run.get('started', '') >= cutoff:
+                            runs.append(run)
+        except Exception as e:
+            self.logger.error(f"Error loading job metrics: {e}")
+        return runs
+
+    def compact(self):
+        """Drop runs older than keep_days"""
+        if not self.path.exists():
+            return
+        with self._lock:
+            runs = self.load()
+            try:
+                temp_file = self.path.with_suffix('.tmp')
+                with open(temp_file, 'w') as f:
+                    for run in runs:
+                        f.write(json.dumps(run) + '\n')
+                temp_file.replace(self.path)
+            except Exception as e:
+                self.logger.error(f"Error compacting job metrics: {e}")
+
+    def record(self, run: Dict):
+        """Append one finished run"""
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(run) + '\n')
+            except Exception as e:
+                self.logger.error(f"Error saving job metrics: {e}")
+
+        message = (f"Job {run['job']} {run['outcome']} in {run['duration']:.1f}s "
+                   f"(started {run['lateness']:.1f}s late)")
+        if run['overran']:
+            self.logger.warning(f"{message}, overran the next slot at {run['next_slot']}")
+        elif run['skipped_slots']:
+            self.logger.warning(f"{message}, {run['skipped_slots']} slot(s) skipped")
+        else:
+            self.logger.info(message)
+
+    def instrument(self, job_func, scheduled_for=None, period: Optional[timedelta] = None, name: Optional[str] = None):
+        """Wrap a job so each run is timed and recorded
+
+        `scheduled_for` is the due time, or a callable returning it at run time
+        (a schedule.Job's next_run is still the due time while it runs).
+        """
+        name = name or job_name(job_func)
+
+        def instrumented(*args, **kwargs):
+            started = datetime.now()
+            due = scheduled_for() if callable(scheduled_for) else scheduled_for
+            due = due or started
+            lateness = max(0.0, (started - due).total_seconds())
+            upcoming = [j.next_run for j in schedule.jobs if j.next_run and j.next_run > started]
+            next_slot = min(upcoming) if upcoming else None
+
+            outcome, error = 'ok', None
+            try:
+                result = job_func(*args, **kwargs)
+                if result is False:
+                    outcome = 'failed'
+                return result
+            except Cancelled as e:
+                outcome, error = 'cancelled', str(e)
+                raise
+            except Exception as e:
+                outcome, error = 'error', str(e)
+                raise
+            finally:
+                finished = datetime.now()
+                self.record({
+                    'job': name,
+                    'scheduled_for': due.isoformat(),
+                    'started': started.isoformat(),
+                    'lateness': round(lateness, 2),
+                    'duration': round((finished - started).total_seconds(), 2),
+                    'outcome': outcome,
+                    'error': error,
+                    'next_slot': next_slot.isoformat() if next_slot else None,
+                    'overran': bool(next_slot and finished > next_slot),
+                    # A run later than a whole period means schedule collapsed missed slots into this one
+                    'skipped_slots': int(lateness // period.total_seconds()) if period else 0
+                })
+
+        instrumented.__name__ = name
+        return instrumented
+
+    def instrument_scheduled(self, job: schedule.Job):
+        """instrument() for a schedule.Job, reading its due time and period from the job"""
+        period = timedelta(**{job.unit: job.interval}) if job.unit else None
+        return self.instrument(job.job_func, scheduled_for=lambda: job.next_run, period=period)
+
+    def summary(self, days: Optional[int] = None) -> Dict:
+        """Per-job p50/p95 duration and lateness, outcomes, overruns and skipped slots"""
+        jobs = {}
+        for run in self.load(days):
+            jobs.setdefault(run['job'], []).append(run)
+
+        summary = {}
+        for name, runs in sorted(jobs.items()):
+            durations = [run['duration'] for run in runs]
+            lateness = [run['lateness'] for run in runs]
+            outcomes = {}
+            for run in runs:
+                outcomes[run['outcome']] = outcomes.get(run['outcome'], 0) + 1
+            summary[name] = {
+                'runs': len(runs),
+                'duration_p50': percentile(durations, 50),
+                'duration_p95': percentile(durations, 95),
+                'lateness_p50': percentile(lateness, 50),
+                'lateness_p95': percentile(lateness, 95),
+                'outcomes': outcomes,
+                'overruns': sum(1 for run in runs if run['overran']),
+                'skipped_slots': sum(run['skipped_slots'] for run in runs),
+                'last_run': runs[-1]['started']
+            }
+        return summary
+
+    def alerts(self, days: Optional[int] = None) -> List[str]:
+        """Human-readable overrun, skipped-slot and failure alerts, newest first"""
+        alerts = []
+        for run in reversed(self.load(days or BotConfig.JOB_METRICS['alert_days'])):
+            when = run['started'][:16].replace('T', ' ')
+            if run['overran']:
+                alerts.append(f"{when} {run['job']} ran {run['duration']:.0f}s and overran the next slot ({run['next_slot'][11:16]})")
+            if run['skipped_slots']:
+                alerts.append(f"{when} {run['job']} started {run['lateness']:.0f}s late, {run['skipped_slots']} slot(s) skipped")
+            if run['outcome'] != 'ok':
+                alerts.append(f"{when} {run['job']} {run['outcome']}" + (f": {run['error']}" if run['error'] else ""))
+        return alerts
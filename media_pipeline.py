@@ -0,0 +1,500 @@
+"""
+Media Pipeline
+Prepares images and videos for upload, caching derived files by source hash
+"""
+
+import os
+import io
+import json
+import time
+import uuid
+import shutil
+import struct
+import hashlib
+import logging
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    print("⚠️  Pillow not installed. Run: pip install -r requirements.txt")
+    Image = None
+
+from bot_config import BotConfig
+from timeouts import check_cancelled, sleep
+from tracing import traced
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def _temp_path(target: Path, suffix: str = '.tmp') -> Path:
+    """Per-writer temp name next to `target`, so concurrent renders of one file never share it"""
+    return target.with_name(f"{target.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}{suffix}")
+
+
+def file_hash(path) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def memo_file_hash(path: Path, memo: Dict) -> str:
+    """file_hash memoized in `memo` on (path, size, mtime), so unchanged files are read once"""
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime)
+    if key not in memo:
+        memo[key] = file_hash(path)
+    return memo[key]
+
+
+def spec_key(spec: Dict) -> str:
+    """Short stable key for a rendition spec, so changing a spec invalidates its cache"""
+    encoded = json.dumps(spec, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:8]
+
+
+def derived_path(cache_folder, source_hash: str, rendition: str, spec: Dict) -> Path:
+    """Cache location of one rendition of one source"""
+    return Path(cache_folder) / f"{source_hash[:20]}_{rendition}_{spec_key(spec)}.jpg"
+
+
+def render_image(source, target, spec: Dict, min_quality: int = BotConfig.MEDIA['min_quality']) -> Path:
+    """Write a resized, EXIF-free JPEG of `source` to `target` that fits spec['max_bytes']"""
+    target = Path(target)
+    size = tuple(spec['size'])
+
+    with Image.open(source) as img:
+        # Apply camera rotation before the EXIF block is dropped
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        if spec.get('mode') == 'crop':
+            img = ImageOps.fit(img, size, method=Image.LANCZOS)
+        else:
+            img.thumbnail(size, Image.LANCZOS)
+
+        # Step quality down until the file fits the size budget
+        quality = spec.get('quality', 85)
+        while True:
+            buffer = io.BytesIO()
+            img.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+            if buffer.tell() <= spec.get('max_bytes', float('inf')) or quality <= min_quality:
+                break
+            quality -= 5
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = _temp_path(target)
+    try:
+        temp_file.write_bytes(buffer.getvalue())
+        os.replace(temp_file, target)
+    finally:
+        temp_file.unlink(missing_ok=True)
+    return target
+
+
+class ImagePreprocessor:
+    """Normalizes images to a platform rendition before upload"""
+
+    def __init__(self, cache_folder=None, logger=None):
+        self.cache_folder = Path(cache_folder or BotConfig.MEDIA['cache_folder'])
+        self.logger = logger or logging.getLogger('MediaPipeline')
+        self._hashes = {}
+
+    def source_hash(self, path: Path) -> str:
+        """File hash, memoized on (path, size, mtime) so unchanged files are read once"""
+        return memo_file_hash(path, self._hashes)
+
+    def cached_rendition(self, path, rendition: str) -> Optional[Path]:
+        """Derived file for `path` if it has already been rendered"""
+        spec = BotConfig.RENDITIONS[rendition]
+        target = derived_path(self.cache_folder, self.source_hash(Path(path)), rendition, spec)
+        return target if target.exists() else None
+
+    @traced()
+    def prepare(self, path, rendition: str = 'instagram') -> Path:
+        """Return the upload-ready file for `path`, rendering it on a cache miss
+
+        Falls back to the original file for videos, unknown renditions, or
+        when Pillow is unavailable or the image cannot be processed.
+        """
+        path = Path(path)
+
+        if path.suffix.lower() not in IMAGE_EXTENSIONS or rendition not in BotConfig.RENDITIONS:
+            return path
+
+        if Image is None:
+            self.logger.warning("Pillow not available, uploading original image")
+            return path
+
+        # Already a derived file
+        if self.cache_folder.resolve() in path.resolve().parents:
+            return path
+
+        try:
+            spec = BotConfig.RENDITIONS[rendition]
+            target = derived_path(self.cache_folder, self.source_hash(path), rendition, spec)
+
+            if target.exists():
+                self.logger.info(f"Using cached {rendition} rendition for {path.name}")
+                return target
+
+            render_image(path, target, spec)
+            self.logger.info(
+                f"Prepared {rendition} rendition for {path.name}: "
+                f"{path.stat().st_size // 1024}KB -> {target.stat().st_size // 1024}KB"
+            )
+            return target
+
+        except Exception as e:
+            self.logger.error(f"Error preprocessing {path.name}, uploading original: {e}")
+            return path
+
+
+def _probe_mp4_boxes(path: Path) -> Dict:
+    """Read duration and frame size from the MP4 moov box without decoding"""
+    info = {}
+
+    def walk(f, start, end):
+        offset = start
+        while offset + 8 <= end:
+            f.seek(offset)
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            size, box_type = struct.unpack('>I4s', header)
+            header_size = 8
+            if size == 1:
+                size = struct.unpack('>Q', f.read(8))[0]
+                header_size = 16
+            elif size == 0:
+                size = end - offset
+            if size < header_size:
+                return
+
+            payload_start = offset + header_size
+            payload_end = offset + size
+
+            if box_type in (b'moov', b'trak'):
+                walk(f, payload_start, payload_end)
+            elif box_type == b'mvhd':
+                version = f.read(1)[0]
+                if version == 1:
+                    f.seek(payload_start + 4 + 16)
+                    timescale, duration = struct.unpack('>IQ', f.read(12))
+                else:
+                    f.seek(payload_start + 4 + 8)
+                    timescale, duration = struct.unpack('>II', f.read(8))
+                if timescale:
+                    info['duration'] = round(duration / timescale, 3)
+            elif box_type == b'tkhd' and 'width' not in info:
+                # Width and height are the last two 16.16 fixed-point fields
+                f.seek(payload_end - 8)
+                width, height = struct.unpack('>II', f.read(8))
+                if width and height:
+                    info['width'] = width >> 16
+                    info['height'] = height >> 16
+
+            offset = payload_end
+
+    with open(path, 'rb') as f:
+        walk(f, 0, path.stat().st_size)
+
+    return info
+
+
+def probe_video(path) -> Dict:
+    """Size, duration and frame size of a video (ffprobe when installed, else MP4 boxes)"""
+    path = Path(path)
+    info = {'size': path.stat().st_size}
+
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'stream=width,height,codec_name:format=duration',
+             '-of', 'json', str(path)],
+            capture_output=True, text=True, timeout=30, check=True
+        )
+        data = json.loads(result.stdout)
+        stream = (data.get('streams') or [{}])[0]
+        info.update({
+            'duration': float(data.get('format', {}).get('duration', 0)),
+            'width': stream.get('width'),
+            'height': stream.get('height'),
+            'codec': stream.get('codec_name')
+        })
+    elif path.suffix.lower() == '.mp4':
+        info.update(_probe_mp4_boxes(path))
+
+    return info
+
+
+def extract_cover(source, target, at_seconds: float = BotConfig.MEDIA['cover_at_seconds']) -> Optional[Path]:
+    """Save one video frame as a JPEG cover (ffmpeg, else moviepy); None if neither is available"""
+    source, target = Path(source), Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = _temp_path(target, '.tmp.jpg')
+
+    try:
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg:
+            subprocess.run(
+                [ffmpeg, '-y', '-loglevel', 'error', '-ss', str(at_seconds), '-i', str(source),
+                 '-frames:v', '1', str(temp_file)],
+                capture_output=True, timeout=60, check=True
+            )
+        else:
+            try:
+                from moviepy import VideoFileClip
+            except ImportError:
+                try:
+                    from moviepy.editor import VideoFileClip
+                except ImportError:
+                    return None
+            with VideoFileClip(str(source)) as clip:
+                clip.save_frame(str(temp_file), t=min(at_seconds, clip.duration / 2))
+
+        os.replace(temp_file, target)
+    finally:
+        temp_file.unlink(missing_ok=True)
+    return target
+
+
+class VideoPipeline:
+    """Probes videos, pre-generates covers and uploads in resumable chunks where supported"""
+
+    def __init__(self, cache_folder=None, state_file=None, chunk_size: Optional[int] = None, logger=None):
+        self.cache_folder = Path(cache_folder or BotConfig.MEDIA['cache_folder'])
+        self.state_file = Path(state_file or BotConfig.MEDIA['upload_state_file'])
+        self.chunk_size = chunk_size or BotConfig.MEDIA['upload_chunk_size']
+        self.logger = logger or logging.getLogger('MediaPipeline')
+        self._hashes = {}
+
+    @traced()
+    def prepare(self, path) -> Dict:
+        """Probe a video and build its cover, both cached by source hash"""
+        path = Path(path)
+        source_hash = memo_file_hash(path, self._hashes)
+        probe_file = self.cache_folder / f"{source_hash[:20]}_probe.json"
+        cover_file = self.cache_folder / f"{source_hash[:20]}_cover.jpg"
+
+        if probe_file.exists():
+            with open(probe_file, 'r') as f:
+                probe = json.load(f)
+        else:
+            try:
+                probe = probe_video(path)
+                self.cache_folder.mkdir(parents=True, exist_ok=True)
+                with open(probe_file, 'w') as f:
+                    json.dump(probe, f, indent=2)
+            except Exception as e:
+                # Not cached, so the next prepare probes again
+                self.logger.error(f"Error probing {path.name}: {e}")
+                probe = {'size': path.stat().st_size}
+
+        cover = cover_file if cover_file.exists() else None
+        if cover is None:
+            try:
+                cover = extract_cover(path, cover_file)
+            except Exception as e:
+                self.logger.error(f"Error extracting cover for {path.name}: {e}")
+
+        self.logger.info(f"Prepared video {path.name}: {probe} cover={'yes' if cover else 'no'}")
+        return {'hash': source_hash, 'probe': probe, 'cover': cover}
+
+    def upload(self, client, path, caption: str = ''):
+        """Upload a video with whichever mechanism `client` supports"""
+        path = Path(path)
+        prepared = self.prepare(path)
+
+        # tweepy.API exposes the INIT/APPEND/FINALIZE endpoints
+        if hasattr(client, 'chunked_upload_init'):
+            return self.upload_chunked(client, path, prepared)
+
+        # instagrapi uploads in one request; at least skip its own cover extraction
+        if prepared['cover']:
+            return client.video_upload(str(path), caption, thumbnail=prepared['cover'])
+        return client.video_upload(str(path), caption)
+
+    def _load_state(self) -> Dict:
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading upload state: {e}")
+        return {}
+
+    def _save_state(self, state: Dict):
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.state_file.with_suffix('.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(temp_file, self.state_file)
+        except Exception as e:
+            self.logger.error(f"Error saving upload state: {e}")
+
+    def upload_chunked(self, api, path: Path, prepared: Dict):
+        """Chunked upload that resumes from the last acknowledged segment after a failure"""
+        key = prepared['hash']
+        total_bytes = prepared['probe']['size']
+        state = self._load_state()
+        entry = state.get(key)
+
+        if entry and time.time() - entry['started_at'] > BotConfig.MEDIA['upload_resume_window']:
+            self.logger.info(f"Partial upload of {path.name} expired, restarting")
+            entry = None
+
+        if entry:
+            self.logger.info(
+                f"Resuming upload of {path.name} at segment {entry['segment_index']} "
+                f"({entry['bytes_sent']}/{total_bytes} bytes)"
+            )
+        else:
+            media_id = api.chunked_upload_init(total_bytes, 'video/mp4', media_category='tweet_video').media_id
+            entry = {
+                'media_id': media_id,
+                'file': str(path),
+                'total_bytes': total_bytes,
+                'chunk_size': self.chunk_size,
+                'segment_index': 0,
+                'bytes_sent': 0,
+                'started_at': time.time()
+            }
+            state[key] = entry
+            self._save_state(state)
+
+        # Segments must keep the size they were started with
+        chunk_size = entry['chunk_size']
+        started = time.time()
+        sent_this_run = 0
+
+        with open(path, 'rb') as f:
+            f.seek(entry['segment_index'] * chunk_size)
+            while True:
+                # Progress is saved per segment, so a cancelled upload resumes here next time
+                check_cancelled()
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+
+                api.chunked_upload_append(entry['media_id'], (path.name, chunk), entry['segment_index'])
+
+                entry['segment_index'] += 1
+                entry['bytes_sent'] += len(chunk)
+                sent_this_run += len(chunk)
+                self._save_state(state)
+
+                elapsed = max(time.time() - started, 1e-6)
+                self.logger.info(
+                    f"Upload progress {path.name}: {entry['bytes_sent'] * 100 // max(total_bytes, 1)}% "
+                    f"({entry['bytes_sent']}/{total_bytes} bytes, {sent_this_run / 1024 / elapsed:.0f} KB/s)"
+                )
+
+        media = api.chunked_upload_finalize(entry['media_id'])
+
+        # Wait for server-side processing of the video
+        while getattr(media, 'processing_info', None) and \
+                media.processing_info.get('state') in ('pending', 'in_progress'):
+            # Wakes and raises Cancelled if the job is cancelled or the upload call abandoned
+            sleep(media.processing_info.get('check_after_secs', 5))
+            media = api.get_media_upload_status(entry['media_id'])
+
+        if (getattr(media, 'processing_info', None) or {}).get('state') == 'failed':
+            state.pop(key, None)
+            self._save_state(state)
+            raise RuntimeError(f"Video processing failed: {media.processing_info}")
+
+        state.pop(key, None)
+        self._save_state(state)
+        self.logger.info(f"Uploaded {path.name} as media {entry['media_id']}")
+        return media
+
+
+def scan_content_images(content_folder='content') -> List[Path]:
+    """Images in the content folder and its images/ subfolder"""
+    content_path = Path(content_folder)
+    images = []
+
+    for folder in (content_path, content_path / 'images'):
+        if not folder.exists():
+            continue
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and Path(entry.name).suffix.lower() in IMAGE_EXTENSIONS:
+                    images.append(Path(entry.path))
+
+    return images
+
+
+def _render_source(source: str, renditions: List[str], cache_folder: str) -> Dict[str, str]:
+    """Worker: hash one source once and render every missing rendition of it"""
+    source_hash = file_hash(source)
+    results = {}
+
+    for rendition in renditions:
+        spec = BotConfig.RENDITIONS[rendition]
+        target = derived_path(cache_folder, source_hash, rendition, spec)
+        if target.exists():
+            results[rendition] = 'cached'
+        else:
+            render_image(source, target, spec)
+            results[rendition] = 'rendered'
+
+    return results
+
+
+def build_derivatives(content_folder='content', renditions: Optional[List[str]] = None,
+                      cache_folder=None, max_workers: Optional[int] = None, logger=None) -> Dict[str, int]:
+    """Render all renditions of every content image across a process pool
+
+    Output lands in the same cache ImagePreprocessor.prepare() reads, so a
+    later upload of any of these images is a cache hit.
+    """
+    logger = logger or logging.getLogger('MediaPipeline')
+    renditions = renditions or list(BotConfig.RENDITIONS)
+    cache_folder = str(cache_folder or BotConfig.MEDIA['cache_folder'])
+    stats = {'sources': 0, 'rendered': 0, 'cached': 0, 'failed': 0}
+
+    if Image is None:
+        logger.warning("Pillow not available, skipping derivative generation")
+        return stats
+
+    sources = scan_content_images(content_folder)
+    stats['sources'] = len(sources)
+    if not sources:
+        return stats
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_render_source, str(source), renditions, cache_folder): source
+            for source in sources
+        }
+
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                for outcome in future.result().values():
+                    stats[outcome] += 1
+            except Exception as e:
+                stats['failed'] += 1
+                logger.error(f"Error building renditions for {source.name}: {e}")
+
+    logger.info(
+        f"Derivatives for {stats['sources']} images: {stats['rendered']} rendered, "
+        f"{stats['cached']} cached, {stats['failed']} failed"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print(f"Built derivatives: {build_derivatives()}")
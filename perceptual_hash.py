@@ -0,0 +1,279 @@
+"""
+Perceptual Hash Index
+Finds visually near-identical images in the content library so duplicates are never stored or posted
+"""
+
+import io
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:
+    print("⚠️  Pillow not installed. Run: pip install -r requirements.txt")
+    Image = None
+
+try:
+    import numpy as np
+except ImportError:
+    print("⚠️  numpy not installed, perceptual hashing falls back to dHash in pure Python")
+    np = None
+
+from bot_config import BotConfig
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def _grayscale(img, size: Tuple[int, int]):
+    return img.convert('L').resize(size, Image.LANCZOS)
+
+
+def dhash(img) -> int:
+    """64-bit difference hash: is each pixel brighter than its right neighbour"""
+    small = _grayscale(img, (9, 8))
+
+    if np is None:
+        pixels = list(small.getdata())
+        value = 0
+        for row in range(8):
+            for col in range(8):
+                value = (value << 1) | (pixels[row * 9 + col + 1] > pixels[row * 9 + col])
+        return value
+
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+_DCT_MATRIX = None
+
+
+def _dct_matrix(n: int = 32):
+    """Orthonormal DCT-II basis, built once"""
+    global _DCT_MATRIX
+    if _DCT_MATRIX is None:
+        k = np.arange(n)[:, None]
+        i = np.arange(n)[None, :]
+        matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+        matrix[0] /= np.sqrt(2.0)
+        _DCT_MATRIX = matrix
+    return _DCT_MATRIX
+
+
+def phash(img) -> int:
+    """64-bit DCT hash: low-frequency coefficients above their median"""
+    pixels = np.asarray(_grayscale(img, (32, 32)), dtype=float)
+    dct = _dct_matrix()
+    low = (dct @ pixels @ dct.T)[:8, :8]
+    median = np.median(low.flatten()[1:])  # DC term skews the median
+    return int.from_bytes(np.packbits(low > median).tobytes(), 'big')
+
+
+def hamming_distances(hashes, value: int):
+    """Bit distance from `value` to every hash, in one vectorized pass"""
+    if np is None:
+        return [bin(h ^ value).count('1') for h in hashes]
+
+    xor = hashes ^ np.uint64(value)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor)
+    return np.unpackbits(xor.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+
+class PerceptualIndex:
+    """Perceptual hashes of library images, persisted and queried by Hamming distance"""
+
+    def __init__(self, index_file=None, method: Optional[str] = None,
+                 max_distance: Optional[int] = None, logger=None):
+        self.index_file = Path(index_file or BotConfig.MEDIA['perceptual_index_file'])
+        self.method = method or BotConfig.MEDIA['perceptual_hash']
+        if self.method == 'phash' and np is None:
+            self.method = 'dhash'
+        self.max_distance = BotConfig.MEDIA['duplicate_distance'] if max_distance is None else max_distance
+        self.logger = logger or logging.getLogger('PerceptualIndex')
+
+        self.entries = {}
+        self._paths = []
+        self._hashes = None
+        self.lock = threading.RLock()
+
+        self.load()
+
+    def load(self):
+        """Load hashes computed by earlier runs"""
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, 'r') as f:
+                    data = json.load(f)
+                # Hashes from another method are not comparable
+                if data.get('method') == self.method:
+                    self.entries = data.get('entries', {})
+        except Exception as e:
+            self.logger.error(f"Error loading perceptual index: {e}")
+        self._rebuild()
+
+    def save(self):
+        """Write the index atomically"""
+        with self.lock:
+            try:
+                self.index_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_file = self.index_file.with_suffix('.tmp')
+                with open(temp_file, 'w') as f:
+                    json.dump({'method': self.method, 'entries': self.entries}, f, indent=2)
+                os.replace(temp_file, self.index_file)
+            except Exception as e:
+                self.logger.error(f"Error saving perceptual index: {e}")
+
+    def _rebuild(self):
+        """Refresh the in-memory hash array from the entries"""
+        originals = [(path, entry) for path, entry in self.entries.items() if not entry.get('duplicate_of')]
+        self._paths = [path for path, _ in originals]
+        values = [int(entry['hash'], 16) for _, entry in originals]
+        self._hashes = np.array(values, dtype=np.uint64) if np is not None else values
+
+    def hash_image(self, img) -> int:
+        return phash(img) if self.method == 'phash' else dhash(img)
+
+    def hash_bytes(self, data: bytes) -> Optional[int]:
+        """Hash an image that is still in memory (e.g. a download before it is written)"""
+        if Image is None:
+            return None
+        with Image.open(io.BytesIO(data)) as img:
+            return self.hash_image(img)
+
+    def hash_file(self, path) -> Optional[int]:
+        if Image is None:
+            return None
+        with Image.open(path) as img:
+            return self.hash_image(img)
+
+    def find_similar(self, value: Optional[int]) -> Optional[str]:
+        """Path of an indexed image within max_distance of `value`, if any"""
+        if value is None:
+            return None
+        with self.lock:
+            if not len(self._paths):
+                return None
+            distances = hamming_distances(self._hashes, value)
+            if np is not None:
+                nearest = int(np.argmin(distances))
+            else:
+                nearest = min(range(len(distances)), key=distances.__getitem__)
+            if distances[nearest] <= self.max_distance:
+                return self._paths[nearest]
+        return None
+
+    def add(self, path, value: int, duplicate_of: Optional[str] = None):
+        """Record an image's hash (duplicates are remembered but never matched against)"""
+        path = str(path)
+        try:
+            stat = os.stat(path)
+            mtime, size = stat.st_mtime, stat.st_size
+        except OSError:
+            mtime, size = None, None
+
+        with self.lock:
+            self.entries[path] = {
+                'hash': f"{value:016x}",
+                'mtime': mtime,
+                'size': size,
+                'duplicate_of': duplicate_of
+            }
+            if not duplicate_of:
+                self._match_against(path, value)
+
+    def _match_against(self, path: str, value: int):
+        """Make an original matchable by find_similar"""
+        self._paths.append(path)
+        if np is not None:
+            self._hashes = np.append(self._hashes, np.uint64(value))
+        else:
+            self._hashes.append(value)
+
+    def _drop(self, keys: Iterable[str]):
+        """Forget entries; their duplicates are matched again, the first one left unmatched becomes the original"""
+        keys = set(keys)
+        for key in keys:
+            del self.entries[key]
+        self._rebuild()
+
+        orphans = sorted(key for key, entry in self.entries.items() if entry.get('duplicate_of') in keys)
+        for key in orphans:
+            entry = self.entries[key]
+            value = int(entry['hash'], 16)
+            entry['duplicate_of'] = self.find_similar(value)
+            if entry['duplicate_of']:
+                continue
+            self._match_against(key, value)
+            self.logger.info(f"{Path(key).name} is now the original of its near-duplicates")
+
+    def is_duplicate(self, path) -> bool:
+        entry = self.entries.get(str(path))
+        return bool(entry and entry.get('duplicate_of'))
+
+    def scan(self, folders: Iterable) -> List[Tuple[str, str]]:
+        """Hash new or changed images in `folders`; returns (duplicate, original) pairs found"""
+        if Image is None:
+            return []
+
+        folders = [Path(folder) for folder in folders]
+        found = []
+        seen = set()
+        for folder in folders:
+            if not folder.exists():
+                continue
+            for path in sorted(folder.iterdir()):
+                if not path.is_file() or path.suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                key = str(path)
+                seen.add(key)
+                stat = path.stat()
+                entry = self.entries.get(key)
+                if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                    continue
+
+                try:
+                    value = self.hash_file(path)
+                except Exception as e:
+                    self.logger.error(f"Cannot hash {path}: {e}")
+                    continue
+
+                with self.lock:
+                    if entry:
+                        # Changed file: drop the stale hash before matching
+                        self._drop([key])
+                    original = self.find_similar(value)
+                    self.add(path, value, duplicate_of=original)
+                if original:
+                    self.logger.info(f"{path.name} is a near-duplicate of {Path(original).name}")
+                    found.append((key, original))
+
+        # Forget files that were deleted
+        with self.lock:
+            stale = [key for key in self.entries if key not in seen and Path(key).parent in folders]
+            if stale:
+                self._drop(stale)
+
+        self.save()
+        return found
+
+
+def library_folders() -> List[Path]:
+    """content/ and content/images, from the current settings"""
+    from settings import get_settings
+    content_folder = Path(get_settings().content_folder)
+    return [content_folder, content_folder / 'images']
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    index = PerceptualIndex()
+    duplicates = index.scan(library_folders())
+    print(f"🔍 Indexed {len(index.entries)} images with {index.method}")
+    for duplicate, original in duplicates:
+        print(f"   ♻️  {duplicate} ~ {original}")
+    print(f"✅ {len(duplicates)} near-duplicates found")
@@ -0,0 +1,203 @@
+"""
+Durable Post Outbox
+Persists every intended post with an idempotency key before it is dispatched
+"""
+
+import os
+import json
+import uuid
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+PENDING = 'pending'
+DISPATCHING = 'dispatching'
+SENT = 'sent'
+FAILED = 'failed'
+UNKNOWN = 'unknown'    # Never confirmed either way; not resent, left for a human to check
+
+FINISHED = (SENT, FAILED, UNKNOWN)
+
+
+class PostOutbox:
+    """Queue of posts for one platform that survives retries, timeouts and restarts
+
+    A record is marked `dispatching` (and saved) before the API call. If the
+    process dies or the call times out, the record stays `dispatching` and the
+    next drain reconciles it against the platform before sending again.
+    """
+
+    def __init__(self, platform: str, data_dir='data', max_attempts: int = 5,
+                 keep_sent_days: int = 7, logger=None):
+        self.platform = platform
+        self.outbox_file = Path(data_dir) / f'{platform}_outbox.json'
+        self.max_attempts = max_attempts
+        self.keep_sent_days = keep_sent_days
+        self.logger = logger or logging.getLogger('PostOutbox')
+        self.records = {}
+
+        self.load()
+
+    def load(self):
+        """Load queued records from disk"""
+        try:
+            if self.outbox_file.exists():
+                with open(self.outbox_file, 'r') as f:
+                    self.records = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading {self.platform} outbox: {e}")
+
+    @staticmethod
+    def _last_update(record: Dict) -> str:
+        return record.get('sent_at') or record.get('dispatched_at') or record.get('created_at') or ''
+
+    def save(self):
+        """Write the outbox atomically, dropping sent, failed and unknown records older than keep_sent_days"""
+        cutoff = (datetime.now() - timedelta(days=self.keep_sent_days)).isoformat()
+        self.records = {
+            key: record for key, record in self.records.items()
+            if record['status'] not in FINISHED or self._last_update(record) >= cutoff
+        }
+
+        try:
+            self.outbox_file.parent.mkdir(exist_ok=True)
+            temp_file = self.outbox_file.with_suffix('.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump(self.records, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.outbox_file)
+        except Exception as e:
+            self.logger.error(f"Error saving {self.platform} outbox: {e}")
+
+    def enqueue(self, payload: Dict) -> Dict:
+        """Persist a new post and return its record"""
+        key = uuid.uuid4().hex
+        record = {
+            'key': key,
+            'platform': self.platform,
+            'payload': payload,
+            'status': PENDING,
+            'attempts': 0,
+            'created_at': datetime.now().isoformat(),
+            'dispatched_at': None,
+            'sent_at': None,
+            'remote_id': None,
+            'last_error': None
+        }
+        self.records[key] = record
+        self.save()
+        self.logger.info(f"Queued {self.platform} post {key}")
+        return record
+
+    def pending(self) -> List[Dict]:
+        """Unsent records, oldest first"""
+        queued = [r for r in self.records.values() if r['status'] in (PENDING, DISPATCHING)]
+        return sorted(queued, key=lambda r: r['created_at'])
+
+    def next_pending(self) -> Optional[Dict]:
+        """Oldest unsent record, if any"""
+        queued = self.pending()
+        return queued[0] if queued else None
+
+    def mark_dispatching(self, key: str):
+        record = self.records[key]
+        record['status'] = DISPATCHING
+        record['attempts'] += 1
+        record['dispatched_at'] = datetime.now().isoformat()
+        self.save()
+
+    def mark_sent(self, key: str, remote_id):
+        record = self.records[key]
+        record['status'] = SENT
+        record['remote_id'] = str(remote_id)
+        record['sent_at'] = datetime.now().isoformat()
+        record['last_error'] = None
+        self.save()
+        self.logger.info(f"{self.platform} post {key} sent as {remote_id}")
+
+    def mark_error(self, key: str, error, outcome_unknown: bool = True):
+        """Record a failed attempt
+
+        When the outcome is unknown (timeout, dropped connection) the record
+        stays `dispatching` so it is reconciled before any resend.
+        """
+        record = self.records[key]
+        record['last_error'] = str(error)
+
+        if record['attempts'] >= self.max_attempts:
+            record['status'] = FAILED
+            self.logger.error(f"{self.platform} post {key} failed after {record['attempts']} attempts: {error}")
+        elif not outcome_unknown:
+            record['status'] = PENDING
+
+        self.save()
+
+    def mark_reconcile_error(self, key: str, error):
+        """Count a failed reconcile as an attempt; give the record up as unknown after max_attempts"""
+        record = self.records[key]
+        record['attempts'] += 1
+        record['last_error'] = f"Reconcile failed: {error}"
+
+        if record['attempts'] >= self.max_attempts:
+            record['status'] = UNKNOWN
+            self.logger.error(
+                f"{self.platform} post {key} could not be reconciled after {record['attempts']} attempts "
+                f"and may or may not have been published; not resending: {error}"
+            )
+
+        self.save()
+
+    def drain(self, dispatch: Callable[[Dict], Optional[str]],
+              reconcile: Optional[Callable[[Dict], Optional[str]]] = None,
+              batch_size: int = 5, can_continue: Optional[Callable[[], bool]] = None,
+              delay: Optional[Callable[[], None]] = None) -> List[Dict]:
+        """Send up to `batch_size` queued posts, oldest first
+
+        `dispatch(record)` returns the remote id, or None if the platform
+        rejected the post. `reconcile(record)` looks for a record whose earlier
+        attempt may already have gone through; a reconcile that raises counts
+        as an attempt, so max_attempts also ends it. Exceptions from dispatch are
+        recorded and re-raised so the caller's error handling still applies.
+        `delay()` runs after each post is marked sent, so an interrupted pause
+        never leaves a published post `dispatching`. Returns the records sent
+        by this call.
+        """
+        sent = []
+
+        for record in self.pending()[:batch_size]:
+            if can_continue and not can_continue():
+                break
+
+            key = record['key']
+
+            if record['status'] == DISPATCHING and reconcile:
+                try:
+                    remote_id = reconcile(record)
+                except Exception as e:
+                    self.logger.error(f"Cannot reconcile {self.platform} post {key}, leaving it queued: {e}")
+                    self.mark_reconcile_error(key, e)
+                    continue
+                if remote_id:
+                    self.logger.info(f"{self.platform} post {key} was already published, not resending")
+                    self.mark_sent(key, remote_id)
+                    sent.append(record)
+                    continue
+
+            self.mark_dispatching(key)
+            try:
+                remote_id = dispatch(record)
+            except Exception as e:
+                self.mark_error(key, e)
+                raise
+
+            if remote_id:
+                self.mark_sent(key, remote_id)
+                sent.append(record)
+                if delay:
+                    delay()
+            else:
+                self.mark_error(key, "Platform returned no post id", outcome_unknown=False)
+
+        return sent
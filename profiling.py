@@ -0,0 +1,356 @@
+"""
+Profiling Mode
+Runs one job against mock platform clients, with sleeps virtualized, under cProfile and
+tracemalloc, and writes CPU and allocation reports to logs/profiles
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import pstats
+import shutil
+import cProfile
+import tempfile
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict
+from unittest import mock
+
+from bot_config import BotConfig
+
+PROFILE_TARGETS = ('unified', 'instagram', 'x', 'unified_bot')
+
+
+class VirtualClock:
+    """Replaces time.sleep: records the requested delay and returns at once"""
+
+    def __init__(self):
+        self.slept = 0.0
+        self.calls = 0
+
+    def sleep(self, seconds):
+        self.calls += 1
+        self.slept += max(0.0, seconds)
+
+
+class MockInstagramClient:
+    """Stands in for instagrapi.Client with canned responses and no network"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.user_id = None
+        self._next_pk = 3_000_000_000
+
+    def _media(self, pk, caption=''):
+        user = SimpleNamespace(pk=pk % 100_000 + 1, username=f"user{pk % 100_000}")
+        return SimpleNamespace(id=f"{pk}_{user.pk}", pk=pk, code=f"C{pk}", user=user,
+                               like_count=random.randint(0, 500), caption_text=caption)
+
+    def login(self, username, password):
+        self.calls['login'] += 1
+        self.user_id = 1
+        return True
+
+    def logout(self):
+        self.user_id = None
+        return True
+
+    def load_settings(self, path):
+        return {}
+
+    def dump_settings(self, path):
+        return True
+
+    def set_settings(self, settings):
+        return True
+
+    def account_info(self):
+        self.calls['account_info'] += 1
+        return SimpleNamespace(username='profile')
+
+    def photo_upload(self, path, caption):
+        self.calls['photo_upload'] += 1
+        self._next_pk += 1
+        return self._media(self._next_pk, caption)
+
+    def video_upload(self, path, caption, thumbnail=None):
+        self.calls['video_upload'] += 1
+        self._next_pk += 1
+        return self._media(self._next_pk, caption)
+
+    def user_medias(self, user_id, amount=20):
+        self.calls['user_medias'] += 1
+        return []
+
+    def hashtag_medias_v1_chunk(self, name, max_amount=27, tab_key='', max_id=None):
+        """Newest-first page of fresh media, as the 'recent' tab returns"""
+        self.calls['hashtag_medias_v1_chunk'] += 1
+        self._next_pk += max_amount
+        medias = [self._media(self._next_pk - i) for i in range(max_amount)]
+        return medias, f"{name}_{self._next_pk}"
+
+    def media_like(self, media_id):
+        self.calls['media_like'] += 1
+        return True
+
+    def media_comment(self, media_id, text):
+        self.calls['media_comment'] += 1
+        return SimpleNamespace(pk=random.randint(1, 10 ** 9), text=text)
+
+    def user_follow(self, user_id):
+        self.calls['user_follow'] += 1
+        return True
+
+
+class MockXClient:
+    """Stands in for tweepy.Client with canned responses and no network"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self._next_id = 1_800_000_000_000_000_000
+
+    def get_me(self, **kwargs):
+        self.calls['get_me'] += 1
+        return SimpleNamespace(data=SimpleNamespace(id='1', username='profile'))
+
+    def get_users_tweets(self, user_id, **kwargs):
+        self.calls['get_users_tweets'] += 1
+        return SimpleNamespace(data=[])
+
+    def create_tweet(self, text=None, media_ids=None, **kwargs):
+        self.calls['create_tweet'] += 1
+        self._next_id += 1
+        return SimpleNamespace(data={'id': str(self._next_id), 'text': text})
+
+    def search_recent_tweets(self, query, max_results=10, **kwargs):
+        self.calls['search_recent_tweets'] += 1
+        posts = []
+        users = []
+        for _ in range(max_results):
+            self._next_id += 1
+            author = str(random.randint(1, 10 ** 6))
+            posts.append(SimpleNamespace(
+                id=self._next_id, author_id=author,
+                public_metrics={'like_count': random.randint(0, 300), 'retweet_count': random.randint(0, 60)}
+            ))
+            users.append(SimpleNamespace(
+                id=author, username=f"user{author}",
+                public_metrics={'followers_count': random.randint(10, 20000), 'following_count': random.randint(10, 5000)}
+            ))
+        meta = {'newest_id': str(self._next_id), 'result_count': len(posts)}
+        return SimpleNamespace(data=posts, includes={'users': users}, meta=meta)
+
+    def like(self, tweet_id, **kwargs):
+        self.calls['like'] += 1
+        return SimpleNamespace(data={'liked': True})
+
+    def retweet(self, tweet_id, **kwargs):
+        self.calls['retweet'] += 1
+        return SimpleNamespace(data={'retweeted': True})
+
+    def follow_user(self, user_id, **kwargs):
+        self.calls['follow_user'] += 1
+        return SimpleNamespace(data={'following': True})
+
+
+class MockXApi:
+    """Stands in for the tweepy v1.1 API used for media uploads"""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def media_upload(self, filename, **kwargs):
+        self.calls['media_upload'] += 1
+        return SimpleNamespace(media_id=random.randint(10 ** 17, 10 ** 18))
+
+
+class MockUnsplash:
+    """Answers Unsplash batch and image requests from distinct pre-rendered JPEGs"""
+
+    def __init__(self, images: int):
+        from PIL import Image
+
+        # Rendered before profiling starts, so image generation is not in the profile
+        self.images = []
+        rng = random.Random(42)
+        for _ in range(images):
+            img = Image.frombytes('RGB', (64, 64), bytes(rng.getrandbits(8) for _ in range(64 * 64 * 3)))
+            buffer = io.BytesIO()
+            img.resize((640, 640)).save(buffer, 'JPEG', quality=85)
+            self.images.append(buffer.getvalue())
+        self.served = 0
+        self.calls = Counter()
+
+    def get(self, url, params=None, headers=None, timeout=None, **kwargs):
+        if url.startswith('https://api.unsplash.com/'):
+            self.calls['photos_random'] += 1
+            count = int((params or {}).get('count', 1))
+            photos = [{
+                'id': f"mock{self.served + i}",
+                'urls': {'regular': f"https://images.mock/{self.served + i}.jpg"},
+                'description': (params or {}).get('query'),
+                'tags': [], 'width': 640, 'height': 640,
+                'user': {'name': 'Mock Photographer', 'links': {'html': 'https://unsplash.com'}},
+                'links': {'html': 'https://unsplash.com'}
+            } for i in range(count)]
+            self.served += count
+            return SimpleNamespace(status_code=200, headers={'X-Ratelimit-Remaining': '50'}, text='', json=lambda: photos)
+
+        self.calls['image_download'] += 1
+        index = int(url.rsplit('/', 1)[1].split('.')[0]) % len(self.images)
+        return SimpleNamespace(status_code=200, content=self.images[index], raise_for_status=lambda: None)
+
+
+def _mock_instagram(bot):
+    bot.client = MockInstagramClient()
+    bot.username = bot.password = 'profile'
+
+
+def _mock_x(bot):
+    bot.client = MockXClient()
+    bot.api = MockXApi()
+    bot.enabled = True
+
+
+def build_job(target: str):
+    """Create the bot(s) for `target` with mock clients; returns (job, [mocks])"""
+    if target == 'instagram':
+        from instagram_bot import InstagramBot
+        bot = InstagramBot()
+        _mock_instagram(bot)
+        return bot.run_daily_activities, [bot.client]
+
+    if target == 'x':
+        from x_bot import XBot
+        bot = XBot()
+        _mock_x(bot)
+        return bot.run_daily_activities, [bot.client, bot.api]
+
+    if target == 'unified':
+        from social_media_bot import SocialMediaBot
+        bot = SocialMediaBot()
+        mocks = []
+        if bot.instagram_bot:
+            _mock_instagram(bot.instagram_bot)
+            mocks.append(bot.instagram_bot.client)
+        if bot.x_bot:
+            _mock_x(bot.x_bot)
+            mocks.extend([bot.x_bot.client, bot.x_bot.api])
+        return bot.run_daily_activities, mocks
+
+    if target == 'unified_bot':
+        from unified_bot import UnifiedSocialMediaBot
+        bot = UnifiedSocialMediaBot()
+        mocks = []
+        if bot.instagram_bot:
+            _mock_instagram(bot.instagram_bot)
+            mocks.append(bot.instagram_bot.client)
+        return bot.run_all_activities, mocks
+
+    raise ValueError(f"Unknown profile target '{target}', expected one of: {', '.join(PROFILE_TARGETS)}")
+
+
+def _allocation_report(snapshot, limit: int) -> str:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+    lines = [f"Top {limit} allocation sites (still allocated at the end of the run)", ""]
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+
+    lines += ["", "Largest allocation call stacks", ""]
+    for stat in snapshot.statistics('traceback')[:5]:
+        lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines.extend(f"    {line}" for line in stat.traceback.format(limit=8))
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def profile_job(target: str, output_folder=None) -> Dict[str, Path]:
+    """Profile one `target` run in a throwaway working directory; returns the report paths
+
+    The sandbox keeps mock likes, posts and counters out of the real data/ files.
+    """
+    output = Path(output_folder or BotConfig.PROFILING['folder']).resolve()
+    output.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    base = output / f"{target}_{stamp}"
+
+    clock = VirtualClock()
+    unsplash = MockUnsplash(BotConfig.PROFILING['unsplash_images'])
+    sandbox = tempfile.mkdtemp(prefix='bot_profile_')
+    cwd = os.getcwd()
+    os.chdir(sandbox)
+    try:
+        # Some bots log to logs/ without creating it
+        Path('logs').mkdir()
+        with mock.patch('time.sleep', clock.sleep), mock.patch('unsplash_pool.requests.get', unsplash.get):
+            job, mocks = build_job(target)
+
+            profiler = cProfile.Profile()
+            tracemalloc.start(BotConfig.PROFILING['traceback_frames'])
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                job()
+            finally:
+                profiler.disable()
+                wall = time.perf_counter() - started
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+    calls = Counter()
+    for client in mocks + [unsplash]:
+        calls.update(client.calls)
+
+    header = [
+        f"Profile of '{target}' run at {stamp}",
+        f"Wall time: {wall:.3f}s (virtual sleep skipped: {clock.slept:.0f}s over {clock.calls} sleeps)",
+        f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB",
+        f"Mock platform calls: {dict(sorted(calls.items()))}",
+        ""
+    ]
+
+    profiler.dump_stats(f"{base}.prof")
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream).strip_dirs()
+    stats.sort_stats('cumulative').print_stats(BotConfig.PROFILING['top_functions'])
+    stats.sort_stats('tottime').print_stats(BotConfig.PROFILING['top_functions'])
+
+    reports = {
+        'cpu': Path(f"{base}_cpu.txt"),
+        'allocations': Path(f"{base}_alloc.txt"),
+        'pstats': Path(f"{base}.prof")
+    }
+    reports['cpu'].write_text('\n'.join(header) + stream.getvalue())
+    reports['allocations'].write_text('\n'.join(header) + _allocation_report(snapshot, BotConfig.PROFILING['top_allocations']))
+
+    print(f"⏱️  {target}: {wall:.3f}s wall, {clock.slept:.0f}s of sleep virtualized, peak {peak / 1024 / 1024:.1f} MiB")
+    for kind, path in reports.items():
+        print(f"   📄 {kind}: {path}")
+    return reports
+
+
+def profile_from_argv(default_target: str, argv=None) -> bool:
+    """Handle `--profile [target]` for a module's __main__; True if a profile was run"""
+    argv = sys.argv[1:] if argv is None else argv
+    if '--profile' not in argv:
+        return False
+    position = argv.index('--profile')
+    target = argv[position + 1] if len(argv) > position + 1 and not argv[position + 1].startswith('-') else default_target
+    print(f"🔬 Profiling one '{target}' run against mock clients...")
+    profile_job(target)
+    return True
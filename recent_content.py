@@ -0,0 +1,64 @@
+"""
+Recent Content Guard
+Ring buffer of hashes of recently posted text, so no status is ever repeated
+"""
+
+import re
+import hashlib
+import unicodedata
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+HASHTAG = re.compile(r'#\w+')
+
+
+def normalize(text: str) -> str:
+    """Text as a duplicate-status check sees it: case, spacing and hashtags ignored"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    text = HASHTAG.sub('', text)
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=4096)
+def digest(text: str) -> str:
+    """Short hash of the normalized text (cached: templates are checked over and over)"""
+    return hashlib.blake2b(normalize(text).encode('utf-8'), digest_size=12).hexdigest()
+
+
+class RecentContent:
+    """Bounded, persisted set of recently posted texts with O(1) lookups
+
+    `entries` is a plain list of [digest, iso_time] pairs so it can live in an
+    existing JSON state file; it is updated in place.
+    """
+
+    def __init__(self, entries: List, size: int, window_days: int):
+        self.entries = entries
+        self.size = size
+        self.window = timedelta(days=window_days)
+        self._index = {}
+        for key, posted_at in entries:
+            self._index[key] = posted_at
+        self._trim()
+
+    def _trim(self):
+        while len(self.entries) > self.size:
+            key, posted_at = self.entries.pop(0)
+            if self._index.get(key) == posted_at:
+                del self._index[key]
+
+    def seen(self, text: str, now: Optional[datetime] = None) -> bool:
+        """True if the same text was posted inside the window"""
+        posted_at = self._index.get(digest(text))
+        if posted_at is None:
+            return False
+        return (now or datetime.now()) - datetime.fromisoformat(posted_at) < self.window
+
+    def add(self, text: str, now: Optional[datetime] = None):
+        """Remember a posted (or about-to-be-posted) text"""
+        key = digest(text)
+        posted_at = (now or datetime.now()).isoformat()
+        self._index[key] = posted_at
+        self.entries.append([key, posted_at])
+        self._trim()
@@ -0,0 +1,102 @@
+"""
+Candidate Scoring
+Ranks a fetched batch of posts or users so rate-limited actions go to the best targets
+"""
+
+import math
+from typing import Callable, List, Sequence
+
+from bot_config import BotConfig
+
+try:
+    import numpy as np
+except ImportError:
+    print("⚠️  numpy not installed, scoring falls back to pure Python. Run: pip install -r requirements.txt")
+    np = None
+
+
+def _column(records: Sequence, field: str):
+    """One numeric field of every record as a float array"""
+    return np.fromiter((getattr(r, field) for r in records), dtype=float, count=len(records))
+
+
+def repost_scores(posts: Sequence, config=None):
+    """Weighted engagement score per post; -inf for posts below the minimum engagement"""
+    config = config or BotConfig.SCORING['repost']
+    weights = config['weights']
+
+    if np is None:
+        return [
+            weights['like_count'] * math.log1p(p.like_count) + weights['retweet_count'] * math.log1p(p.retweet_count)
+            if p.like_count > config['min_like_count'] or p.retweet_count > config['min_retweet_count']
+            else -math.inf
+            for p in posts
+        ]
+
+    likes = _column(posts, 'like_count')
+    retweets = _column(posts, 'retweet_count')
+    scores = weights['like_count'] * np.log1p(likes) + weights['retweet_count'] * np.log1p(retweets)
+    eligible = (likes > config['min_like_count']) | (retweets > config['min_retweet_count'])
+    return np.where(eligible, scores, -np.inf)
+
+
+def follow_scores(users: Sequence, config=None):
+    """Weighted audience/follow-back score per user; -inf outside the follower window"""
+    config = config or BotConfig.SCORING['follow']
+    weights = config['weights']
+
+    if np is None:
+        scores = []
+        for u in users:
+            followers, following = u.followers_count, u.following_count
+            if (config['min_followers'] <= followers <= config['max_followers']
+                    and following < followers * config['max_following_ratio']):
+                scores.append(weights['followers_count'] * math.log1p(followers)
+                              + weights['follow_ratio'] * following / max(followers, 1))
+            else:
+                scores.append(-math.inf)
+        return scores
+
+    followers = _column(users, 'followers_count')
+    following = _column(users, 'following_count')
+    ratio = following / np.maximum(followers, 1)
+    scores = weights['followers_count'] * np.log1p(followers) + weights['follow_ratio'] * ratio
+    eligible = ((followers >= config['min_followers']) & (followers <= config['max_followers'])
+                & (following < followers * config['max_following_ratio']))
+    return np.where(eligible, scores, -np.inf)
+
+
+def top_k(records: Sequence, scores, k: int) -> List:
+    """The k highest-scoring eligible records, best first"""
+    if k <= 0 or not len(records):
+        return []
+
+    if np is None:
+        ranked = sorted(range(len(records)), key=lambda i: scores[i], reverse=True)
+        return [records[i] for i in ranked[:k] if scores[i] != -math.inf]
+
+    scores = np.asarray(scores)
+    if k < len(records):
+        picked = np.argpartition(-scores, k - 1)[:k]
+    else:
+        picked = np.arange(len(records))
+    picked = picked[np.argsort(-scores[picked], kind='stable')]
+    return [records[i] for i in picked if np.isfinite(scores[i])]
+
+
+def best(scorer: Callable, k: Callable[[], int], stats=None) -> Callable[[List], List]:
+    """Batch predicate keeping the top k() candidates by `scorer`, best first
+
+    Only ineligible candidates count as filtered in `stats`; eligible ones
+    that miss the cut are simply not needed this run.
+    """
+    def predicate(batch):
+        scores = scorer(batch)
+        if stats is not None:
+            if np is None:
+                stats.filtered += sum(1 for s in scores if s == -math.inf)
+            else:
+                stats.filtered += int(np.count_nonzero(np.isneginf(scores)))
+        return top_k(batch, scores, k())
+
+    return predicate
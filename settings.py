@@ -0,0 +1,244 @@
+"""
+Bot Settings
+Typed configuration parsed once from .env, shared by reference and hot-reloaded
+"""
+
+import os
+import logging
+import threading
+import weakref
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from dotenv import dotenv_values
+
+from bot_config import BotConfig
+
+ENV_FILE = Path('.env')
+
+logger = logging.getLogger('Settings')
+
+
+@dataclass
+class BotSettings:
+    """Validated bot settings; each field maps to the upper-cased env variable"""
+
+    # Credentials (kept out of repr so they never end up in logs)
+    instagram_username: Optional[str] = field(default=None, repr=False)
+    instagram_password: Optional[str] = field(default=None, repr=False)
+    unsplash_access_key: Optional[str] = field(default=None, repr=False)
+
+    # Platform settings
+    enable_instagram: bool = True
+    enable_x: bool = True
+    enable_cross_posting: bool = True
+    enable_posting: bool = True
+    enable_engagement: bool = True
+    dry_run: bool = False
+
+    # Rate limits (defaults come from BotConfig.RATE_LIMITS)
+    max_likes_per_hour: int = BotConfig.RATE_LIMITS['likes_per_hour']
+    max_comments_per_hour: int = BotConfig.RATE_LIMITS['comments_per_hour']
+    max_follows_per_hour: int = BotConfig.RATE_LIMITS['follows_per_hour']
+    max_posts_per_day: int = 10
+    max_tweets_per_day: int = 10
+    max_retweets_per_hour: int = 20
+    post_interval_hours: int = 24
+
+    # Content settings
+    content_folder: str = 'content'
+    hashtags: str = '#yesplease #socialmedia'
+    x_hashtags: str = '#YesPlease #SocialMedia #Content #X'
+
+    # Safety settings (defaults come from BotConfig.DELAYS)
+    enable_safety_delays: bool = True
+    min_action_delay: int = BotConfig.DELAYS['min_action_delay']
+    max_action_delay: int = BotConfig.DELAYS['max_action_delay']
+
+    # Diagnostics: '' (off), 'jsonl' or 'chrome' run traces in logs/traces
+    trace_format: str = ''
+
+    @classmethod
+    def env_name(cls, name: str) -> str:
+        """Environment variable that feeds a field"""
+        return name.upper()
+
+    @classmethod
+    def from_mapping(cls, values: Dict[str, Optional[str]]) -> 'BotSettings':
+        """Parse and validate settings from raw string values"""
+        parsed = {}
+        problems = []
+
+        for f in fields(cls):
+            raw = values.get(cls.env_name(f.name))
+            if raw is None or raw == '':
+                continue
+
+            raw = raw.strip()
+            try:
+                if f.type is bool:
+                    if raw.lower() not in ('true', 'false', '1', '0', 'yes', 'no'):
+                        raise ValueError(f"expected true/false, got '{raw}'")
+                    parsed[f.name] = raw.lower() in ('true', '1', 'yes')
+                elif f.type is int:
+                    parsed[f.name] = int(raw)
+                else:
+                    parsed[f.name] = raw
+            except ValueError as e:
+                problems.append(f"{cls.env_name(f.name)}: {e}")
+
+        settings = cls(**parsed)
+        problems.extend(settings.validate())
+
+        if problems:
+            raise ValueError("Invalid configuration: " + "; ".join(problems))
+
+        return settings
+
+    def validate(self) -> List[str]:
+        """Return a list of problems with the current values"""
+        problems = []
+
+        for f in fields(self):
+            if f.type is int and getattr(self, f.name) < 0:
+                problems.append(f"{self.env_name(f.name)} must not be negative")
+
+        if self.min_action_delay > self.max_action_delay:
+            problems.append("MIN_ACTION_DELAY must not exceed MAX_ACTION_DELAY")
+
+        if self.post_interval_hours == 0:
+            problems.append("POST_INTERVAL_HOURS must be at least 1")
+
+        if self.trace_format not in ('', 'jsonl', 'chrome'):
+            problems.append("TRACE_FORMAT must be jsonl, chrome or empty")
+
+        return problems
+
+    def diff(self, other: 'BotSettings') -> List[str]:
+        """Names of fields whose values differ from `other`"""
+        return [f.name for f in fields(self) if getattr(self, f.name) != getattr(other, f.name)]
+
+
+def read_environment(env_file: Path = ENV_FILE) -> Dict[str, Optional[str]]:
+    """Merge .env values with the process environment (process wins, as with load_dotenv)"""
+    values = dict(dotenv_values(env_file)) if env_file.exists() else {}
+
+    for f in fields(BotSettings):
+        name = BotSettings.env_name(f.name)
+        if name in os.environ:
+            values[name] = os.environ[name]
+
+    return values
+
+
+_settings: Optional[BotSettings] = None
+_subscribers = []
+_lock = threading.RLock()
+
+
+def get_settings() -> BotSettings:
+    """Return the shared settings object, parsing .env on first use"""
+    global _settings
+
+    with _lock:
+        if _settings is None:
+            _settings = BotSettings.from_mapping(read_environment())
+            logger.info(f"Settings loaded: {_settings}")
+        return _settings
+
+
+def subscribe(callback: Callable[[BotSettings, List[str]], None]):
+    """Call `callback(settings, changed)` after every reload that changes something
+
+    Bound methods are held weakly so subscribing never keeps a bot alive.
+    """
+    if hasattr(callback, '__self__'):
+        ref = weakref.WeakMethod(callback)
+    else:
+        ref = lambda: callback
+
+    with _lock:
+        _subscribers.append(ref)
+
+
+def reload_settings() -> List[str]:
+    """Re-read .env and update the shared settings object in place
+
+    Invalid configuration is logged and the previous values are kept.
+    Returns the names of the fields that changed.
+    """
+    settings = get_settings()
+
+    try:
+        fresh = BotSettings.from_mapping(read_environment())
+    except ValueError as e:
+        logger.error(f"Settings reload rejected, keeping previous values: {e}")
+        return []
+
+    with _lock:
+        changed = settings.diff(fresh)
+        for name in changed:
+            setattr(settings, name, getattr(fresh, name))
+
+        live = []
+        callbacks = []
+        for ref in _subscribers:
+            callback = ref()
+            if callback is not None:
+                live.append(ref)
+                callbacks.append(callback)
+        _subscribers[:] = live
+
+    if not changed:
+        logger.info("Settings reloaded, no changes")
+        return changed
+
+    logger.info(f"Settings reloaded, changed: {', '.join(changed)}")
+    for callback in callbacks:
+        try:
+            callback(settings, changed)
+        except Exception as e:
+            logger.error(f"Error notifying settings subscriber {callback}: {e}")
+
+    return changed
+
+
+class SettingsWatcher:
+    """Background thread that reloads settings when the .env file changes"""
+
+    def __init__(self, env_file: Path = ENV_FILE, poll_interval: float = 5.0):
+        self.env_file = Path(env_file)
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_mtime = self._mtime()
+
+    def _mtime(self):
+        try:
+            return self.env_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='SettingsWatcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.env_file} for configuration changes")
+
+    def stop(self):
+        """Stop the watcher thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            mtime = self._mtime()
+            if mtime != self._last_mtime:
+                self._last_mtime = mtime
+                logger.info(f"{self.env_file} changed, reloading settings")
+                reload_settings()
@@ -1,14 +1,21 @@
 import os
-import time
 import random
+import threading
 import schedule
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-from dotenv import load_dotenv
 from pathlib import Path
 import json
 
+from graceful_shutdown import GracefulShutdown
+from control_socket import ControlServer
+from tracing import traced
+from warmup import WarmUp
+from media_pipeline import build_derivatives
+from settings import SettingsWatcher, get_settings, reload_settings, subscribe
+from timeouts import sleep
+
 # Import individual bots
 try:
     from instagram_bot import InstagramBot
@@ -28,9 +35,10 @@ class SocialMediaBot:
     """Unified social media bot for Instagram and X"""
     
     def __init__(self):
-        load_dotenv()
         self.setup_logging()
+        self.settings = get_settings()
         self.load_configuration()
+        subscribe(self.on_settings_changed)
 
         # Activity tracking (must be before initialize_bots)
         self.activity_tracker = {
@@ -62,21 +70,57 @@ class SocialMediaBot:
         self.logger = logging.getLogger('SocialMediaBot')
         
     def load_configuration(self):
-        """Load configuration for both platforms"""
+        """Load configuration for both platforms from the shared settings"""
+        settings = self.settings
+        
         # Platform settings
-        self.instagram_enabled = os.getenv('ENABLE_INSTAGRAM', 'true').lower() == 'true'
-        self.x_enabled = os.getenv('ENABLE_X', 'true').lower() == 'true'
+        self.instagram_enabled = settings.enable_instagram
+        self.x_enabled = settings.enable_x
         
         # Content settings
-        self.content_folder = Path(os.getenv('CONTENT_FOLDER', 'content'))
-        self.post_interval_hours = int(os.getenv('POST_INTERVAL_HOURS', 24))
+        self.content_folder = Path(settings.content_folder)
+        self.post_interval_hours = settings.post_interval_hours
         
         # Safety settings
-        self.max_daily_posts = int(os.getenv('MAX_POSTS_PER_DAY', 10))
-        self.enable_cross_posting = os.getenv('ENABLE_CROSS_POSTING', 'true').lower() == 'true'
+        self.max_daily_posts = settings.max_posts_per_day
+        self.enable_cross_posting = settings.enable_cross_posting
         
         self.logger.info(f"Social Media Bot configured - Instagram: {self.instagram_enabled}, X: {self.x_enabled}")
         
+    def on_settings_changed(self, settings, changed):
+        """Apply reloaded settings; scheduled jobs read the platform flags on each run"""
+        self.load_configuration()
+            
+    @traced()
+    def flush_state(self):
+        """Persist activity state for this bot and the platform bots"""
+        self.save_activity_data()
+        
+        if self.instagram_bot:
+            self.instagram_bot.save_activity_log()
+            self.instagram_bot.engagement_index.save()
+        if self.x_bot:
+            self.x_bot.save_activity_data()
+            self.x_bot.engagement_index.save()
+            
+    def warm_up_tasks(self) -> Dict:
+        """Warm-up tasks of every enabled platform bot"""
+        tasks = {}
+        if self.instagram_bot:
+            tasks.update(self.instagram_bot.warm_up_tasks())
+        if self.x_bot:
+            tasks.update(self.x_bot.warm_up_tasks())
+        return tasks
+        
+    def test_connections(self) -> Dict:
+        """Connection check per enabled platform, reusing the live sessions"""
+        results = {}
+        if self.instagram_bot:
+            results['instagram'] = self.instagram_bot.test_connection()
+        if self.x_bot:
+            results['x'] = self.x_bot.test_connection()
+        return results
+        
     def initialize_bots(self):
         """Initialize individual platform bots"""
         if self.instagram_enabled and INSTAGRAM_AVAILABLE:
@@ -165,6 +209,23 @@ class SocialMediaBot:
         # Return random content file
         return random.choice(content_files)
         
+    def prepare_renditions(self) -> threading.Thread:
+        """Render every platform rendition of the content library in the background
+
+        Runs across a process pool so scheduled posts find their images already
+        encoded in the media cache instead of resizing at post time.
+        """
+        def build():
+            try:
+                build_derivatives(self.content_folder, logger=self.logger)
+            except Exception as e:
+                self.logger.error(f"Error preparing renditions: {e}")
+                
+        thread = threading.Thread(target=build, name='RenditionBuilder', daemon=True)
+        thread.start()
+        return thread
+        
+    @traced()
     def post_to_instagram(self) -> bool:
         """Post content to Instagram"""
         if not self.instagram_bot:
@@ -187,6 +248,7 @@ class SocialMediaBot:
             self.logger.error(f"Error posting to Instagram: {e}")
             return False
             
+    @traced()
     def post_to_x(self) -> bool:
         """Post content to X"""
         if not self.x_bot:
@@ -207,6 +269,7 @@ class SocialMediaBot:
             self.logger.error(f"Error posting to X: {e}")
             return False
             
+    @traced()
     def cross_post_content(self) -> Dict[str, bool]:
         """Post content to all enabled platforms"""
         results = {}
@@ -236,7 +299,7 @@ class SocialMediaBot:
                 if len(platforms_to_post) > 1:
                     delay = random.randint(60, 180)  # 1-3 minutes between platforms
                     self.logger.info(f"Cross-posting delay: {delay} seconds")
-                    time.sleep(delay)
+                    sleep(delay)
                     
             except Exception as e:
                 self.logger.error(f"Error posting to {platform}: {e}")
@@ -244,11 +307,16 @@ class SocialMediaBot:
                 
         return results
         
+    @traced(root=True)
     def run_instagram_engagement(self):
         """Run Instagram engagement activities"""
         if not self.instagram_bot:
             return
             
+        if self.instagram_bot.breaker.blocked():
+            self.logger.info("Instagram circuit open, skipping Instagram engagement")
+            return
+            
         try:
             self.logger.info("Running Instagram engagement activities")
             
@@ -266,11 +334,16 @@ class SocialMediaBot:
         except Exception as e:
             self.logger.error(f"Error in Instagram engagement: {e}")
             
+    @traced(root=True)
     def run_x_engagement(self):
         """Run X engagement activities"""
         if not self.x_bot:
             return
             
+        if self.x_bot.breaker.blocked():
+            self.logger.info("X circuit open, skipping X engagement")
+            return
+            
         try:
             self.logger.info("Running X engagement activities")
             
@@ -288,6 +361,7 @@ class SocialMediaBot:
         except Exception as e:
             self.logger.error(f"Error in X engagement: {e}")
             
+    @traced(root=True)
     def run_daily_activities(self):
         """Run all daily social media activities"""
         self.reset_daily_counters()
@@ -307,7 +381,7 @@ class SocialMediaBot:
                     self.post_to_x()
                     
             # Add delay before engagement activities
-            time.sleep(random.randint(300, 600))  # 5-10 minutes
+            sleep(random.randint(300, 600))  # 5-10 minutes
             
             # Run engagement activities
             self.run_instagram_engagement()
@@ -357,16 +431,56 @@ class SocialMediaBot:
         schedule.every().day.at("17:00").do(self.run_daily_activities)
         schedule.every().day.at("20:00").do(self.run_daily_activities)
         
-        # Schedule engagement-only activities
-        schedule.every().day.at("11:00").do(self.run_instagram_engagement)
-        schedule.every().day.at("15:00").do(self.run_x_engagement)
-        schedule.every().day.at("19:00").do(self.run_instagram_engagement)
+        # Schedule engagement-only activities; an open platform circuit defers
+        # that platform's job without holding up the other one
+        instagram_engagement = self.run_instagram_engagement
+        if self.instagram_bot:
+            instagram_engagement = self.instagram_bot.breaker.guard(instagram_engagement)
+        x_engagement = self.run_x_engagement
+        if self.x_bot:
+            x_engagement = self.x_bot.breaker.guard(x_engagement)
+            
+        schedule.every().day.at("11:00").do(instagram_engagement)
+        schedule.every().day.at("15:00").do(x_engagement)
+        schedule.every().day.at("19:00").do(instagram_engagement)
+        
+        # Encode image renditions off the scheduling path
+        self.prepare_renditions()
+        
+        # Stop on SIGTERM/SIGINT after the running job, reload on SIGHUP
+        self.shutdown = GracefulShutdown(self.logger)
+        self.shutdown.register_flush(self.flush_state)
+        self.shutdown.register_reload(reload_settings)
         
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        # Restore sessions and fill caches for both platforms before the first job is due
+        warm_up = WarmUp(self.logger)
+        warm_up.run(self.warm_up_tasks())
+        warm_up.print_summary()
+        
+        # Answer bot_manager from this process's warm state
+        control = ControlServer(self.shutdown, logger=self.logger)
+        control.register('summary', self.get_unified_summary)
+        control.register('test_connection', self.test_connections, on_scheduler=True)
+        control.add_job('daily', self.run_daily_activities)
+        control.add_job('instagram_engagement', instagram_engagement)
+        control.add_job('x_engagement', x_engagement)
+        control.start()
+        
+        # Pick up .env edits without a restart
+        watcher = SettingsWatcher()
+        watcher.start()
+        try:
+            self.shutdown.run_scheduler(check_interval=60)  # Check every minute
+        finally:
+            watcher.stop()
+            control.stop()
 
 if __name__ == "__main__":
+    # --profile: one run against mock clients instead of the scheduler
+    from profiling import profile_from_argv
+    if profile_from_argv('unified'):
+        raise SystemExit(0)
+        
     try:
         bot = SocialMediaBot()
         print("🚀 Unified Social Media Bot initialized!")
@@ -378,8 +492,9 @@ if __name__ == "__main__":
         print(f"X enabled: {summary['x_enabled']}")
         print(f"Cross-posting enabled: {summary['cross_posting_enabled']}")
         
-        # Start scheduler
+        # Start scheduler (returns after SIGTERM/SIGINT once state is flushed)
         bot.start_scheduler()
+        print("\n⏹️  Bot stopped, activity saved")
         
     except KeyboardInterrupt:
         print("\n⏹️  Bot stopped by user")
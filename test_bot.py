@@ -6,7 +6,11 @@ Quick test to verify all components are working
 
 import sys
 import os
+import tempfile
+from datetime import datetime, timedelta
 from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
 def test_imports():
     """Test that all required imports work"""
@@ -152,6 +156,195 @@ def test_bot_initialization():
     
     return True
 
+def test_engagement_index():
+    """Test Bloom filter membership and the new generation started when it is full"""
+    print("\n🔁 Testing engagement index...")
+    
+    try:
+        from engagement_index import BloomFilter, EngagementIndex
+        
+        bloom = BloomFilter(1000)
+        keys = [f"like:{i}" for i in range(500)]
+        for key in keys:
+            bloom.add(key)
+        if not all(key in bloom for key in keys):
+            print("❌ Bloom filter lost an added key")
+            return False
+        others = [f"like:{i}" for i in range(500, 1500)]
+        false_positives = sum(key in bloom for key in others)
+        if false_positives > 10:
+            print(f"❌ Bloom filter false positives too high: {false_positives}/1000")
+            return False
+        if bloom.contains_many(keys + others) != [key in bloom for key in keys + others]:
+            print("❌ Batch lookup disagrees with single lookups")
+            return False
+        print(f"✅ Bloom filter membership OK ({false_positives} false positives in 1000)")
+        
+        with tempfile.TemporaryDirectory() as data_dir:
+            index = EngagementIndex('test', data_dir=data_dir, capacity=100, recent_size=3)
+            for i in range(100):
+                index.add('like', i)
+            if not all(index.seen('like', i) for i in range(100)) or index.seen('follow', 0):
+                print("❌ Engagement index membership wrong")
+                return False
+            
+            # The 101st target starts a new generation; only the recent set survives it
+            index.add('like', 100)
+            survivors = [i for i in range(101) if index.seen('like', i)]
+            if survivors != [98, 99, 100]:
+                print(f"❌ Expected targets 98-100 to survive the reset, got {survivors}")
+                return False
+            
+            index.save()
+            reloaded = EngagementIndex('test', data_dir=data_dir, capacity=100, recent_size=3)
+            if reloaded.seen_many('like', [97, 98, 100]) != [False, True, True]:
+                print("❌ Saved engagement index did not reload")
+                return False
+        print("✅ Engagement index reset and reload OK")
+        
+    except Exception as e:
+        print(f"❌ Engagement index test failed: {e}")
+        return False
+    
+    return True
+
+def test_candidate_scoring():
+    """Test that top-k never picks candidates outside the scoring limits"""
+    print("\n🏅 Testing candidate scoring...")
+    
+    try:
+        from scoring import follow_scores, repost_scores, top_k
+        
+        posts = [
+            SimpleNamespace(id='quiet', like_count=1, retweet_count=0),
+            SimpleNamespace(id='liked', like_count=50, retweet_count=0),
+            SimpleNamespace(id='shared', like_count=0, retweet_count=20),
+            SimpleNamespace(id='viral', like_count=500, retweet_count=100),
+        ]
+        picked = [p.id for p in top_k(posts, repost_scores(posts), 10)]
+        if picked != ['viral', 'shared', 'liked']:
+            print(f"❌ Repost ranking wrong: {picked}")
+            return False
+        picked = [p.id for p in top_k(posts, repost_scores(posts), 1)]
+        if picked != ['viral']:
+            print(f"❌ Repost top-1 wrong: {picked}")
+            return False
+        print("✅ Repost scoring skips low-engagement posts")
+        
+        users = [
+            SimpleNamespace(id='small', followers_count=50, following_count=10),
+            SimpleNamespace(id='famous', followers_count=50000, following_count=10),
+            SimpleNamespace(id='spammy', followers_count=500, following_count=5000),
+            SimpleNamespace(id='lower', followers_count=100, following_count=0),
+            SimpleNamespace(id='upper', followers_count=10000, following_count=100),
+        ]
+        picked = [u.id for u in top_k(users, follow_scores(users), 10)]
+        if picked != ['upper', 'lower']:
+            print(f"❌ Follow ranking wrong: {picked}")
+            return False
+        if top_k(users, follow_scores(users), 0):
+            print("❌ top_k with k=0 picked candidates")
+            return False
+        print("✅ Follow scoring keeps to the follower window and ratio")
+        
+    except Exception as e:
+        print(f"❌ Candidate scoring test failed: {e}")
+        return False
+    
+    return True
+
+def test_recent_content():
+    """Test the repeat window and ring trimming of the recent content guard"""
+    print("\n📝 Testing recent content guard...")
+    
+    try:
+        from recent_content import RecentContent
+        
+        now = datetime(2024, 6, 1, 12, 0)
+        entries = []
+        recent = RecentContent(entries, size=3, window_days=7)
+        recent.add("Monday #motivation", now=now - timedelta(days=8))
+        recent.add("Stay  hydrated!", now=now - timedelta(days=1))
+        
+        if recent.seen("Monday #motivation", now=now):
+            print("❌ Text outside the repeat window still blocked")
+            return False
+        if not recent.seen("stay hydrated! #wellness", now=now):
+            print("❌ Same text (different case, spacing, hashtags) not blocked")
+            return False
+        print("✅ Repeat window expiry OK")
+        
+        for i in range(3):
+            recent.add(f"Post {i}", now=now)
+        if len(entries) != 3 or recent.seen("Stay hydrated!", now=now) or not recent.seen("Post 0", now=now):
+            print(f"❌ Ring not trimmed to its size: {len(entries)} entries")
+            return False
+        
+        # Trimming the older copy of a re-posted text keeps the newer one
+        recent.add("Post 0", now=now + timedelta(minutes=1))
+        if not recent.seen("Post 0", now=now) or len(entries) != 3:
+            print("❌ Re-posted text lost when its older entry was trimmed")
+            return False
+        
+        reloaded = RecentContent(list(entries), size=2, window_days=7)
+        if reloaded.seen("Post 1", now=now) or not reloaded.seen("Post 0", now=now):
+            print("❌ Reloading with a smaller size did not trim the oldest entries")
+            return False
+        print("✅ Ring trimming OK")
+        
+    except Exception as e:
+        print(f"❌ Recent content test failed: {e}")
+        return False
+    
+    return True
+
+def test_circuit_breaker():
+    """Test that only errors inside the hourly window open the circuit"""
+    print("\n🔌 Testing circuit breaker...")
+    
+    try:
+        from bot_config import BotConfig
+        from circuit_breaker import CircuitBreaker, CLOSED, OPEN
+        
+        limit = BotConfig.SAFETY['max_errors_per_hour']
+        clock = [1_700_000_000.0]
+        with tempfile.TemporaryDirectory() as data_dir, mock.patch('time.time', lambda: clock[0]):
+            state_file = Path(data_dir) / 'circuit_breakers.json'
+            
+            # Failures spread over days, with successes in between, never reach the hourly limit
+            breaker = CircuitBreaker('test', state_file=state_file)
+            for day in range(limit * 2):
+                for _ in range(limit - 1):
+                    breaker.record_failure('spread out')
+                    clock[0] += 60
+                for _ in range(100):
+                    breaker.record_success()
+                clock[0] += 86400
+            breaker.record_failure('days later')
+            reloaded = CircuitBreaker('test', state_file=state_file)
+            if breaker.state != CLOSED or reloaded.state != CLOSED or reloaded.safety_checker.error_count != 1:
+                print(f"❌ Spread-out failures opened the circuit ({reloaded.safety_checker.error_count} errors counted)")
+                return False
+            allowed, reason = reloaded.safety_checker.can_perform_action('like', 0)
+            if not allowed:
+                print(f"❌ Old errors still block actions: {reason}")
+                return False
+            print("✅ Failures spread over time do not trip")
+            
+            # The same number of failures inside one hour does
+            for _ in range(limit - 1):
+                breaker.record_failure('burst')
+            if breaker.state != OPEN or breaker.allow_request():
+                print("❌ A burst of failures did not open the circuit")
+                return False
+            print("✅ A burst of failures opens the circuit")
+        
+    except Exception as e:
+        print(f"❌ Circuit breaker test failed: {e}")
+        return False
+    
+    return True
+
 def main():
     """Run all tests"""
     print("🧪 Instagram Bot Test Suite")
@@ -164,7 +357,11 @@ def main():
         ("Python Imports", test_imports),
         ("Bot Modules", test_bot_modules),
         ("Environment Setup", test_environment_setup),
-        ("Bot Initialization", test_bot_initialization)
+        ("Bot Initialization", test_bot_initialization),
+        ("Engagement Index", test_engagement_index),
+        ("Candidate Scoring", test_candidate_scoring),
+        ("Recent Content", test_recent_content),
+        ("Circuit Breaker", test_circuit_breaker)
     ]
     
     passed = 0
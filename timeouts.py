@@ -0,0 +1,274 @@
+"""
+Call Timeouts and Watchdog
+Per-operation deadlines for platform calls, cooperative job cancellation and stalled-job detection
+"""
+
+import sys
+import time
+import types
+import weakref
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Optional
+
+from bot_config import BotConfig
+from tracing import span
+
+# Calls run here so the caller can give up on them; the HTTP-level timeout
+# set by apply_http_timeout() makes an abandoned call finish eventually.
+# Calls on one client are serialized (see _ClientGate), so an abandoned call
+# never overlaps the next call or a retry on the same non-thread-safe client.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='PlatformCall')
+
+_gates = weakref.WeakKeyDictionary()
+_gates_lock = threading.Lock()
+
+_current = threading.local()
+
+
+class OperationTimeout(Exception):
+    """A platform call did not finish within its deadline"""
+
+
+class ClientBusy(OperationTimeout):
+    """The client was still running an earlier (possibly abandoned) call when the deadline passed"""
+
+
+class Cancelled(BaseException):
+    """The running job was cancelled (BaseException, so broad `except Exception` blocks don't swallow it)"""
+
+
+class _ClientGate:
+    """Lets one call at a time use a client; held until the call really finishes, even if abandoned"""
+
+    def __init__(self, logger):
+        self.lock = threading.Lock()
+        self._state = threading.Lock()
+        self.logger = logger
+        self.holder = None
+        self.abandoned_at = None
+
+    def acquire(self, name: str, operation: str, deadline: float, timeout: float, event: Optional[threading.Event]):
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ClientBusy(f"{operation} call {name} waited {timeout}s for {self.holder} on the same client")
+            if self.lock.acquire(timeout=min(remaining, 1.0)):
+                self.holder = name
+                return
+            if event is not None and event.is_set():
+                raise Cancelled(f"{operation} call {name} cancelled by watchdog")
+
+    def abandon(self, future):
+        with self._state:
+            if future.done():
+                return  # Finished (and released) in the meantime
+            self.abandoned_at = time.monotonic()
+            self.logger.warning(f"Abandoned {self.holder}; its client stays busy until the call returns")
+
+    def release(self, future=None):
+        with self._state:
+            if self.abandoned_at is not None:
+                self.logger.info(f"Abandoned {self.holder} finished after {time.monotonic() - self.abandoned_at:.0f}s more, client free")
+            self.holder = None
+            self.abandoned_at = None
+            self.lock.release()
+
+
+def _client_gate(client) -> Optional[_ClientGate]:
+    """The gate of a client object (None for plain functions and module functions)"""
+    if client is None or isinstance(client, types.ModuleType):
+        return None
+    with _gates_lock:
+        try:
+            gate = _gates.get(client)
+            if gate is None:
+                gate = _gates[client] = _ClientGate(logging.getLogger('PlatformCall'))
+        except TypeError:
+            return None  # Not weak-referenceable or not hashable
+    return gate
+
+
+def client_busy(client) -> bool:
+    """True while a call on `client` is still running, including one its caller abandoned"""
+    gate = _client_gate(client)
+    return gate is not None and gate.lock.locked()
+
+
+def apply_http_timeout(session, timeout: Optional[float] = None):
+    """Give every request made through a requests.Session a default timeout"""
+    timeout = timeout or BotConfig.TIMEOUTS['http']
+    request = session.request
+
+    def request_with_timeout(method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = timeout
+        return request(method, url, **kwargs)
+
+    session.request = request_with_timeout
+    return session
+
+
+def cancel_event() -> Optional[threading.Event]:
+    """Cancellation flag of the job running on this thread, if any"""
+    return getattr(_current, 'cancel', None)
+
+
+def check_cancelled():
+    """Raise Cancelled if the watchdog has cancelled the current job"""
+    event = cancel_event()
+    if event is not None and event.is_set():
+        raise Cancelled("Job cancelled by watchdog")
+
+
+def sleep(seconds: float):
+    """time.sleep that wakes up and raises Cancelled when the current job is cancelled"""
+    event = cancel_event()
+    if event is None:
+        time.sleep(seconds)
+        return
+    if event.wait(seconds):
+        raise Cancelled("Job cancelled by watchdog")
+
+
+def call_with_timeout(func, *args, operation: str = 'action', timeout: Optional[float] = None, client=None, **kwargs):
+    """Run one platform call with a deadline from BotConfig.TIMEOUTS[operation]
+
+    Calls on the same client (func's bound object, or `client` when func
+    takes the client as an argument) run one at a time. Raises
+    OperationTimeout when the deadline passes (the call is abandoned, not
+    killed, and keeps the client busy until it returns), ClientBusy when an
+    earlier call still holds the client, and Cancelled if the current job is
+    cancelled meanwhile.
+    """
+    check_cancelled()
+    timeout = timeout or BotConfig.TIMEOUTS[operation]
+    name = getattr(func, '__name__', repr(func))
+
+    with span(name, operation=operation):
+        deadline = time.monotonic() + timeout
+        event = cancel_event()
+        gate = _client_gate(client if client is not None else getattr(func, '__self__', None))
+
+        # Set when the caller gives up, so sleep()/check_cancelled() inside the call stop it early
+        abandoned = threading.Event()
+
+        def run():
+            _current.cancel = abandoned
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current.cancel = None
+
+        if gate is not None:
+            gate.acquire(name, operation, deadline, timeout, event)
+            try:
+                future = _executor.submit(run)
+            except BaseException:
+                gate.release()
+                raise
+            future.add_done_callback(gate.release)
+        else:
+            future = _executor.submit(run)
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                abandoned.set()
+                if not future.cancel() and gate is not None:
+                    gate.abandon(future)
+                raise OperationTimeout(f"{operation} call {name} exceeded {timeout}s")
+            try:
+                # Poll in short steps so cancellation is noticed promptly
+                return future.result(timeout=min(remaining, 1.0) if event is not None else remaining)
+            except FuturesTimeout:
+                if event is not None and event.is_set():
+                    abandoned.set()
+                    if not future.cancel() and gate is not None:
+                        gate.abandon(future)
+                    raise Cancelled(f"{operation} call {name} cancelled by watchdog")
+
+
+class Watchdog:
+    """Background thread that flags scheduled jobs running longer than allowed and cancels them"""
+
+    def __init__(self, stall_after: Optional[float] = None, interval: Optional[float] = None, logger=None):
+        self.stall_after = stall_after or BotConfig.TIMEOUTS['job']
+        self.interval = interval or BotConfig.TIMEOUTS['watchdog_interval']
+        self.logger = logger or logging.getLogger('Watchdog')
+        self.running = {}
+        self.stalled = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, job_func):
+        """Wrap a job so the watchdog knows when it starts and ends"""
+        if getattr(job_func, '_watched', False):
+            return job_func
+        from job_metrics import job_name  # job_metrics imports this module
+        name = job_name(job_func)
+
+        def watched(*args, **kwargs):
+            event = threading.Event()
+            previous = cancel_event()
+            _current.cancel = event
+            with self._lock:
+                self.running[name] = {
+                    'started': time.monotonic(),
+                    'thread_id': threading.get_ident(),
+                    'cancel': event,
+                    'flagged': False
+                }
+            try:
+                return job_func(*args, **kwargs)
+            except Cancelled as e:
+                self.logger.error(f"Job {name} cancelled: {e}")
+                return None
+            finally:
+                with self._lock:
+                    self.running.pop(name, None)
+                _current.cancel = previous
+
+        watched.__name__ = name
+        watched._watched = True
+        return watched
+
+    def start(self):
+        """Start checking in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='Watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+
+    def check(self):
+        """Flag and cancel every job running past its limit"""
+        now = time.monotonic()
+        frames = sys._current_frames()
+        with self._lock:
+            for name, job in self.running.items():
+                elapsed = now - job['started']
+                if elapsed < self.stall_after or job['flagged']:
+                    continue
+                job['flagged'] = True
+                job['cancel'].set()
+                self.stalled.append({'job': name, 'elapsed': round(elapsed), 'at': time.time()})
+
+                frame = frames.get(job['thread_id'])
+                stack = ''.join(traceback.format_stack(frame)) if frame else 'unavailable'
+                self.logger.error(f"Job {name} stalled for {elapsed:.0f}s, cancelling. Stack:\n{stack}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Watchdog check failed: {e}")
@@ -0,0 +1,185 @@
+"""
+Run Tracing
+In-process spans around a run's call tree, exported as JSON lines or Chrome trace format
+(open .json traces in chrome://tracing or https://ui.perfetto.dev for a flame chart)
+"""
+
+import os
+import json
+import time
+import logging
+import itertools
+import threading
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bot_config import BotConfig
+
+FORMATS = ('jsonl', 'chrome')
+
+logger = logging.getLogger('Tracing')
+
+# '' when disabled; checked first thing in every span so disabled tracing costs one global lookup
+_format = ''
+_local = threading.local()
+_ids = itertools.count(1)
+
+
+def configure(trace_format: Optional[str]):
+    """Enable tracing in 'jsonl' or 'chrome' format; empty or None disables it"""
+    global _format
+    trace_format = (trace_format or '').lower()
+    if trace_format and trace_format not in FORMATS:
+        logger.warning(f"Unknown trace format '{trace_format}', tracing disabled")
+        trace_format = ''
+    if trace_format != _format:
+        logger.info(f"Tracing {'enabled (' + trace_format + ')' if trace_format else 'disabled'}")
+    _format = trace_format
+
+
+def enabled() -> bool:
+    return bool(_format)
+
+
+class _NoSpan:
+    """Shared do-nothing span handed out while tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Span:
+    """One timed node of the call tree; the outermost root span on a thread exports the tree"""
+
+    __slots__ = ('name', 'attrs', 'root', 'id', 'parent', 'start', 'started_at')
+
+    def __init__(self, name: str, attrs: Optional[Dict] = None, root: bool = False):
+        self.name = name
+        self.attrs = attrs or {}
+        self.root = root
+
+    def set(self, **attrs):
+        """Attach attributes (counts, ids, sizes) to the span"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        if not stack:
+            # Only spans under a root are kept; stray top-level spans are timed and dropped
+            _local.events = [] if self.root else None
+            self.started_at = datetime.now().isoformat()
+        self.parent = stack[-1] if stack else None
+        self.id = next(_ids)
+        stack.append(self.id)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        stack = _local.stack
+        stack.pop()
+        events = _local.events
+        if events is not None:
+            if exc_type is not None:
+                self.attrs['error'] = exc_type.__name__
+            events.append({
+                'id': self.id,
+                'parent': self.parent,
+                'name': self.name,
+                'thread': threading.current_thread().name,
+                'ts_us': self.start // 1000,
+                'dur_us': (end - self.start) // 1000,
+                'attrs': self.attrs
+            })
+            if not stack:
+                _local.events = None
+                export(self.name, self.started_at, events)
+        return False
+
+
+def span(name: str, root: bool = False, **attrs):
+    """Context manager timing a block as a span (a no-op while tracing is disabled)"""
+    if not _format:
+        return NO_SPAN
+    return Span(name, attrs, root)
+
+
+def traced(name: Optional[str] = None, root: bool = False):
+    """Decorator form of span(); root=True marks a whole run whose tree is exported when it ends"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _format:
+                return func(*args, **kwargs)
+            with Span(span_name, None, root):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def chrome_trace(events: List[Dict]) -> Dict:
+    """Chrome trace-event JSON: one complete ('X') event per span"""
+    pid = os.getpid()
+    threads = {}
+    trace_events = []
+    for event in sorted(events, key=lambda e: e['ts_us']):
+        tid = threads.setdefault(event['thread'], len(threads) + 1)
+        trace_events.append({
+            'name': event['name'],
+            'cat': event['name'].split('.')[0],
+            'ph': 'X',
+            'ts': event['ts_us'],
+            'dur': event['dur_us'],
+            'pid': pid,
+            'tid': tid,
+            'args': event['attrs']
+        })
+    for thread, tid in threads.items():
+        trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+
+def export(root_name: str, started_at: str, events: List[Dict]) -> Optional[Path]:
+    """Write one run's spans to BotConfig.TRACING['folder'] and prune old traces"""
+    trace_format = _format or 'jsonl'
+    folder = Path(BotConfig.TRACING['folder'])
+    stamp = started_at[:19].replace('-', '').replace(':', '').replace('T', '_')
+    safe_name = root_name.replace('.', '_')
+    path = folder / f"{safe_name}_{stamp}.{'json' if trace_format == 'chrome' else 'jsonl'}"
+
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            if trace_format == 'chrome':
+                json.dump(chrome_trace(events), f, default=str)
+            else:
+                # Parents close after their children, so write in start order
+                for event in sorted(events, key=lambda e: e['ts_us']):
+                    f.write(json.dumps(event, default=str) + '\n')
+        total_ms = max(event['dur_us'] for event in events) / 1000
+        logger.info(f"Trace of {root_name} ({len(events)} spans, {total_ms:.0f}ms) written to {path}")
+
+        traces = sorted(folder.glob('*.json*'), key=lambda p: p.stat().st_mtime)
+        for old in traces[:-BotConfig.TRACING['keep_files']]:
+            old.unlink()
+        return path
+    except Exception as e:
+        logger.error(f"Error writing trace {path}: {e}")
+        return None
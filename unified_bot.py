@@ -1,13 +1,18 @@
 import os
-import time
 import random
 import schedule
 import logging
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 from pathlib import Path
 import json
 
+from graceful_shutdown import GracefulShutdown
+from control_socket import ControlServer
+from tracing import traced
+from warmup import WarmUp
+from settings import SettingsWatcher, get_settings, reload_settings, subscribe
+from timeouts import sleep
+
 # Import our platform-specific bots
 from instagram_bot import InstagramBot
 # from x_bot import XBot  # Disabled for public release
@@ -16,8 +21,8 @@ class UnifiedSocialMediaBot:
     """Unified bot that manages both Instagram and X (credentials removed)"""
     
     def __init__(self):
-        load_dotenv()
         self.setup_logging()
+        self.settings = get_settings()
         
         # Initialize platform bots
         self.instagram_bot = None
@@ -25,11 +30,12 @@ class UnifiedSocialMediaBot:
         # self.x_bot = None  # Disabled for public release
         
         # Platform settings
-        self.enable_instagram = os.getenv('ENABLE_INSTAGRAM', 'true').lower() == 'true'
+        self.enable_instagram = self.settings.enable_instagram
         # self.enable_twitter = os.getenv('ENABLE_TWITTER', 'true').lower() == 'true'  # Disabled
         # self.enable_x = os.getenv('ENABLE_X', 'true').lower() == 'true'  # Disabled
         
         self.initialize_bots()
+        subscribe(self.on_settings_changed)
         
     def setup_logging(self):
         """Setup logging for unified bot"""
@@ -55,9 +61,18 @@ class UnifiedSocialMediaBot:
                 self.instagram_bot = None
         # X bot initialization removed
 
+    def on_settings_changed(self, settings, changed):
+        """Apply reloaded settings; the platform bots reload their own limits and DRY_RUN"""
+        self.enable_instagram = settings.enable_instagram
+        if self.enable_instagram and not self.instagram_bot:
+            self.logger.warning("Instagram enabled but its bot was not started; restart to run it")
+        self.logger.info(f"Unified bot configuration reloaded - Instagram: {self.enable_instagram}")
+
     def run_instagram_activities(self):
         """Run Instagram activities"""
-        if self.instagram_bot:
+        if not self.enable_instagram:
+            self.logger.info("Instagram disabled, skipping")
+        elif self.instagram_bot:
             try:
                 self.logger.info("Running Instagram activities")
                 self.instagram_bot.run_daily_activities()
@@ -68,14 +83,15 @@ class UnifiedSocialMediaBot:
             
     # Twitter and X activities removed
     
+    @traced(root=True)
     def run_all_activities(self):
         """Run activities on all platforms"""
         self.logger.info("Starting unified social media bot activities")
         
         # Add delay between platforms
-        if self.instagram_bot:
+        if self.instagram_bot and self.enable_instagram:
             self.run_instagram_activities()
-            time.sleep(random.randint(300, 600))  # 5-10 minute delay
+            sleep(random.randint(300, 600))  # 5-10 minute delay
             
         # Twitter and X activities removed
             
@@ -108,10 +124,37 @@ class UnifiedSocialMediaBot:
         schedule.every().day.at("17:00").do(self.run_all_activities)
         schedule.every().day.at("20:00").do(self.run_all_activities)
         
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        # Stop on SIGTERM/SIGINT after the running job, reload on SIGHUP
+        self.shutdown = GracefulShutdown(self.logger)
+        self.shutdown.register_reload(reload_settings)
+        if self.instagram_bot:
+            self.shutdown.register_flush(self.instagram_bot.save_activity_log)
+            
+            # Restore the session and fill caches before the first job is due
+            warm_up = WarmUp(self.logger)
+            warm_up.run(self.instagram_bot.warm_up_tasks())
+            warm_up.print_summary()
+            
+        # Answer bot_manager from this process's warm state
+        control = ControlServer(self.shutdown, logger=self.logger)
+        control.register('summary', self.get_activity_summary)
+        if self.instagram_bot:
+            control.register('test_connection', lambda: {'instagram': self.instagram_bot.test_connection()}, on_scheduler=True)
+        control.add_job('daily', self.run_all_activities)
+        control.start()
+        
+        # Pick up .env edits without a restart
+        watcher = SettingsWatcher()
+        watcher.start()
+        try:
+            self.shutdown.run_scheduler(check_interval=60)  # Check every minute
+        finally:
+            watcher.stop()
+            control.stop()
 
 if __name__ == "__main__":
-    bot = UnifiedSocialMediaBot()
-    bot.start_scheduler()
+    # --profile: one run against mock clients instead of the scheduler
+    from profiling import profile_from_argv
+    if not profile_from_argv('unified_bot'):
+        bot = UnifiedSocialMediaBot()
+        bot.start_scheduler()
@@ -0,0 +1,273 @@
+"""
+Unsplash Image Pool
+Fetches up to 30 photos per API request, downloads them in parallel and indexes them in data/unsplash_index.json
+"""
+
+import os
+import re
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+import requests
+
+from bot_config import BotConfig
+from perceptual_hash import PerceptualIndex, library_folders
+from settings import get_settings
+from tracing import traced
+
+RANDOM_URL = "https://api.unsplash.com/photos/random"
+
+STOPWORDS = {'the', 'and', 'with', 'for', 'from', 'into', 'photo', 'image', 'of', 'on', 'in', 'a', 'an'}
+
+
+class DuplicateImage(Exception):
+    """A downloaded photo looks the same as one already in the library"""
+
+
+def keywords(text: Optional[str]) -> Set[str]:
+    """Lower-cased words worth matching on"""
+    if not text:
+        return set()
+    return {word for word in re.findall(r'[a-z0-9]+', text.lower()) if len(word) > 1 and word not in STOPWORDS}
+
+
+class UnsplashPool:
+    """Local pool of downloaded Unsplash photos, refilled one batch request at a time"""
+
+    def __init__(self, folder, access_key: Optional[str] = None, index_file=None, logger=None):
+        self.folder = Path(folder)
+        self.index_file = Path(index_file or BotConfig.UNSPLASH['index_file'])
+        self.access_key = access_key or get_settings().unsplash_access_key
+        self.batch_size = BotConfig.UNSPLASH['batch_size']
+        self.download_workers = BotConfig.UNSPLASH['download_workers']
+        self.timeout = BotConfig.UNSPLASH['timeout']
+        self.min_match = BotConfig.UNSPLASH['min_match']
+        self.reuse_after = timedelta(days=BotConfig.UNSPLASH['reuse_after_days'])
+        self.logger = logger or logging.getLogger('UnsplashPool')
+        self.photos = {}
+        self.keyword_index = defaultdict(set)
+        self.dedup = PerceptualIndex(logger=self.logger)
+
+        self.load_index()
+        self.adopt_local_files()
+        self.build_keyword_index()
+
+    def load_index(self):
+        """Load the index of downloaded photos"""
+        try:
+            # Earlier versions kept the index inside the image folder
+            legacy_file = self.folder / 'unsplash_index.json'
+            if legacy_file.exists() and not self.index_file.exists():
+                self.index_file.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(legacy_file, self.index_file)
+                self.logger.info(f"Moved Unsplash index from {legacy_file} to {self.index_file}")
+            if self.index_file.exists():
+                with open(self.index_file, 'r') as f:
+                    self.photos = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading Unsplash index: {e}")
+
+    def save_index(self):
+        """Write the index atomically"""
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.index_file.with_suffix('.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump(self.photos, f, indent=2)
+            os.replace(temp_file, self.index_file)
+        except Exception as e:
+            self.logger.error(f"Error saving Unsplash index: {e}")
+
+    def adopt_local_files(self):
+        """Index images downloaded before the index existed (unsplash_<query>_<id>.jpg)"""
+        if not self.folder.exists():
+            return
+
+        known = {photo['file'] for photo in self.photos.values()}
+        adopted = 0
+        for img_path in self.folder.glob('unsplash_*_*.jpg'):
+            if str(img_path) in known:
+                continue
+            query, _, photo_id = img_path.stem[len('unsplash_'):].partition('_')
+            if not photo_id or photo_id in self.photos:
+                continue
+            self.photos[photo_id] = self._metadata(query, {'id': photo_id}, img_path)
+            adopted += 1
+
+        if adopted:
+            self.logger.info(f"Indexed {adopted} existing Unsplash images in {self.folder}")
+            self.save_index()
+
+    def _photo_keywords(self, photo: Dict) -> Set[str]:
+        words = keywords(photo['query']) | keywords(photo.get('description'))
+        for tag in photo.get('tags', []):
+            words |= keywords(tag)
+        return words
+
+    def build_keyword_index(self):
+        """Inverted index from keyword to photo ids"""
+        self.keyword_index = defaultdict(set)
+        for photo_id, photo in self.photos.items():
+            for word in self._photo_keywords(photo):
+                self.keyword_index[word].add(photo_id)
+
+    def reusable(self, photo: Dict) -> bool:
+        """Unused, or last posted long enough ago, not a near-duplicate and still on disk"""
+        if self.dedup.is_duplicate(photo['file']):
+            return False
+        used_at = photo.get('used_at')
+        if used_at and datetime.now() - datetime.fromisoformat(used_at) < self.reuse_after:
+            return False
+        return Path(photo['file']).exists()
+
+    def find_local(self, query: str) -> Optional[Dict]:
+        """Best reusable local photo for a query, or None if nothing matches well enough"""
+        wanted = keywords(query)
+        if not wanted:
+            return None
+
+        hits = defaultdict(int)
+        for word in wanted:
+            for photo_id in self.keyword_index.get(word, ()):
+                hits[photo_id] += 1
+
+        best, best_rank = None, None
+        for photo_id, count in hits.items():
+            match = count / len(wanted)
+            photo = self.photos[photo_id]
+            if match < self.min_match or not self.reusable(photo):
+                continue
+            # Best match first, then never-used photos, then the longest unused
+            last_touched = datetime.fromisoformat(photo.get('used_at') or photo['fetched_at'])
+            rank = (match, photo.get('used_at') is None, -last_touched.timestamp())
+            if best_rank is None or rank > best_rank:
+                best, best_rank = photo, rank
+
+        return best
+
+    @traced()
+    def fetch_batch(self, query: str, count: Optional[int] = None) -> int:
+        """Request `count` random photos in one API call and download them; returns how many were added"""
+        count = min(count or self.batch_size, 30)  # API maximum per request
+
+        try:
+            response = requests.get(
+                RANDOM_URL,
+                params={'query': query, 'orientation': 'squarish', 'count': count},
+                headers={'Authorization': f'Client-ID {self.access_key}', 'Accept-Version': 'v1'},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            self.logger.error(f"Unsplash request failed: {e}")
+            return 0
+
+        self.logger.info(f"Unsplash batch request for '{query}' (count={count}): {response.status_code}, "
+                         f"remaining quota {response.headers.get('X-Ratelimit-Remaining', '?')}")
+        if response.status_code != 200:
+            self.logger.error(f"Failed to fetch from Unsplash: {response.status_code} {response.text}")
+            return 0
+
+        results = response.json()
+        if isinstance(results, dict):
+            results = [results]
+
+        wanted = [
+            data for data in results
+            if data.get('id') not in self.photos and data.get('urls', {}).get('regular')
+        ]
+        if not wanted:
+            return 0
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        folders = library_folders()
+        if self.folder not in folders:
+            folders.append(self.folder)
+        self.dedup.scan(folders)
+        
+        added = 0
+        rejected = 0
+        with ThreadPoolExecutor(max_workers=self.download_workers) as pool:
+            futures = {pool.submit(self._download, query, data): data for data in wanted}
+            for future in as_completed(futures):
+                data = futures[future]
+                try:
+                    img_path = future.result()
+                except DuplicateImage as e:
+                    self.logger.info(f"Skipping Unsplash photo {data['id']}: {e}")
+                    rejected += 1
+                    continue
+                except Exception as e:
+                    self.logger.error(f"Error downloading Unsplash photo {data['id']}: {e}")
+                    continue
+                photo = self._metadata(query, data, img_path)
+                self.photos[data['id']] = photo
+                for word in self._photo_keywords(photo):
+                    self.keyword_index[word].add(data['id'])
+                added += 1
+
+        self.save_index()
+        self.dedup.save()
+        self.logger.info(f"Added {added} Unsplash photos for '{query}', rejected {rejected} near-duplicates")
+        return added
+
+    def _download(self, query: str, data: Dict) -> Path:
+        response = requests.get(data['urls']['regular'], timeout=self.timeout)
+        response.raise_for_status()
+
+        # Reject near-duplicates before they reach the disk
+        value = self.dedup.hash_bytes(response.content)
+        img_path = self.folder / f"unsplash_{query}_{data['id']}.jpg"
+        with self.dedup.lock:
+            original = self.dedup.find_similar(value)
+            if original:
+                raise DuplicateImage(f"near-duplicate of {Path(original).name}")
+
+            temp_path = img_path.with_suffix('.part')
+            with open(temp_path, 'wb') as f:
+                f.write(response.content)
+            os.replace(temp_path, img_path)
+            if value is not None:
+                self.dedup.add(img_path, value)
+        return img_path
+
+    @staticmethod
+    def _metadata(query: str, data: Dict, img_path: Path) -> Dict:
+        user = data.get('user') or {}
+        return {
+            'id': data['id'],
+            'query': query,
+            'file': str(img_path),
+            'description': data.get('description') or data.get('alt_description'),
+            'tags': [tag.get('title') for tag in data.get('tags', []) if tag.get('title')],
+            'width': data.get('width'),
+            'height': data.get('height'),
+            'color': data.get('color'),
+            'author': user.get('name'),
+            'author_url': (user.get('links') or {}).get('html'),
+            'photo_url': (data.get('links') or {}).get('html'),
+            'fetched_at': datetime.now().isoformat(),
+            'used_at': None
+        }
+
+    @traced()
+    def take(self, query: str) -> Optional[Path]:
+        """Return a local photo matching `query`, fetching one batch from Unsplash only on a miss"""
+        photo = self.find_local(query)
+        if photo:
+            self.logger.info(f"Using local image for '{query}': {Path(photo['file']).name}")
+        else:
+            self.logger.info(f"No local image for '{query}', fetching from Unsplash")
+            self.fetch_batch(query)
+            photo = self.find_local(query)
+            if not photo:
+                return None
+
+        photo['used_at'] = datetime.now().isoformat()
+        photo['uses'] = photo.get('uses', 0) + 1
+        self.save_index()
+        return Path(photo['file'])
@@ -7,25 +7,110 @@ import os
 import sys
 import json
 import time
+import socket
+import threading
+from importlib import metadata
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import urlparse
+
+from bot_config import BotConfig
+
+
+def run_in_daemon(func, name=None):
+    """Run func on a daemon thread, which never holds up interpreter exit
+
+    Returns the thread and a dict that gets 'result' or 'error' when func finishes.
+    """
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = func()
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def join_until(threads, deadline):
+    """Join threads until the monotonic `deadline` at the latest"""
+    for thread in threads:
+        thread.join(max(0, deadline - time.monotonic()))
 
 class BotValidator:
     """Validates bot configuration and environment"""
     
+    # Distribution names checked by validate_python_environment
+    REQUIRED_PACKAGES = [
+        'instagrapi',
+        'python-dotenv', 
+        'schedule',
+        'requests',
+        'Pillow',
+        'tweepy'
+    ]
+    
+    # Steps whose overrunning the deadline is only a warning
+    NON_BLOCKING_STEPS = {'Network Connectivity'}
+    
     def __init__(self):
         self.errors = []
         self.warnings = []
         self.passed_checks = []
+        self.timings = {}
+        self._step = threading.local()
+        
+    def _results(self, kind):
+        """Result list of the step running on this thread, or the overall one"""
+        results = getattr(self._step, 'results', None)
+        return results[kind] if results is not None else getattr(self, kind)
         
     def add_error(self, message):
-        self.errors.append(f"\u274c {message}")
+        self._results('errors').append(f"\u274c {message}")
         
     def add_warning(self, message):
-        self.warnings.append(f"\u26a0\ufe0f  {message}")
+        self._results('warnings').append(f"\u26a0\ufe0f  {message}")
         
     def add_success(self, message):
-        self.passed_checks.append(f"\u2705 {message}")
+        self._results('passed_checks').append(f"\u2705 {message}")
+        
+    @staticmethod
+    def _environment_key():
+        """Interpreter plus site-packages mtimes: installing or removing a package changes it"""
+        parts = [sys.executable, sys.version]
+        for entry in sys.path:
+            if entry.endswith('site-packages') and os.path.isdir(entry):
+                parts.append(f"{entry}:{os.stat(entry).st_mtime_ns}")
+        return '|'.join(parts)
+        
+    def installed_versions(self):
+        """{package: version or None}, cached until the interpreter or its packages change"""
+        cache_file = Path(BotConfig.VALIDATION['cache_file'])
+        key = self._environment_key()
+        try:
+            cached = json.loads(cache_file.read_text())
+            if cached.get('key') == key and set(cached['packages']) == set(self.REQUIRED_PACKAGES):
+                return cached['packages']
+        except (OSError, ValueError, KeyError):
+            pass
+            
+        # Read package metadata instead of importing (instagrapi alone takes seconds to import)
+        packages = {}
+        for package in self.REQUIRED_PACKAGES:
+            try:
+                packages[package] = metadata.version(package)
+            except metadata.PackageNotFoundError:
+                packages[package] = None
+                
+        try:
+            cache_file.parent.mkdir(exist_ok=True)
+            cache_file.write_text(json.dumps({'key': key, 'packages': packages}, indent=2))
+        except OSError:
+            pass
+        return packages
         
     def validate_python_environment(self):
         """Validate Python environment"""
@@ -36,25 +121,10 @@ class BotValidator:
             self.add_error(f"Python 3.7+ required (current: {sys.version_info.major}.{sys.version_info.minor})")
             
         # Required packages
-        required_packages = [
-            'instagrapi',
-            'python-dotenv', 
-            'schedule',
-            'requests',
-            'Pillow',
-            'tweepy'
-        ]
-        
-        for package in required_packages:
-            try:
-                if package == 'python-dotenv':
-                    import dotenv
-                elif package == 'Pillow':
-                    import PIL
-                else:
-                    __import__(package)
-                self.add_success(f"Package {package} installed")
-            except ImportError:
+        for package, version in self.installed_versions().items():
+            if version:
+                self.add_success(f"Package {package} {version} installed")
+            else:
                 self.add_error(f"Package {package} not installed")
                 
     def validate_environment_file(self):
@@ -90,6 +160,17 @@ class BotValidator:
                     
         except Exception as e:
             self.add_error(f"Error reading .env file: {e}")
+            return
+            
+        # Parse and validate values the same way the bots do
+        try:
+            from settings import BotSettings, read_environment
+            BotSettings.from_mapping(read_environment(env_file))
+            self.add_success("Configuration values are valid")
+        except ImportError:
+            self.add_warning("Cannot validate configuration values - python-dotenv not available")
+        except ValueError as e:
+            self.add_error(str(e))
             
     def validate_content_folder(self):
         """Validate content folder and files"""
@@ -99,27 +180,42 @@ class BotValidator:
             self.add_error("Content folder not found")
             return
             
-        # Check for content files
-        supported_extensions = ['.jpg', '.jpeg', '.png', '.mp4']
-        content_files = []
+        # Count content files and check sizes in one streaming pass
+        limit_mb = BotConfig.VALIDATION['large_file_mb']
+        file_count = 0
+        large_files = []
         
-        for ext in supported_extensions:
-            content_files.extend(content_folder.glob(f"*{ext}"))
-            
-        if not content_files:
+        for entry in self.iter_content_files(content_folder):
+            file_count += 1
+            size_mb = entry.stat().st_size / (1024 * 1024)
+            if size_mb > limit_mb:
+                large_files.append(f"{entry.name} ({size_mb:.1f}MB)")
+                
+        if not file_count:
             self.add_warning("No content files found - add images/videos to content folder")
         else:
-            self.add_success(f"Found {len(content_files)} content files")
+            self.add_success(f"Found {file_count} content files")
             
-            # Check file sizes
-            large_files = []
-            for file in content_files:
-                size_mb = file.stat().st_size / (1024 * 1024)
-                if size_mb > 50:  # 50MB limit
-                    large_files.append(f"{file.name} ({size_mb:.1f}MB)")
-                    
             if large_files:
-                self.add_warning(f"Large files detected (may fail to upload): {', '.join(large_files)}")
+                shown = ', '.join(large_files[:5]) + (f" and {len(large_files) - 5} more" if len(large_files) > 5 else "")
+                self.add_warning(f"Large files detected (may fail to upload): {shown}")
+                
+    @staticmethod
+    def iter_content_files(folder):
+        """Yield os.DirEntry for every supported file under folder, walking the tree lazily"""
+        supported_extensions = ('.jpg', '.jpeg', '.png', '.mp4')
+        pending = [folder]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.lower().endswith(supported_extensions):
+                        yield entry
                 
     def validate_permissions(self):
         """Validate file and folder permissions"""
@@ -143,22 +239,39 @@ class BotValidator:
         try:
             import requests
             
+            timeout = BotConfig.VALIDATION['network_timeout']
+            
+            def probe(method, url):
+                # requests' timeout does not cover DNS, so resolve inside the timed probe
+                socket.getaddrinfo(urlparse(url).hostname, 443)
+                return method(url, timeout=timeout)
+                
+            # Probe both endpoints at once on daemon threads; neither may outlast network_timeout
+            internet_thread, internet = run_in_daemon(lambda: probe(requests.get, 'https://httpbin.org/status/200'))
+            instagram_thread, instagram = run_in_daemon(lambda: probe(requests.head, 'https://www.instagram.com'))
+            join_until([internet_thread, instagram_thread], time.monotonic() + timeout)
+            
             # Test basic internet connectivity
-            response = requests.get('https://httpbin.org/status/200', timeout=10)
-            if response.status_code == 200:
-                self.add_success("Internet connectivity available")
+            if 'result' in internet:
+                if internet['result'].status_code == 200:
+                    self.add_success("Internet connectivity available")
+                else:
+                    self.add_warning("Internet connectivity issues detected")
+            elif 'error' in internet:
+                self.add_warning(f"Internet connectivity test failed: {internet['error'].__class__.__name__}")
             else:
-                self.add_warning("Internet connectivity issues detected")
+                self.add_warning(f"Internet connectivity test timed out after {timeout}s")
                 
             # Test Instagram accessibility (basic check)
-            try:
-                response = requests.head('https://www.instagram.com', timeout=10)
-                if response.status_code == 200:
+            if 'result' in instagram:
+                if instagram['result'].status_code == 200:
                     self.add_success("Instagram.com accessible")
                 else:
                     self.add_warning("Instagram.com may not be accessible")
-            except:
+            elif 'error' in instagram:
                 self.add_warning("Cannot reach Instagram.com (may be blocked)")
+            else:
+                self.add_warning(f"Instagram.com did not answer within {timeout}s")
                 
         except ImportError:
             self.add_warning("Cannot test network connectivity - requests library not available")
@@ -218,6 +331,19 @@ class BotValidator:
         else:
             self.add_success("No existing logs (will create on first run)")
             
+    def _run_step(self, step_name, step_func, step_results):
+        """Run one validation step on a worker thread, collecting its results separately"""
+        self._step.results = {'passed_checks': [], 'warnings': [], 'errors': []}
+        started = time.monotonic()
+        try:
+            step_func()
+        except Exception as e:
+            self.add_error(f"Validation step '{step_name}' failed: {e}")
+        finally:
+            self.timings[step_name] = time.monotonic() - started
+            step_results[step_name] = self._step.results
+            self._step.results = None
+            
     def run_full_validation(self):
         """Run complete validation suite"""
         print("🔍 Instagram Bot Validation Report")
@@ -236,13 +362,35 @@ class BotValidator:
             ("Existing Data", self.check_existing_data)
         ]
         
-        for step_name, step_func in validation_steps:
-            print(f"Checking {step_name}...")
-            try:
-                step_func()
-            except Exception as e:
-                self.add_error(f"Validation step '{step_name}' failed: {e}")
-            print()
+        # The steps are independent, so run them all at once under one deadline. Daemon
+        # threads: a step still running at the deadline does not keep the process alive
+        started = time.monotonic()
+        deadline = BotConfig.VALIDATION['deadline']
+        step_results = {}
+        threads = [
+            run_in_daemon(lambda step_name=step_name, step_func=step_func:
+                          self._run_step(step_name, step_func, step_results), name=f"Validation-{step_name}")[0]
+            for step_name, step_func in validation_steps
+        ]
+        join_until(threads, started + deadline)
+        
+        # Report in the usual order, whatever order the steps finished in
+        for step_name, _ in validation_steps:
+            results = step_results.get(step_name)
+            if results is None:
+                message = f"Validation step '{step_name}' did not finish within {deadline}s"
+                if step_name in self.NON_BLOCKING_STEPS:
+                    self.add_warning(message)
+                else:
+                    self.add_error(message)
+                print(f"Checking {step_name}... timed out")
+                continue
+            self.passed_checks.extend(results['passed_checks'])
+            self.warnings.extend(results['warnings'])
+            self.errors.extend(results['errors'])
+            print(f"Checking {step_name}... {self.timings[step_name] * 1000:.0f}ms")
+        print(f"\n⏱️  Validation took {time.monotonic() - started:.2f}s")
+        print()
             
         # Print results
         if self.passed_checks:
@@ -295,4 +443,5 @@ def main():
     return is_ready
 
 if __name__ == "__main__":
-    main()
+    # Non-zero exit status so deploys can use this as a health gate
+    sys.exit(0 if main() else 1)
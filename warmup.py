@@ -0,0 +1,77 @@
+"""
+Start-up Warm-up
+Runs the slow one-off preparation (session restore, content catalog, image pool, templates)
+in parallel before the scheduler's first deadline, and reports how long it took
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+from bot_config import BotConfig
+
+
+class WarmUp:
+    """Runs named warm-up tasks concurrently, bounded by one overall deadline"""
+
+    def __init__(self, logger=None, timeout: Optional[float] = None, max_workers: Optional[int] = None):
+        self.logger = logger or logging.getLogger('WarmUp')
+        self.timeout = timeout or BotConfig.WARMUP['timeout']
+        self.max_workers = max_workers or BotConfig.WARMUP['max_workers']
+        self.report = {}
+
+    def run(self, tasks: Dict[str, Callable]) -> Dict:
+        """Run every task, returning {'tasks': {name: {status, seconds, error}}, 'seconds': total}
+
+        A task still running at the deadline is reported as timed out and left
+        to finish in the background; the scheduler starts either way.
+        """
+        started = time.monotonic()
+        results = {}
+
+        if not tasks:
+            self.report = {'tasks': results, 'seconds': 0.0}
+            return self.report
+
+        def timed(name, func):
+            task_started = time.monotonic()
+            try:
+                result = func()
+                status = 'failed' if result is False else 'ok'
+                results[name] = {'status': status, 'seconds': round(time.monotonic() - task_started, 2), 'error': None}
+            except Exception as e:
+                results[name] = {'status': 'failed', 'seconds': round(time.monotonic() - task_started, 2), 'error': str(e)}
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks)), thread_name_prefix='WarmUp')
+        futures = {executor.submit(timed, name, func): name for name, func in tasks.items()}
+        _, pending = wait(futures, timeout=self.timeout)
+        executor.shutdown(wait=False)
+
+        for future in pending:
+            name = futures[future]
+            results.setdefault(name, {'status': 'timed out', 'seconds': round(float(self.timeout), 2), 'error': None})
+
+        total = round(time.monotonic() - started, 2)
+        self.report = {'tasks': {name: results[name] for name in tasks}, 'seconds': total}
+
+        for name in tasks:
+            task = results[name]
+            message = f"Warm-up {name}: {task['status']} in {task['seconds']}s"
+            if task['error']:
+                message += f" ({task['error']})"
+            if task['status'] == 'ok':
+                self.logger.info(message)
+            else:
+                self.logger.warning(message)
+
+        ready = sum(1 for task in results.values() if task['status'] == 'ok')
+        self.logger.info(f"Warm-up finished in {total}s ({ready}/{len(tasks)} tasks ready)")
+        return self.report
+
+    def print_summary(self, prefix: str = ''):
+        """One emoji line per task for the console"""
+        icons = {'ok': '✅', 'failed': '⚠️ ', 'timed out': '⏳'}
+        print(f"{prefix}🔥 Warm-up finished in {self.report.get('seconds', 0)}s")
+        for name, task in self.report.get('tasks', {}).items():
+            print(f"{prefix}   {icons.get(task['status'], '•')} {name}: {task['status']} ({task['seconds']}s)")
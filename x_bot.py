@@ -3,8 +3,7 @@ import time
 import random
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
-from dotenv import load_dotenv
+from typing import Iterator, List, Dict, Optional, Tuple
 from pathlib import Path
 import json
 
@@ -15,23 +14,125 @@ except ImportError:
     tweepy = None
 
 from bot_config import BotConfig, SafetyChecker
+from settings import get_settings, subscribe
+from media_pipeline import ImagePreprocessor, VideoPipeline
+from circuit_breaker import CircuitBreaker
+from post_outbox import PostOutbox
+from engagement_index import EngagementIndex
+from feed_cursors import FeedCursorStore
+from fetch_sizing import FetchSizer
+from feed_records import search_page
+from engagement_pipeline import PipelineStats, paged, keep, not_seen, consume
+from scoring import best, follow_scores, repost_scores
+from recent_content import RecentContent, digest
+from timeouts import call_with_timeout, sleep
+from tracing import configure as configure_tracing, traced
 
 class XBot:
     """X bot for automated posting and engagement (credentials removed for public release)"""
     
+    # Post templates by category
+    POST_TEMPLATES = {
+        'mental_health': [
+            "Your mental health is a priority. Take time for yourself today. 💚",
+            "Healing is not linear. Be gentle with yourself on the journey.",
+            "You are enough, just as you are. #SelfAcceptance 🙏",
+            "It's okay to rest. Your mind and soul need it, too. 💤",
+            "Progress is progress, no matter how small. #KeepGoing 🐢",
+            "You are not alone. Reach out, connect, and share. #SupportEachOther 🤝",
+            "Breathe in calm, breathe out stress. #Mindfulness 🌬️",
+            "Let go of what you can't control. Embrace the present moment. 🕊️",
+            "Self-care is not selfish. It's essential. #SelfCare 🛁",
+            "Your story matters. Every chapter, every feeling. #MentalHealthMatters 📖"
+        ],
+        'spirituality': [
+            "Nourish your soul with gratitude and kindness. ✨",
+            "Trust the timing of your life. The universe has a plan. 🌌",
+            "Stillness is where clarity lives. Take a mindful pause. 🧘‍♂️",
+            "Let your light shine, even on the darkest days. 🕯️",
+            "You are a unique expression of the universe. #Oneness 🌠",
+            "Peace begins within. Center yourself and radiate calm. 🧘‍♀️",
+            "Listen to your intuition. It knows the way. 👂✨",
+            "Release what no longer serves you. Make space for growth. 🍃",
+            "Every breath is a new beginning. #Presence 🌱",
+            "Connect with your higher self. Trust your journey. 🦋"
+        ],
+        'wellness': [
+            "Wellness is a daily practice, not a destination. #HealthyHabits 🏃‍♂️",
+            "Hydrate, nourish, move, rest. Repeat. #WellnessRoutine 💧🥗🧘‍♂️😴",
+            "Celebrate small wins on your wellness journey. 🎉",
+            "Balance is not something you find, it's something you create. ⚖️",
+            "A healthy mind supports a healthy body. #HolisticHealth 🧠💪",
+            "Gratitude is the best medicine. #Thankful 🙏",
+            "Let nature restore your spirit. Take a mindful walk today. 🌳🚶‍♀️",
+            "Boundaries are a form of self-respect. Set them with love. 🛑❤️",
+            "Rest is productive. Give yourself permission to recharge. 🔋",
+            "You are worthy of wellness and joy. 🌞"
+        ],
+        'engagement': [
+            "What's one thing you do for your mental well-being? Share below! 💬",
+            "How do you practice mindfulness in your daily life? 🧘‍♀️",
+            "Share a quote or mantra that inspires you! ✨",
+            "What helps you feel grounded and present? 🌳",
+            "Tag someone who brings positivity to your life! 🌟",
+            "What's your favorite self-care ritual? 🛁",
+            "How do you stay connected to your purpose? 🎯",
+            "What's one thing you're grateful for today? 🙏",
+            "How do you recharge your energy? 🔋",
+            "What's your go-to for finding inner peace? 🕊️",
+            "Consent is fun! Respect and joy go hand in hand. 🎉🕺💃",
+            "Celebrate your boundaries—they make connection possible! 🎆",
+            "Grateful for the little things: a smile, a song, a sunrise. 🌅😊🎶",
+            "Dance like nobody's watching and bow to your own joy! 💃🕺🙇‍♂️",
+            "Fireworks of gratitude for everyone who supports me! 🎆🙏",
+            "What are you celebrating today? Share your wins! 🎉🥳",
+            "Thank you, universe, for another day to grow and love. 🌌💖",
+            "Let's spread kindness like confetti! 🎊",
+            "Bow to your journey—every step matters. 🙇‍♀️✨",
+            "Who or what are you grateful for right now? Tag them! 🙏💫"
+        ]
+    }
+    
     def __init__(self):
-        load_dotenv()
         self.setup_logging()
+        self.settings = get_settings()
         self.load_configuration()
+        subscribe(self.on_settings_changed)
         
-        # Initialize safety checker
+        # Initialize safety checker and the breaker it drives
         self.safety_checker = SafetyChecker()
+        self.breaker = CircuitBreaker('x', self.safety_checker, logger=self.logger)
         
         # Initialize X client (disabled for public release)
         self.client = None
         self.api = None
         # self.setup_x_client()  # Disabled
         
+        # Durable queue of posts, so retries never double-post
+        self.outbox = PostOutbox(
+            'x',
+            max_attempts=BotConfig.OUTBOX['max_attempts'],
+            keep_sent_days=BotConfig.OUTBOX['keep_sent_days'],
+            logger=self.logger
+        )
+        
+        # Tweets and users already liked/followed, so we never spend a call twice
+        self.engagement_index = EngagementIndex('x', logger=self.logger)
+        
+        # Newest post seen per search term, so searches only return new posts
+        self.feed_cursors = FeedCursorStore(
+            'x',
+            max_age_hours=BotConfig.FEEDS['x_cursor_max_age_hours'],
+            logger=self.logger
+        )
+        
+        # Sizes searches from the remaining budget and past filter pass rates
+        self.fetch_sizer = FetchSizer('x', logger=self.logger)
+        
+        # Media preparation for posts with attachments
+        self.preprocessor = ImagePreprocessor(logger=self.logger)
+        self.video_pipeline = VideoPipeline(logger=self.logger)
+        
         # Activity tracking
         self.activity_tracker = {
             'session_start': None,
@@ -42,6 +143,13 @@ class XBot:
         
         self.load_activity_data()
         
+        # Recently posted texts (kept in the activity state), so no status repeats
+        self.recent_posts = RecentContent(
+            self.activity_tracker.setdefault('recent_posts', []),
+            size=BotConfig.CONTENT['recent_posts_size'],
+            window_days=BotConfig.CONTENT['repeat_window_days']
+        )
+        
     def setup_logging(self):
         """Setup logging for X bot"""
         logging.basicConfig(
@@ -54,7 +162,9 @@ class XBot:
         self.logger = logging.getLogger('XBot')
         
     def load_configuration(self):
-        """Load X configuration from environment (credentials removed)"""
+        """Load X configuration from the shared settings (credentials removed)"""
+        settings = self.settings
+        
         # X API credentials removed for public release
         # self.api_key = os.getenv('X_API_KEY')
         # self.api_secret = os.getenv('X_API_SECRET')
@@ -63,19 +173,27 @@ class XBot:
         # self.bearer_token = os.getenv('X_BEARER_TOKEN')
         
         # Bot settings
-        self.max_tweets_per_day = int(os.getenv('MAX_TWEETS_PER_DAY', 10))
-        self.max_retweets_per_hour = int(os.getenv('MAX_RETWEETS_PER_HOUR', 20))
-        self.max_likes_per_hour = int(os.getenv('MAX_LIKES_PER_HOUR', 30))
+        self.max_tweets_per_day = settings.max_tweets_per_day
+        self.max_retweets_per_hour = settings.max_retweets_per_hour
+        self.max_likes_per_hour = settings.max_likes_per_hour
+        self.max_follows_per_hour = settings.max_follows_per_hour
         
         # Content settings
-        self.content_folder = Path(os.getenv('CONTENT_FOLDER', 'content'))
-        self.x_hashtags = os.getenv('X_HASHTAGS', '#YesPlease #SocialMedia #Content #X')
+        self.content_folder = Path(settings.content_folder)
+        self.x_hashtags = settings.x_hashtags
         
         # Platform settings
-        self.enabled = os.getenv('ENABLE_X', 'true').lower() == 'true'
+        self.enabled = settings.enable_x
+        
+        # Diagnostics
+        configure_tracing(settings.trace_format)
         
         self.logger.info(f"X bot configured - Enabled: {self.enabled}")
         
+    def on_settings_changed(self, settings, changed):
+        """Apply reloaded settings without re-creating the client"""
+        self.load_configuration()
+        
     # def setup_x_client(self):
     #     """Setup X API client (disabled for public release)"""
     #     pass
@@ -97,6 +215,7 @@ class XBot:
         except Exception as e:
             self.logger.error(f"Error loading X activity data: {e}")
             
+    @traced()
     def save_activity_data(self):
         """Save activity tracking data"""
         try:
@@ -138,24 +257,37 @@ class XBot:
         if not self.enabled:
             return False, "X bot disabled"
             
-        self.reset_hourly_counters()
-        self.reset_daily_counters()
+        if self.remaining_budget(action_type) <= 0:
+            window = self.action_limits()[action_type][1]
+            return False, f"{'Daily' if window == 'day' else 'Hourly'} {action_type} limit reached"
+            
+        return True, "OK"
         
-        # Get current counts
-        hourly_count = self.activity_tracker['actions_this_hour'].get(action_type, 0)
-        daily_count = self.activity_tracker['daily_stats'].get(action_type, 0)
+    def action_limits(self) -> Dict[str, Tuple[int, str]]:
+        """Limit per action type and whether it counts per 'hour' or per 'day'"""
+        return {
+            'tweet': (self.max_tweets_per_day, 'day'),
+            'like': (self.max_likes_per_hour, 'hour'),
+            'retweet': (self.max_retweets_per_hour, 'hour'),
+            'repost': (self.max_retweets_per_hour, 'hour'),
+            'follow': (self.max_follows_per_hour, 'hour')
+        }
         
-        # Check limits
-        if action_type == 'tweet' and daily_count >= self.max_tweets_per_day:
-            return False, "Daily tweet limit reached"
-            
-        if action_type == 'like' and hourly_count >= self.max_likes_per_hour:
-            return False, "Hourly like limit reached"
+    def remaining_budget(self, action_type: str) -> int:
+        """How many more actions of this type are allowed in the current window"""
+        if not self.enabled:
+            return 0
             
-        if action_type == 'retweet' and hourly_count >= self.max_retweets_per_hour:
-            return False, "Hourly retweet limit reached"
+        self.reset_hourly_counters()
+        self.reset_daily_counters()
+        
+        limits = self.action_limits()
+        if action_type not in limits:
+            return BotConfig.SAFETY['daily_activity_limit']
             
-        return True, "OK"
+        limit, window = limits[action_type]
+        counts = self.activity_tracker['daily_stats'] if window == 'day' else self.activity_tracker['actions_this_hour']
+        return max(0, limit - counts.get(action_type, 0))
         
     def record_action(self, action_type: str):
         """Record that an action was performed"""
@@ -177,74 +309,26 @@ class XBot:
         """Add human-like delay between actions"""
         delay = random.randint(30, 120)
         self.logger.info(f"X delay: {delay} seconds")
-        time.sleep(delay)
+        sleep(delay)
         
     def create_post_content(self, content_type: str = 'general') -> str:
-        """Create engaging post content for X"""
-        post_templates = {
-            'mental_health': [
-                "Your mental health is a priority. Take time for yourself today. 💚",
-                "Healing is not linear. Be gentle with yourself on the journey.",
-                "You are enough, just as you are. #SelfAcceptance 🙏",
-                "It's okay to rest. Your mind and soul need it, too. 💤",
-                "Progress is progress, no matter how small. #KeepGoing 🐢",
-                "You are not alone. Reach out, connect, and share. #SupportEachOther 🤝",
-                "Breathe in calm, breathe out stress. #Mindfulness 🌬️",
-                "Let go of what you can't control. Embrace the present moment. 🕊️",
-                "Self-care is not selfish. It's essential. #SelfCare 🛁",
-                "Your story matters. Every chapter, every feeling. #MentalHealthMatters 📖"
-            ],
-            'spirituality': [
-                "Nourish your soul with gratitude and kindness. ✨",
-                "Trust the timing of your life. The universe has a plan. 🌌",
-                "Stillness is where clarity lives. Take a mindful pause. 🧘‍♂️",
-                "Let your light shine, even on the darkest days. 🕯️",
-                "You are a unique expression of the universe. #Oneness 🌠",
-                "Peace begins within. Center yourself and radiate calm. 🧘‍♀️",
-                "Listen to your intuition. It knows the way. 👂✨",
-                "Release what no longer serves you. Make space for growth. 🍃",
-                "Every breath is a new beginning. #Presence 🌱",
-                "Connect with your higher self. Trust your journey. 🦋"
-            ],
-            'wellness': [
-                "Wellness is a daily practice, not a destination. #HealthyHabits 🏃‍♂️",
-                "Hydrate, nourish, move, rest. Repeat. #WellnessRoutine 💧🥗🧘‍♂️😴",
-                "Celebrate small wins on your wellness journey. 🎉",
-                "Balance is not something you find, it's something you create. ⚖️",
-                "A healthy mind supports a healthy body. #HolisticHealth 🧠💪",
-                "Gratitude is the best medicine. #Thankful 🙏",
-                "Let nature restore your spirit. Take a mindful walk today. 🌳🚶‍♀️",
-                "Boundaries are a form of self-respect. Set them with love. 🛑❤️",
-                "Rest is productive. Give yourself permission to recharge. 🔋",
-                "You are worthy of wellness and joy. 🌞"
-            ],
-            'engagement': [
-                "What's one thing you do for your mental well-being? Share below! 💬",
-                "How do you practice mindfulness in your daily life? 🧘‍♀️",
-                "Share a quote or mantra that inspires you! ✨",
-                "What helps you feel grounded and present? 🌳",
-                "Tag someone who brings positivity to your life! 🌟",
-                "What's your favorite self-care ritual? 🛁",
-                "How do you stay connected to your purpose? 🎯",
-                "What's one thing you're grateful for today? 🙏",
-                "How do you recharge your energy? 🔋",
-                "What's your go-to for finding inner peace? 🕊️",
-                "Consent is fun! Respect and joy go hand in hand. 🎉🕺💃",
-                "Celebrate your boundaries—they make connection possible! 🎆",
-                "Grateful for the little things: a smile, a song, a sunrise. 🌅😊🎶",
-                "Dance like nobody's watching and bow to your own joy! 💃🕺🙇‍♂️",
-                "Fireworks of gratitude for everyone who supports me! 🎆🙏",
-                "What are you celebrating today? Share your wins! 🎉🥳",
-                "Thank you, universe, for another day to grow and love. 🌌💖",
-                "Let's spread kindness like confetti! 🎊",
-                "Bow to your journey—every step matters. 🙇‍♀️✨",
-                "Who or what are you grateful for right now? Tag them! 🙏💫"
-            ]
-        }
+        """Create engaging post content for X (read-only; the text is remembered once posted)"""
+        # Texts still waiting in the outbox are not in the repeat guard yet, but would repeat just the same
+        queued = self.queued_texts()
         
-        # Select random template from category
-        templates = post_templates.get(content_type, post_templates['engagement'])
-        base_post = random.choice(templates)
+        # Select a random template not posted inside the repeat window, falling back to other categories
+        templates = self.POST_TEMPLATES.get(content_type, self.POST_TEMPLATES['engagement'])
+        fresh = [t for t in templates if not self.is_repeat(t, queued)]
+        if not fresh:
+            fresh = [t for group in self.POST_TEMPLATES.values() for t in group if not self.is_repeat(t, queued)]
+            if fresh:
+                self.logger.info(f"All '{content_type}' templates posted or queued recently, using another category")
+                
+        if fresh:
+            base_post = random.choice(fresh)
+        else:
+            # Every template is recent; vary one so the status is still unique
+            base_post = self.vary_post(random.choice(templates), queued)
         
         # Add hashtags
         hashtags = self.x_hashtags
@@ -261,168 +345,343 @@ class XBot:
             else:
                 full_post = base_post[:277] + "..."
                 
+        # Remembered by the repeat guard once X confirms the post (dispatch_post / reconcile_post)
         return full_post
         
-    def post_to_x(self, content: str = None) -> bool:
-        """Post to X"""
+    def warm_up_tasks(self) -> Dict:
+        """Start-up work that would otherwise land on the first scheduled job"""
+        tasks = {'x_templates': self.precompile_templates}
+        if self.client:
+            tasks['x_account'] = self.resolve_account
+        return tasks
+        
+    def precompile_templates(self):
+        """Hash every template once so duplicate checks at post time are cache hits"""
+        fresh = {
+            category: sum(1 for template in templates if not self.recent_posts.seen(template))
+            for category, templates in self.POST_TEMPLATES.items()
+        }
+        self.logger.info(f"Post templates ready, fresh per category: {fresh}")
+        
+    def resolve_account(self):
+        """Look up our own user id, needed to reconcile unconfirmed posts"""
+        self._user_id = call_with_timeout(self.client.get_me, operation='fetch').data.id
+        self.logger.info(f"Authenticated to X as user {self._user_id}")
+        
+    def test_connection(self) -> Dict:
+        """Check the API client with one cheap call"""
+        if not self.client:
+            return {'ok': False, 'detail': 'X client not configured'}
+        try:
+            self.resolve_account()
+            return {'ok': True, 'detail': f"authenticated as user {self._user_id}"}
+        except Exception as e:
+            self.logger.warning(f"X connection check failed: {e}")
+            return {'ok': False, 'detail': str(e)}
+            
+    def queued_texts(self) -> set:
+        """Digests of the texts pending or dispatching in the outbox"""
+        return {digest(record['payload'].get('text') or '') for record in self.outbox.pending()}
+        
+    def is_repeat(self, text: str, queued: set = frozenset()) -> bool:
+        """True if text was posted inside the repeat window or is already queued"""
+        return self.recent_posts.seen(text) or digest(text) in queued
+        
+    def vary_post(self, base_post: str, queued: set = frozenset()) -> str:
+        """A variant of base_post that has not been posted inside the repeat window or queued"""
+        closers = ["✨", "💚", "🌿", "🙏", "🌞", "Have a beautiful day!", "Take care of yourself today."]
+        for closer in closers:
+            candidate = f"{base_post} {closer}"
+            if not self.is_repeat(candidate, queued):
+                return candidate
+                
+        stamp = datetime.now().strftime('%b %d')
+        attempt = 1
+        candidate = f"{base_post} ({stamp})"
+        while self.is_repeat(candidate, queued):
+            attempt += 1
+            candidate = f"{base_post} ({stamp} · {attempt})"
+        return candidate
+        
+    def upload_media(self, media_path) -> Optional[str]:
+        """Upload an image or video through the v1.1 API and return its media id"""
+        if not self.api:
+            self.logger.error("X media API not available")
+            return None
+            
+        media_path = Path(media_path)
+        if media_path.suffix.lower() == '.mp4':
+            # Chunked, resumable upload with progress logging
+            media = call_with_timeout(self.video_pipeline.upload, self.api, media_path, operation='upload_video', client=self.api)
+        else:
+            upload_file = self.preprocessor.prepare(media_path, 'x')
+            media = call_with_timeout(self.api.media_upload, str(upload_file), operation='upload')
+            
+        return str(media.media_id)
+        
+    def dispatch_post(self, record: Dict) -> Optional[str]:
+        """Send one outbox record to X; returns the tweet id or None"""
+        content = record['payload']['text']
+        media_path = record['payload'].get('media_path')
+        
+        self.logger.info(f"Attempting to post to X. Content: {content}")
+        
+        # Post to X
+        if media_path:
+            media_id = self.upload_media(media_path)
+            if not media_id:
+                return None
+            response = call_with_timeout(self.client.create_tweet, text=content, media_ids=[media_id], operation='post')
+        else:
+            response = call_with_timeout(self.client.create_tweet, text=content, operation='post')
+        self.logger.info(f"X API response: {getattr(response, 'data', None)} | Full: {response}")
+        
+        if response.data:
+            self.recent_posts.add(content)
+            self.record_action('tweet')
+            self.logger.info(f"Successfully posted to X: {response.data['id']}")
+            return response.data['id']
+        
+        self.logger.error(f"Failed to post to X. Response: {response}")
+        return None
+        
+    def reconcile_post(self, record: Dict) -> Optional[str]:
+        """Find a tweet an earlier, unconfirmed attempt may already have published"""
+        if not getattr(self, '_user_id', None):
+            self._user_id = call_with_timeout(self.client.get_me, operation='fetch').data.id
+            
+        text = " ".join(record['payload']['text'].split())
+        tweets = call_with_timeout(self.client.get_users_tweets, self._user_id, max_results=20, operation='fetch')
+        
+        for tweet in tweets.data or []:
+            if " ".join(tweet.text.split()) == text:
+                # The earlier attempt counted against the limit and the repeat guard too
+                self.recent_posts.add(record['payload']['text'])
+                self.record_action('tweet')
+                return tweet.id
+        return None
+        
+    @traced()
+    def post_to_x(self, content: str = None, media_path=None) -> bool:
+        """Queue a post in the outbox (unless earlier posts are still waiting), then drain queued posts to X"""
         can_post, reason = self.can_perform_action('tweet')
         if not can_post:
             self.logger.info(f"Skipping X post: {reason}")
             return False
             
+        if not self.breaker.allow_request():
+            self.logger.warning(f"X circuit open, deferring post (retry in {self.breaker.seconds_until_retry()}s)")
+            return False
+            
         try:
-            if not content:
-                content = self.create_post_content()
+            # Queued posts are retried as-is; new content is only queued once the backlog is sent,
+            # so an outage does not add a record every run
+            backlog = len(self.outbox.pending())
+            if backlog:
+                self.logger.info(f"{backlog} queued X post(s) waiting, sending those instead of new content")
+            else:
+                if not content:
+                    content = self.create_post_content()
+                self.outbox.enqueue({'text': content, 'media_path': str(media_path) if media_path else None})
                 
-            self.logger.info(f"Attempting to post to X. Content: {content}")
-            
-            # Post to X
-            response = self.client.create_tweet(text=content)
-            self.logger.info(f"X API response: {getattr(response, 'data', None)} | Full: {response}")
+            sent = self.outbox.drain(
+                self.dispatch_post,
+                self.reconcile_post,
+                batch_size=BotConfig.OUTBOX['batch_size'],
+                can_continue=lambda: self.can_perform_action('tweet')[0],
+                delay=self.human_delay
+            )
             
-            if response.data:
-                self.record_action('tweet')
-                self.logger.info(f"Successfully posted to X: {response.data['id']}")
-                self.human_delay()
+            if sent:
+                self.breaker.record_success()
                 return True
-            else:
-                self.logger.error(f"Failed to post to X. Response: {response}")
-                return False
+            return False
                 
         except Exception as e:
             import traceback
             self.logger.error(f"Error posting to X: {e}\n{traceback.format_exc()}")
+            self.breaker.record_failure(f"Error posting to X: {e}")
             return False
+        finally:
+            self.breaker.end_trial()
             
+    def search_new_posts(self, consumer: str, search_term: str, page_size: int, stats: PipelineStats,
+                         select: str = 'posts', **fields) -> Iterator[List]:
+        """Lazily yield pages of recent-search results newer than this consumer's cursor
+        
+        `select` picks the slim records to yield from each SearchPage ('posts' or 'users').
+        """
+        query = f"{search_term} -is:retweet lang:en"
+        page_size = max(10, min(page_size, 100))  # API accepts 10-100
+        since_id = self.feed_cursors.get(consumer, search_term)
+        
+        def fetch_page(next_token):
+            nonlocal since_id
+            params = dict(query=query, max_results=page_size, **fields)
+            if since_id:
+                params['since_id'] = since_id
+            if next_token:
+                params['next_token'] = next_token
+                
+            try:
+                response = call_with_timeout(self.client.search_recent_tweets, **params, operation='fetch')
+            except tweepy.errors.BadRequest as e:
+                if not since_id or next_token:
+                    raise
+                # since_id fell out of the search window; start over from the newest posts
+                self.logger.info(f"Cursor for '{search_term}' rejected ({e}), doing a full fetch")
+                self.feed_cursors.reset(consumer, search_term)
+                since_id = None
+                del params['since_id']
+                response = call_with_timeout(self.client.search_recent_tweets, **params, operation='fetch')
+                
+            # Project straight away so the full response objects can be dropped
+            page = search_page(response)
+            del response
+            
+            if not next_token:
+                self.feed_cursors.advance(consumer, search_term, page.newest_id)
+                self.feed_cursors.save()
+                if since_id:
+                    self.logger.info(f"{page.result_count} new posts for '{search_term}' since {since_id}")
+                    
+            return getattr(page, select), page.next_token
+            
+        return paged(fetch_page, BotConfig.FEEDS['max_pages'], stats)
+        
+    @traced()
     def like_posts(self, search_term: str, count: int = 5) -> int:
         """Like posts containing search term"""
-        if not self.can_perform_action('like')[0]:
+        wanted = min(count, self.remaining_budget('like'))
+        if wanted <= 0:
+            self.logger.info("No like budget left, skipping search")
             return 0
             
-        liked_count = 0
+        stats = PipelineStats()
         
+        def like(post):
+            call_with_timeout(self.client.like, post.id)
+            self.engagement_index.add('like', post.id)
+            self.record_action('like')
+            self.logger.info(f"Liked post: {post.id}")
+            return True
+            
         try:
             self.logger.info(f"Searching for posts with: {search_term}")
             
-            # Search for posts
-            posts = self.client.search_recent_tweets(
-                query=f"{search_term} -is:retweet lang:en",
-                max_results=min(count * 2, 100),
-                tweet_fields=['author_id', 'created_at', 'public_metrics']
-            )
+            # Search for posts newer than the last run, pulled only as needed
+            posts = self.search_new_posts('like', search_term, self.fetch_sizer.size('like', wanted), stats)
+            posts = keep(posts, not_seen(self.engagement_index, 'like'), stats)
             
-            if not posts.data:
+            consume(posts, like, wanted, stats,
+                    can_continue=lambda: self.can_perform_action('like')[0],
+                    delay=self.human_delay, name='like', logger=self.logger, breaker=self.breaker)
+            
+            if not stats.fetched:
                 self.logger.info("No posts found to like")
-                return 0
-                
-            for post in posts.data[:count]:
-                if not self.can_perform_action('like')[0]:
-                    break
-                    
-                try:
-                    # Like the post
-                    self.client.like(post.id)
-                    self.record_action('like')
-                    liked_count += 1
-                    self.logger.info(f"Liked post: {post.id}")
-                    self.human_delay()
-                    
-                except Exception as e:
-                    self.logger.error(f"Error liking post {post.id}: {e}")
-                    
-            return liked_count
+            return stats.acted
             
         except Exception as e:
             self.logger.error(f"Error in like_posts: {e}")
-            return 0
+            self.breaker.record_failure(f"Error in like_posts: {e}")
+            return stats.acted
             
+        finally:
+            self.fetch_sizer.record('like', stats.considered, stats.acted)
+            self.engagement_index.save()
+            
+    @traced()
     def repost_content(self, search_term: str, count: int = 3) -> int:
         """Repost content containing search term"""
-        if not self.can_perform_action('repost')[0]:
+        wanted = min(count, self.remaining_budget('repost'))
+        if wanted <= 0:
+            self.logger.info("No repost budget left, skipping search")
             return 0
             
-        reposted_count = 0
+        stats = PipelineStats()
         
+        def repost(post):
+            call_with_timeout(self.client.retweet, post.id)
+            self.record_action('repost')
+            self.logger.info(f"Reposted: {post.id}")
+            return True
+            
         try:
             self.logger.info(f"Searching for posts to repost: {search_term}")
             
-            # Search for posts
-            posts = self.client.search_recent_tweets(
-                query=f"{search_term} -is:retweet lang:en",
-                max_results=min(count * 3, 100),
-                tweet_fields=['author_id', 'created_at', 'public_metrics']
+            # Search for posts newer than the last run, pulled only as needed
+            posts = self.search_new_posts(
+                'repost', search_term, self.fetch_sizer.size('repost', wanted), stats,
+                tweet_fields=['public_metrics']
             )
+            # Repost the best-engaged posts of each page first
+            posts = keep(posts, best(repost_scores, lambda: wanted - stats.acted, stats))
+            
+            consume(posts, repost, wanted, stats,
+                    can_continue=lambda: self.can_perform_action('repost')[0],
+                    delay=self.human_delay, name='repost', logger=self.logger, breaker=self.breaker)
             
-            if not posts.data:
+            if not stats.fetched:
                 self.logger.info("No posts found to repost")
-                return 0
-                
-            for post in posts.data[:count]:
-                if not self.can_perform_action('repost')[0]:
-                    break
-                    
-                try:
-                    # Check if post has good engagement
-                    metrics = post.public_metrics
-                    if metrics['like_count'] > 5 or metrics['retweet_count'] > 2:
-                        self.client.retweet(post.id)
-                        self.record_action('repost')
-                        reposted_count += 1
-                        self.logger.info(f"Reposted: {post.id}")
-                        self.human_delay()
-                    
-                except Exception as e:
-                    self.logger.error(f"Error reposting {post.id}: {e}")
-                    
-            return reposted_count
+            return stats.acted
             
         except Exception as e:
             self.logger.error(f"Error in repost_content: {e}")
-            return 0
+            self.breaker.record_failure(f"Error in repost_content: {e}")
+            return stats.acted
+            
+        finally:
+            self.fetch_sizer.record('repost', stats.considered, stats.acted)
             
+    @traced()
     def follow_users(self, search_term: str, count: int = 2) -> int:
         """Follow users who post about search term"""
-        followed_count = 0
+        wanted = min(count, self.remaining_budget('follow'))
+        if wanted <= 0:
+            self.logger.info("No follow budget left, skipping search")
+            return 0
+            
+        stats = PipelineStats()
         
+        def follow(user):
+            call_with_timeout(self.client.follow_user, user.id)
+            self.engagement_index.add('follow', user.id)
+            self.record_action('follow')
+            self.logger.info(f"Followed user: @{user.username}")
+            return True
+            
         try:
             self.logger.info(f"Looking for users to follow: {search_term}")
             
-            # Search for posts
-            posts = self.client.search_recent_tweets(
-                query=f"{search_term} -is:retweet lang:en",
-                max_results=min(count * 3, 100),
-                tweet_fields=['author_id'],
+            # Authors of posts newer than the last run, pulled only as needed
+            users = self.search_new_posts(
+                'follow', search_term, self.fetch_sizer.size('follow', wanted), stats,
+                select='users',
                 expansions=['author_id'],
                 user_fields=['public_metrics']
             )
+            users = keep(users, not_seen(self.engagement_index, 'follow'), stats)
+            # Follow the best-scoring users with reasonable follower ratios first
+            users = keep(users, best(follow_scores, lambda: wanted - stats.acted, stats))
             
-            if not posts.data or not posts.includes.get('users'):
+            consume(users, follow, wanted, stats,
+                    can_continue=lambda: self.can_perform_action('follow')[0],
+                    delay=self.human_delay, name='follow', logger=self.logger, breaker=self.breaker)
+            
+            if not stats.fetched:
                 self.logger.info("No users found to follow")
-                return 0
-                
-            for user in posts.includes['users'][:count]:
-                try:
-                    # Check user metrics
-                    metrics = user.public_metrics
-                    followers = metrics['followers_count']
-                    following = metrics['following_count']
-                    
-                    # Follow users with reasonable follower ratios
-                    if 100 <= followers <= 10000 and following < followers * 2:
-                        self.client.follow_user(user.id)
-                        followed_count += 1
-                        self.logger.info(f"Followed user: @{user.username}")
-                        self.human_delay()
-                        
-                except Exception as e:
-                    self.logger.error(f"Error following user {user.username}: {e}")
-                    
-            return followed_count
+            return stats.acted
             
         except Exception as e:
             self.logger.error(f"Error in follow_users: {e}")
-            return 0
+            self.breaker.record_failure(f"Error in follow_users: {e}")
+            return stats.acted
+            
+        finally:
+            self.fetch_sizer.record('follow', stats.considered, stats.acted)
+            self.engagement_index.save()
             
+    @traced(root=True)
     def run_daily_activities(self):
         """Run all daily X bot activities"""
         if not self.enabled:
@@ -454,18 +713,26 @@ class XBot:
             self.logger.error(f"Error in run_daily_activities: {e}")
             
     def get_activity_summary(self) -> Dict:
-        """Get summary of X bot activities"""
-        self.reset_hourly_counters()
-        self.reset_daily_counters()
+        """Get summary of X bot activities (read-only, safe while a job runs)"""
+        # Counters from an earlier day or hour count as empty; the next job resets and saves them
+        now = datetime.now()
+        stale_day = self.activity_tracker['last_activity_reset'] < now.date()
+        stale_hour = stale_day or getattr(self, '_last_hour_reset', None) != now.hour
         
         return {
-            'today': self.activity_tracker['daily_stats'],
-            'this_hour': self.activity_tracker['actions_this_hour'],
+            'today': {} if stale_day else dict(self.activity_tracker['daily_stats']),
+            'this_hour': {} if stale_hour else dict(self.activity_tracker['actions_this_hour']),
             'enabled': self.enabled,
-            'authenticated': self.client is not None
+            'authenticated': self.client is not None,
+            'circuit': self.breaker.status()
         }
 
 if __name__ == "__main__":
+    # --profile: one run against mock clients
+    from profiling import profile_from_argv
+    if profile_from_argv('x'):
+        raise SystemExit(0)
+        
     try:
         bot = XBot()
         print("X bot initialized successfully!")